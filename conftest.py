@@ -0,0 +1 @@
+# conftest.py - Puts the repository root on sys.path so tests import src.*
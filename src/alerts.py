@@ -0,0 +1,169 @@
+# src/alerts.py - Threshold Alerts
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stats import epoch_seconds, now_seconds
+
+# Defaults match the Config page sliders
+DEFAULT_SETTINGS = {
+    "cpu_threshold": 80,
+    "memory_threshold": 85,
+    "disk_threshold": 90,
+    "temp_threshold": 75,
+    "alert_hysteresis": 5,
+    "alert_sustain_minutes": 5,
+    "alert_warning_margin": 20,
+}
+
+# metric -> (settings key, source, column)
+METRICS: dict[str, tuple[str, str, str]] = {
+    "cpu": ("cpu_threshold", "time_series", "cpu"),
+    "memory": ("memory_threshold", "time_series", "memory"),
+    "disk": ("disk_threshold", "server_metrics", "disk_usage"),
+    "temperature": ("temp_threshold", "host", "temperature"),
+}
+
+LEVELS = ("warning", "critical")
+
+class Alert(NamedTuple):
+    metric: str
+    level: str
+    firing: bool
+    value: float | None
+    threshold: float
+    since: float | None
+
+@dataclass
+class RuleState:
+    firing: bool = False
+    since: float | None = None
+    streak_start: float | None = None  # start of the current run above threshold
+    last_ts: float | None = None
+    value: float | None = None
+
+# =====EVALUATION=====
+def evaluate(ts: np.ndarray, values: np.ndarray, raise_at: np.ndarray, clear_at: np.ndarray,
+             sustain: float, firing: np.ndarray, streak_start: np.ndarray):
+    """Run a batch of samples through hysteresis/sustain rules at once.
+
+    ts: (n,) sample times; values: (rules, n); raise_at/clear_at/firing/
+    streak_start: (rules,) thresholds and carried-in state (streak_start is
+    NaN when the previous batch ended below threshold). Returns the state
+    after the batch plus the time each rule last changed state (NaN if not).
+    """
+    rules, n = values.shape
+    idx = np.broadcast_to(np.arange(n), (rules, n))
+    above = values > raise_at[:, None]
+
+    # Start time of the run above threshold each sample belongs to
+    run_start = np.maximum.accumulate(np.where(above, -1, idx), axis=1) + 1
+    run_start_ts = ts[np.minimum(run_start, n - 1)]
+    carried = (run_start == 0) & ~np.isnan(streak_start)[:, None]
+    run_start_ts = np.where(carried, streak_start[:, None], run_start_ts)
+
+    # Raise once the run has lasted `sustain`; clear below the lower threshold
+    raise_evt = above & (ts[None, :] - run_start_ts >= sustain)
+    clear_evt = values < clear_at[:, None]
+    last_raise = np.max(np.where(raise_evt, idx, -1), axis=1)
+    last_clear = np.max(np.where(clear_evt, idx, -1), axis=1)
+    new_firing = np.where(last_raise == last_clear, firing, last_raise > last_clear)
+
+    # When did the state flip: first raise after the last clear, or vice versa
+    first_raise_after = np.min(np.where(raise_evt & (idx > last_clear[:, None]), idx, n), axis=1)
+    first_clear_after = np.min(np.where(clear_evt & (idx > last_raise[:, None]), idx, n), axis=1)
+    flip_idx = np.where(new_firing, first_raise_after, first_clear_after)
+    # A state that ends where it started may still have flipped twice
+    changed = (new_firing != firing) | np.where(new_firing, last_clear >= 0, last_raise >= 0)
+    changed_at = np.where(changed, ts[np.minimum(flip_idx, n - 1)], np.nan)
+
+    new_streak = np.where(above[:, -1], run_start_ts[:, -1], np.nan)
+    return new_firing, new_streak, changed_at
+
+class AlertEngine:
+    """Checks each collected batch against the thresholds saved on the
+    Config page. Runs inside the collector, so alerts keep updating whether
+    or not anyone has a page open."""
+
+    def __init__(self, store):
+        self.store = store
+        self.state: dict[tuple[str, str], RuleState] = {
+            (metric, level): RuleState() for metric in METRICS for level in LEVELS
+        }
+
+    def settings(self) -> dict:
+        snapshot = self.store.get("settings")
+        return {**DEFAULT_SETTINGS, **(snapshot.value if snapshot else {})}
+
+    def thresholds(self, metric: str, settings: dict) -> dict[str, float]:
+        critical = float(settings[METRICS[metric][0]])
+        return {"warning": critical - settings["alert_warning_margin"], "critical": critical}
+
+    def ingest(self, source: str, value) -> dict[str, Alert]:
+        metrics = [m for m, (_, src, _) in METRICS.items() if src == source]
+        if not metrics:
+            return self.alerts()
+
+        if source == "server_metrics":
+            ts = np.array([now_seconds()])
+            columns = {METRICS[m][2]: np.array([float(value[METRICS[m][2]])]) for m in metrics}
+        else:
+            ts = epoch_seconds(value['timestamp'])
+            columns = {METRICS[m][2]: value[METRICS[m][2]].to_numpy(dtype=float) for m in metrics}
+
+        # Only samples newer than what every rule of this source has seen
+        last = [self.state[(m, level)].last_ts for m in metrics for level in LEVELS]
+        if all(t is not None for t in last):
+            start = np.searchsorted(ts, min(last), side="right")
+            ts = ts[start:]
+            columns = {c: v[start:] for c, v in columns.items()}
+        if not len(ts):
+            return self.alerts()
+
+        settings = self.settings()
+        keys = [(m, level) for m in metrics for level in LEVELS]
+        values = np.vstack([columns[METRICS[m][2]] for m, _ in keys])
+        raise_at = np.array([self.thresholds(m, settings)[level] for m, level in keys])
+        clear_at = raise_at - settings["alert_hysteresis"]
+        firing = np.array([self.state[k].firing for k in keys])
+        streak = np.array([np.nan if self.state[k].streak_start is None else self.state[k].streak_start for k in keys])
+
+        new_firing, new_streak, changed_at = evaluate(
+            ts, values, raise_at, clear_at, settings["alert_sustain_minutes"] * 60, firing, streak
+        )
+
+        for i, key in enumerate(keys):
+            state = self.state[key]
+            state.firing = bool(new_firing[i])
+            state.streak_start = None if np.isnan(new_streak[i]) else float(new_streak[i])
+            if not np.isnan(changed_at[i]):
+                state.since = float(changed_at[i])
+            state.last_ts = float(ts[-1])
+            state.value = float(values[i, -1])
+        return self.alerts(settings)
+
+    def alerts(self, settings: dict | None = None) -> dict[str, Alert]:
+        """Most severe alert per metric (the warning rule when nothing fires)"""
+        settings = settings or self.settings()
+        result = {}
+        for metric in METRICS:
+            for level in reversed(LEVELS):
+                state = self.state[(metric, level)]
+                if state.firing or level == "warning":
+                    result[metric] = Alert(metric, level, state.firing, state.value,
+                                           self.thresholds(metric, settings)[level], state.since)
+                    break
+        return result
+
+def status_class(alert: Alert | None) -> str:
+    if alert is None or not alert.firing:
+        return "status-good"
+    return "status-danger" if alert.level == "critical" else "status-warning"
+
+def status_label(alert: Alert | None) -> str:
+    if alert is None or not alert.firing:
+        return "Normal"
+    return "High" if alert.level == "critical" else "Medium"
+
+__all__ = ["DEFAULT_SETTINGS", "Alert", "AlertEngine", "evaluate", "status_class", "status_label"]
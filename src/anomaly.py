@@ -0,0 +1,132 @@
+# src/anomaly.py - Streaming Anomaly Detection
+import math
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.stats import DAY, epoch_seconds
+
+# Each detector is O(1) in time and memory per sample and never refits
+
+# =====DETECTORS=====
+def _sign(x: float) -> float:
+    return (x > 0) - (x < 0)
+
+class EwmaZScore:
+    """z-score against an exponentially weighted mean and variance"""
+
+    def __init__(self, alpha: float = 0.05):
+        self.alpha = alpha
+        self.mean: float | None = None
+        self.var = 0.0
+
+    def update(self, x: float) -> float:
+        if self.mean is None:
+            self.mean = x
+            return 0.0
+        diff = x - self.mean
+        z = diff / math.sqrt(self.var) if self.var > 0 else 0.0
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+        return z
+
+class StreamingMad:
+    """Robust z-score from a running median and median absolute deviation,
+    both tracked by stochastic approximation"""
+
+    def __init__(self, step: float = 0.05):
+        self.step = step
+        self.median: float | None = None
+        self.mad = 0.0
+        self.spread = 0.0  # EWMA of |x - median|, sets the step size
+
+    def update(self, x: float) -> float:
+        if self.median is None:
+            self.median = x
+            return 0.0
+        deviation = abs(x - self.median)
+        z = 0.6745 * (x - self.median) / self.mad if self.mad > 0 else 0.0
+        self.spread = deviation if self.spread == 0 else self.spread + self.step * (deviation - self.spread)
+        self.median += self.step * self.spread * _sign(x - self.median)
+        self.mad = max(self.mad + self.step * self.spread * _sign(deviation - self.mad), 0.0)
+        return z
+
+class SeasonalBaseline:
+    """Per-slot EWMA mean/variance, e.g. one slot per hour of the day"""
+
+    def __init__(self, period: float = DAY, slots: int = 24, alpha: float = 0.2, warmup: int = 12):
+        self.period = period
+        self.slots = slots
+        self.warmup = warmup
+        self.baselines = [EwmaZScore(alpha) for _ in range(slots)]
+        self.seen = [0] * slots
+
+    def update(self, ts: float, x: float) -> float:
+        slot = int((ts % self.period) / self.period * self.slots)
+        self.seen[slot] += 1
+        z = self.baselines[slot].update(x)
+        return z if self.seen[slot] > self.warmup else 0.0
+
+class Anomaly(NamedTuple):
+    timestamp: float
+    value: float
+    score: float
+    detector: str
+
+class Detector:
+    def __init__(self, threshold: float = 3.5, warmup: int = 30):
+        self.threshold = threshold
+        self.warmup = warmup
+        self.count = 0
+        self.ewma = EwmaZScore()
+        self.mad = StreamingMad()
+        self.seasonal = SeasonalBaseline()
+
+    def update(self, ts: float, x: float) -> Anomaly | None:
+        self.count += 1
+        scores = {
+            "zscore": self.ewma.update(x),
+            "mad": self.mad.update(x),
+            "seasonal": self.seasonal.update(ts, x),
+        }
+        if self.count <= self.warmup:
+            return None
+        detector, score = max(scores.items(), key=lambda item: abs(item[1]))
+        if abs(score) < self.threshold:
+            return None
+        return Anomaly(ts, x, score, detector)
+
+# =====ENGINE=====
+METRICS = ("cpu", "memory", "requests", "response_time")
+
+class AnomalyEngine:
+    """Runs a detector per time-series metric over each new sample and keeps
+    the most recent anomalies for the charts"""
+
+    def __init__(self, keep: int = 500):
+        self.detectors = {metric: Detector() for metric in METRICS}
+        self.recent = {metric: deque(maxlen=keep) for metric in METRICS}
+        self.last_ts: float | None = None
+
+    def ingest(self, source: str, value) -> dict[str, list[Anomaly]]:
+        ts = epoch_seconds(value['timestamp'])
+        start = 0 if self.last_ts is None else np.searchsorted(ts, self.last_ts, side="right")
+        if start < len(ts):
+            times = ts[start:].tolist()
+            for metric in METRICS:
+                detector = self.detectors[metric]
+                for t, x in zip(times, value[metric].to_numpy(dtype=float)[start:].tolist()):
+                    anomaly = detector.update(t, x)
+                    if anomaly is not None:
+                        self.recent[metric].append(anomaly)
+            self.last_ts = times[-1]
+        return {metric: list(anomalies) for metric, anomalies in self.recent.items()}
+
+def anomaly_points(anomalies: list[Anomaly]) -> tuple[pd.DatetimeIndex, list[float]]:
+    """x and y for a marker trace"""
+    return pd.to_datetime([a.timestamp for a in anomalies], unit='s'), [a.value for a in anomalies]
+
+__all__ = ["EwmaZScore", "StreamingMad", "SeasonalBaseline", "Anomaly", "Detector", "AnomalyEngine", "anomaly_points"]
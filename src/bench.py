@@ -0,0 +1,178 @@
+# src/bench.py - Data Path Benchmarks
+#
+#   python -m src.bench                      # run, compare with bench/baseline.json
+#   python -m src.bench --rows 5000000 --output results.json
+#   python -m src.bench --save-baseline      # record this machine's baseline
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src import sources
+from src.logmine import TemplateEngine
+from src.logquery import plan
+from src.logstore import LogStore
+from src.sketches import DDSketch, HyperLogLog
+from src.state import FileStore, MemoryStore
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "baseline.json")
+
+class Result(NamedTuple):
+    name: str
+    rows: int
+    repeats: int
+    median_ms: float
+    min_ms: float
+    max_ms: float
+
+# =====TIMING=====
+def measure(name: str, fn: Callable[[], object], rows: int, repeats: int, warmup: int = 1) -> Result:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return Result(name, rows, repeats, float(np.median(times)), min(times), max(times))
+
+# =====BENCHMARKS=====
+def run(rows: int, repeats: int, messages: int, ips: int, users: int) -> list[Result]:
+    logs = sources.generate_synthetic_logs(rows, messages=messages, ips=ips, users=users)
+    series = sources.generate_synthetic_time_series(rows)
+    store = LogStore(max_rows=rows)
+    store.append(logs)
+    table = store.snapshot()
+    now = datetime.now()
+    last_hour = np.datetime64(now - timedelta(hours=1), 'ns')
+    last_day = np.datetime64(now - timedelta(hours=24), 'ns')
+    sample = min(rows, 100_000)
+
+    def legacy_filter():
+        # The Logs page before the store: boolean copies, time range last
+        df = logs[logs['level'] == 'ERROR']
+        df = df[df['source'] == 'postgres']
+        df = df[df['message'].str.contains('failed', case=False, na=False)]
+        return df[df['timestamp'] >= last_hour]
+
+    def file_store(path):
+        files = FileStore(path)
+        files.put("log_store", table)
+        return files
+
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        files = file_store(path)
+        memory = MemoryStore()
+        memory.put("log_store", table)
+        cases = [
+            # Ingest
+            ("ingest.log_store_append", lambda: LogStore(max_rows=rows).append(logs), rows),
+            ("ingest.template_mining", lambda: TemplateEngine().ingest("logs", logs.iloc[:sample // 10]), sample // 10),
+            # Filtering
+            ("filter.legacy_pandas_masks", legacy_filter, rows),
+            ("filter.time_first_last_hour", lambda: table.select(last_hour, None, [2], [2]), rows),
+            ("filter.query_plan_last_day", lambda: plan(table, 'level:ERROR source:postgres failed', last_day).execute(), rows),
+            ("filter.query_plan_regex_ip", lambda: plan(table, '/timed? out/ ip:10.0.0.0/24', last_day).execute(), rows),
+            # Aggregation
+            ("aggregate.level_counts_bincount", lambda: np.bincount(table.level, minlength=len(sources.LOG_LEVELS)), rows),
+            ("aggregate.level_counts_pandas", lambda: logs['level'].value_counts(), rows),
+            ("aggregate.ddsketch_add", lambda: DDSketch().add(series['response_time'].to_numpy()), rows),
+            ("aggregate.hll_add_ips", lambda: HyperLogLog().add(logs['ip'].to_numpy()), rows),
+            # Figures
+            ("figure.time_series_json", lambda: go.Figure(go.Scatter(
+                x=series['timestamp'].iloc[:sample], y=series['cpu'].iloc[:sample])).to_json(), sample),
+            # Export
+            ("export.csv", lambda: table.frame(np.arange(sample)).to_csv(index=False), sample),
+            # Store reads: pickle reload after a publish vs cached snapshot
+            ("cache.file_store_miss", lambda: FileStore(path).get("log_store"), rows),
+            ("cache.file_store_hit", lambda: files.get("log_store"), rows),
+            ("cache.memory_store_hit", lambda: memory.get("log_store"), rows),
+        ]
+        for name, fn, n in cases:
+            results.append(measure(name, fn, n, repeats))
+            print(f"{name:36s} {results[-1].median_ms:10.2f} ms", file=sys.stderr)
+    return results
+
+# =====BASELINE=====
+def report(results: list[Result], args) -> dict:
+    return {
+        "meta": {
+            "rows": args.rows, "messages": args.messages, "ips": args.ips, "users": args.users,
+            "repeats": args.repeats,
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": {r.name: r._asdict() for r in results},
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float,
+            metric: str = "median_ms", match: tuple[str, ...] = ("rows",)) -> list[str]:
+    """Names of benchmarks whose `metric` is more than `tolerance` x the
+    baseline and more than `min_delta_ms` slower, so sub-millisecond noise
+    never counts. Baselines recorded with different `match` settings are
+    not compared."""
+    for key in match:
+        if current["meta"][key] != baseline["meta"].get(key):
+            print(f"baseline was recorded with {key}={baseline['meta'].get(key)}; skipping comparison", file=sys.stderr)
+            return []
+    regressions = []
+    print(f"\n{'benchmark':36s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}", file=sys.stderr)
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result[metric] / max(before[metric], 1e-6)
+        slower = ratio > tolerance and result[metric] - before[metric] > min_delta_ms
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:36s} {before[metric]:10.2f} {result[metric]:10.2f} {ratio:6.2f}x{flag}", file=sys.stderr)
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark BlueBrie data paths on synthetic data")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--messages", type=int, default=1_000, help="distinct log messages")
+    parser.add_argument("--ips", type=int, default=10_000, help="distinct client IPs")
+    parser.add_argument("--users", type=int, default=50_000, help="distinct user ids")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    current = report(run(args.rows, args.repeats, args.messages, args.ips, args.users), args)
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance, args.min_delta_ms)
+        return 1 if regressions else 0
+    return 0
+
+__all__ = ["BASELINE", "Result", "measure", "run", "compare", "main"]
+
+if __name__ == "__main__":
+    sys.exit(main())
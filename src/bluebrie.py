@@ -1,7 +1,11 @@
 # src/bluebrie.py - Navigation Entry Point
+import time
+
 import streamlit as st
 from streamlit_option_menu import option_menu
 
+from src import metrics
+
 # =====PAGE CONFIG=====
 st.set_page_config(
     page_title="Professional Dashboard",
@@ -110,7 +114,31 @@ def load_css():
     .dashboard-card:hover {
         box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
     }
-    
+
+    /* Card sections from src/cards.py */
+    [class*="st-key-card-"] {
+        background: rgba(255, 255, 255, 0.9);
+        backdrop-filter: blur(10px);
+        padding: 28px;
+        border-radius: 16px;
+        border: 1px solid rgba(0, 0, 0, 0.05);
+        box-shadow: 0 4px 20px rgba(0, 0, 0, 0.08);
+        margin: 20px 0;
+        transition: all 0.3s ease;
+    }
+
+    [class*="st-key-card-"]:hover {
+        box-shadow: 0 8px 30px rgba(0, 0, 0, 0.12);
+    }
+
+    /* Metric card rows */
+    .card-grid {
+        display: grid;
+        grid-template-columns: repeat(var(--columns), minmax(0, 1fr));
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }
+
     /* Clean header */
     .dashboard-header {
         background: rgba(255, 255, 255, 0.9);
@@ -284,6 +312,13 @@ def start() -> None:
     
     create_navigation()
     
-    navigation.run()
+    # Scraped locally; a no-op after the first rerun
+    metrics.serve()
+    started = time.perf_counter()
+    try:
+        navigation.run()
+    finally:
+        metrics.PAGE_RERUNS.inc(page=navigation.title)
+        metrics.PAGE_RERUN_SECONDS.observe(time.perf_counter() - started, page=navigation.title)
 
 __all__ = ["start"]
@@ -0,0 +1,45 @@
+# src/cards.py - Card Components
+#
+# Each call here is one element in the page's delta stream, however many
+# cards it draws; a row of st.columns with a card each costs a block per
+# column plus an element per card.
+import re
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import streamlit as st
+
+class MetricCard(NamedTuple):
+    label: str
+    value: str
+    sublabel: str = ""
+    status: str = ""        # status-good / status-warning / status-danger
+    style: str = ""         # inline CSS for the card, e.g. a background
+    footer: str = "metric-sublabel"
+
+    def html(self) -> str:
+        style = f" style='{self.style}'" if self.style else ""
+        sublabel = f"<div class='{self.footer} {self.status}'>{self.sublabel}</div>" if self.sublabel else ""
+        return (f"<div class='metric-card'{style}><div class='metric-label'>{self.label}</div>"
+                f"<div class='metric-value'>{self.value}</div>{sublabel}</div>")
+
+def card_grid(cards: list[MetricCard], columns: int | None = None) -> None:
+    """Render a row of metric cards as a single markdown element"""
+    cells = "".join(card.html() for card in cards)
+    st.markdown(f"<div class='card-grid' style='--columns: {columns or len(cards)}'>{cells}</div>",
+                unsafe_allow_html=True)
+
+@contextmanager
+def card_section(title: str):
+    """A dashboard card holding the elements drawn inside the block.
+
+    The card is a keyed container styled by the `st-key-card-` rule in
+    the app CSS, so it wraps its contents in one block rather than a pair
+    of open/close markdown elements.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+    with st.container(key=f"card-{slug}"):
+        st.subheader(title)
+        yield
+
+__all__ = ["MetricCard", "card_grid", "card_section"]
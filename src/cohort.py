@@ -0,0 +1,127 @@
+# src/cohort.py - Cohort Retention
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+class CohortTable(NamedTuple):
+    cohorts: list[str]          # cohort labels, oldest first
+    sizes: np.ndarray           # users per cohort
+    retention: np.ndarray       # (cohorts, periods) percent active, NaN where not reached yet
+    updated_through: pd.Timestamp | None
+
+def _months(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.astype("datetime64[M]").astype(np.int64)
+
+class CohortEngine:
+    """Monthly first-seen cohorts over user activity events.
+
+    Events are folded in once their day has completed, with every step
+    vectorised over events and users. Per user we keep
+    only the first and last active month, so each (user, month) pair is
+    counted exactly once however many days it is spread over. That needs
+    batches in time order: add() refuses events from a month before the
+    latest one already folded in.
+    """
+
+    def __init__(self, periods: int = 12):
+        self.periods = periods
+        self.users = pd.Index([], dtype=np.int64)
+        self.first = np.empty(0, dtype=np.int64)   # first active month per user
+        self.last = np.empty(0, dtype=np.int64)    # last counted month per user
+        self.base: int | None = None               # month of the oldest cohort
+        self.latest: int | None = None             # latest month folded in
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.processed_until: np.datetime64 | None = None
+
+    def _codes(self, user_ids: np.ndarray) -> np.ndarray:
+        codes = self.users.get_indexer(user_ids)
+        new = codes < 0
+        if new.any():
+            fresh = pd.unique(user_ids[new])
+            self.users = self.users.append(pd.Index(fresh, dtype=np.int64))
+            self.first = np.concatenate([self.first, np.full(len(fresh), np.iinfo(np.int64).max)])
+            self.last = np.concatenate([self.last, np.full(len(fresh), np.iinfo(np.int64).min)])
+            codes[new] = self.users.get_indexer(user_ids[new])
+        return codes
+
+    def _grow(self, cohorts: int, ages: int) -> None:
+        rows, cols = self.counts.shape
+        if cohorts > rows or ages > cols:
+            grown = np.zeros((max(rows, cohorts), max(cols, ages)), dtype=np.int64)
+            grown[:rows, :cols] = self.counts
+            self.counts = grown
+
+    def add(self, timestamps: np.ndarray, user_ids: np.ndarray) -> None:
+        if not len(timestamps):
+            return
+        months = _months(timestamps)
+        if self.latest is not None and int(months.min()) < self.latest:
+            raise ValueError("activity is older than the latest month already counted")
+        codes = self._codes(user_ids)
+        if self.base is None:
+            self.base = int(months.min())
+        self.latest = int(months.max())
+
+        # Distinct (user, month) pairs, sorted by user then month
+        span = int(months.max()) - self.base + 1
+        keys = np.unique(codes * span + (months - self.base))
+        pair_users, pair_months = keys // span, keys % span + self.base
+
+        # First month per user: the first pair of each user in sort order
+        batch_users, first_idx = np.unique(pair_users, return_index=True)
+        self.first[batch_users] = np.minimum(self.first[batch_users], pair_months[first_idx])
+
+        # Count pairs later than anything already counted for that user
+        fresh = pair_months > self.last[pair_users]
+        pair_users, pair_months = pair_users[fresh], pair_months[fresh]
+        if not len(pair_users):
+            return
+        cohorts = self.first[pair_users] - self.base
+        ages = pair_months - self.first[pair_users]
+        self._grow(int(cohorts.max()) + 1, int(ages.max()) + 1)
+        rows, cols = self.counts.shape
+        self.counts += np.bincount(cohorts * cols + ages, minlength=rows * cols).reshape(rows, cols)
+
+        np.maximum.at(self.last, pair_users, pair_months)
+
+    def ingest(self, source: str, activity: pd.DataFrame) -> CohortTable:
+        # Only whole days, each exactly once; the window is found by binary
+        # search, so the events must be sorted
+        if not activity['timestamp'].is_monotonic_increasing:
+            activity = activity.sort_values('timestamp', ignore_index=True)
+        timestamps = activity['timestamp'].to_numpy(dtype="datetime64[ns]")
+        today = np.datetime64(pd.Timestamp.now().normalize(), "ns")
+        start = 0 if self.processed_until is None else np.searchsorted(timestamps, self.processed_until, side="left")
+        end = np.searchsorted(timestamps, today, side="left")
+        if end > start:
+            self.add(timestamps[start:end], activity['user_id'].to_numpy()[start:end])
+            self.processed_until = today
+        return self.table()
+
+    def table(self) -> CohortTable:
+        if self.base is None:
+            return CohortTable([], np.empty(0), np.empty((0, self.periods)), None)
+        rows = self.counts.shape[0]
+        first = max(rows - self.periods, 0)
+        counts = np.zeros((rows - first, self.periods), dtype=np.int64)
+        width = min(self.counts.shape[1], self.periods)
+        counts[:, :width] = self.counts[first:, :width]
+
+        sizes = counts[:, 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            retention = counts / sizes[:, None] * 100
+
+        # Months a cohort has not reached yet are unknown, not zero
+        current = int(_months(np.array([self.processed_until - np.timedelta64(1, "ns")]))[0]) - self.base
+        ages = np.arange(self.periods)[None, :]
+        cohort_index = np.arange(first, rows)[:, None]
+        retention[cohort_index + ages > current] = np.nan
+
+        labels = [
+            pd.Period(year=1970 + (self.base + i) // 12, month=(self.base + i) % 12 + 1, freq="M").strftime("%b %Y")
+            for i in range(first, rows)
+        ]
+        return CohortTable(labels, sizes, retention, pd.Timestamp(self.processed_until))
+
+__all__ = ["CohortTable", "CohortEngine"]
@@ -0,0 +1,347 @@
+# src/collector.py - Background Collectors
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src import metrics, sources
+from src.alerts import AlertEngine
+from src.anomaly import AnomalyEngine
+from src.cohort import CohortEngine
+from src.conn import configured_connection
+from src.forecast import ForecastEngine
+from src.host import HostSampler, ProcessSampler, get_host_info
+from src.logmine import TemplateEngine
+from src.logstore import LogStore
+from src.probes import ProbeEngine, configured_probes
+from src.sketches import DistinctEngine, LatencyEngine
+from src.shm import SCHEMAS, SharedFrameReader, SharedFrameWriter, block_name
+from src.stats import KpiEngine
+from src.views import NetworkViewEngine, ViewEngine
+from src.state import LeaderLock, MemoryStore, FileStore, open_leader_lock, open_store, state_dir
+
+logger = logging.getLogger(__name__)
+
+# Set to "thread" to collect inside the Streamlit process instead of a
+# separate collector process
+COLLECTOR_MODE_ENV = "BLUEBRIE_COLLECTOR"
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[], Any]
+    interval: float
+    next_run: float = 0.0
+    fallback: Any = None
+    to_arrays: Callable[[Any], dict[str, np.ndarray]] | None = None
+    sources: tuple[str, ...] = ()
+
+# =====COLLECTOR=====
+class Collector:
+    """Runs registered collectors on the leader replica and publishes their
+    results to the shared store. Every replica reads from the same store."""
+
+    def __init__(self, store: MemoryStore | FileStore, lock: LeaderLock, tick: float = 1.0, shm_prefix: str | None = None):
+        self.store = store
+        self.lock = lock
+        self.tick = tick
+        self.shm_prefix = shm_prefix
+        self.worker: multiprocessing.Process | None = None
+        self._jobs: dict[str, Job] = {}
+        self._writers: dict[str, SharedFrameWriter] = {}
+        self._readers: dict[str, SharedFrameReader] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Engines are stateful; sessions and the collector thread take turns
+        self._collect_lock = threading.RLock()
+
+    def register(self, name: str, fn: Callable[[], Any], interval: float, to_arrays: Callable[[Any], dict[str, np.ndarray]] | None = None) -> None:
+        """Register a collector; with to_arrays its numeric columns are also
+        published to a shared memory block named after the job"""
+        self._jobs[name] = Job(name, fn, interval, to_arrays=to_arrays)
+
+    def derive(self, name: str, sources: tuple[str, ...], fn: Callable[[str, Any], Any]) -> None:
+        """Register a value recomputed as fn(source, value) whenever one of
+        the source collectors publishes; fn may keep incremental state"""
+        self._jobs[name] = Job(name, fn, interval=0, sources=sources)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="bluebrie-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        self.lock.release()
+
+    def _lead(self) -> bool:
+        # While our collector process is alive it is the only candidate
+        if self.worker is not None and self.worker.is_alive():
+            return False
+        return self.lock.acquire()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._lead():
+                self._take_requests()
+                now = time.monotonic()
+                for job in list(self._jobs.values()):
+                    if not job.sources and now >= job.next_run:
+                        try:
+                            self.collect(job.name)
+                        except Exception:
+                            logger.exception("collector %r failed", job.name)
+                            job.next_run = now + job.interval
+            self._stop.wait(self.tick)
+
+    def collect(self, name: str) -> Any:
+        with self._collect_lock:
+            return self._collect(name)
+
+    def _collect(self, name: str) -> Any:
+        job = self._jobs[name]
+        if job.sources:
+            for source in job.sources:
+                self.collect(source)
+            snapshot = self.store.get(name)
+            return snapshot.value if snapshot else None
+
+        value = job.fn()
+        if job.to_arrays is not None and self.shm_prefix is not None:
+            self._publish_arrays(job, value)
+        self.store.put(name, value)
+        job.next_run = time.monotonic() + job.interval
+
+        for derived in list(self._jobs.values()):
+            if name in derived.sources:
+                try:
+                    self.store.put(derived.name, derived.fn(name, value))
+                except Exception:
+                    logger.exception("derived view %r failed", derived.name)
+        return value
+
+    def _publish_arrays(self, job: Job, value: Any) -> None:
+        writer = self._writers.get(job.name)
+        if writer is None:
+            writer = SharedFrameWriter(block_name(self.shm_prefix, job.name), SCHEMAS[job.name])
+            self._writers[job.name] = writer
+        writer.write(job.to_arrays(value))
+
+    # =====REFRESH REQUESTS=====
+    # A process that is not the leader (a follower replica, or the Streamlit
+    # process while its collector process runs) asks the leader to collect a
+    # job by dropping a request file in the shared state directory
+    def _request_file(self, name: str) -> str | None:
+        if not isinstance(self.store, FileStore):
+            return None
+        return os.path.join(self.store.path, f"{name}.refresh")
+
+    def _take_requests(self) -> None:
+        if not isinstance(self.store, FileStore):
+            return
+        for job in list(self._jobs.values()):
+            try:
+                os.unlink(self._request_file(job.name))
+            except FileNotFoundError:
+                continue
+            # A derived job is refreshed by collecting its sources
+            for name in job.sources or (job.name,):
+                self._jobs[name].next_run = 0.0
+
+    def refresh(self, name: str, timeout: float = 5.0) -> bool:
+        """Collect now if this replica is the leader, otherwise ask the leader
+        to and wait up to `timeout` seconds for it to publish. False when the
+        new snapshot has not arrived by then"""
+        if self._lead():
+            self.collect(name)
+            return True
+        path = self._request_file(name)
+        if path is None:
+            return False
+        requested_at = time.time()
+        with open(path, "w") as f:
+            f.write(f"{requested_at}\n")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            snapshot = self.store.get(name)
+            if snapshot is not None and snapshot.updated_at >= requested_at:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def publish(self, name: str, value: Any) -> None:
+        """Store a value no collector produces, such as saved settings"""
+        self.store.put(name, value)
+
+    def read(self, name: str) -> Any:
+        snapshot = self.store.get(name)
+        if snapshot is not None:
+            return snapshot.value
+        if name not in self._jobs:
+            return None
+
+        if self._lead():
+            return self.collect(name)
+
+        # Follower started before the leader published anything
+        job = self._jobs[name]
+        with self._collect_lock:
+            if job.fallback is None:
+                if job.sources:
+                    for source in job.sources:
+                        job.fallback = job.fn(source, self.read(source))
+                else:
+                    job.fallback = job.fn()
+        return job.fallback
+
+    def ages(self) -> dict[str, float]:
+        """Seconds since each job last published; unpublished jobs are left out"""
+        now = time.time()
+        ages = {}
+        for name in self._jobs:
+            snapshot = self.store.get(name)
+            if snapshot is not None:
+                ages[name] = now - snapshot.updated_at
+        return ages
+
+    def register_metrics(self) -> None:
+        """Expose collector health on the metrics endpoint; computed per scrape"""
+        def lag() -> dict:
+            # How far past its interval each scheduled job is
+            return {(name,): max(0.0, age - self._jobs[name].interval - self.tick)
+                    for name, age in self.ages().items() if not self._jobs[name].sources}
+
+        metrics.REGISTRY.register(metrics.Gauge(
+            "bluebrie_collector_snapshot_age_seconds", "Seconds since each collector last published",
+            lambda: {(name,): age for name, age in self.ages().items()}, ("name",)))
+        metrics.REGISTRY.register(metrics.Gauge(
+            "bluebrie_collector_lag_seconds", "Seconds a scheduled collector is overdue", lag, ("name",)))
+        metrics.REGISTRY.register(metrics.Gauge(
+            "bluebrie_collector_overdue_jobs", "Scheduled collectors waiting past their interval",
+            lambda: sum(1 for value in lag().values() if value > 0)))
+        metrics.REGISTRY.register(metrics.Gauge(
+            "bluebrie_collector_process_up", "1 while the separate collector process is alive",
+            lambda: None if self.worker is None else int(self.worker.is_alive())))
+
+    def read_arrays(self, name: str) -> dict[str, np.ndarray] | None:
+        """Numeric columns straight from shared memory, None if unavailable"""
+        if self.shm_prefix is None:
+            return None
+        reader = self._readers.get(name)
+        if reader is None:
+            reader = SharedFrameReader(block_name(self.shm_prefix, name), SCHEMAS[name])
+            self._readers[name] = reader
+        return reader.read()
+
+    def read_frame(self, name: str) -> pd.DataFrame:
+        arrays = self.read_arrays(name)
+        if arrays is None:
+            return self.read(name)
+        return pd.DataFrame(arrays, copy=False)
+
+# =====SHARED ARRAY CONVERSIONS=====
+def time_series_arrays(data: pd.DataFrame) -> dict[str, np.ndarray]:
+    return {column: data[column].to_numpy() for column, _ in SCHEMAS["time_series"]}
+
+def log_arrays(logs: pd.DataFrame) -> dict[str, np.ndarray]:
+    return {
+        "timestamp": logs['timestamp'].to_numpy(dtype="datetime64[ns]"),
+        "level": pd.Categorical(logs['level'], categories=sources.LOG_LEVELS).codes.astype(np.int64),
+        "source": pd.Categorical(logs['source'], categories=sources.LOG_SOURCES).codes.astype(np.int64),
+    }
+
+def build_collector(store: MemoryStore | FileStore, lock: LeaderLock, shm_prefix: str | None = None) -> Collector:
+    collector = Collector(store, lock, shm_prefix=shm_prefix)
+    collector.register("server_metrics", sources.get_server_metrics, interval=5)
+    collector.register("time_series", sources.get_time_series_data, interval=60, to_arrays=time_series_arrays)
+    collector.register("logs", sources.generate_log_data, interval=30, to_arrays=log_arrays)
+    collector.register("analytics", sources.generate_analytics_data, interval=3600)
+    collector.register("activity", sources.generate_user_activity, interval=3600)
+    # Only the last minute is published to the store; the hour of history
+    # goes to shared memory
+    host = HostSampler()
+    collector.register("host", host.sample, interval=1, to_arrays=lambda _: host.arrays())
+    collector.register("host_info", get_host_info, interval=60)
+    collector.register("services", ProcessSampler().sample, interval=5)
+    # The configured Lentil connection brings its own server and SELECT 1 probes
+    connection = configured_connection()
+    probes = configured_probes(connection.probes() if connection else [])
+    collector.register("health", ProbeEngine(probes).check, interval=15)
+    collector.derive("kpis", ("time_series", "server_metrics", "analytics"), KpiEngine().ingest)
+    collector.derive("latency", ("time_series",), LatencyEngine().ingest)
+    distinct = DistinctEngine()
+    collector.derive("distinct", ("logs",), distinct.ingest)
+    collector.derive("templates", ("logs",), TemplateEngine().ingest)
+    # Saved views read the same store, so it must be updated first
+    log_store = LogStore()
+    collector.derive("log_store", ("logs",), log_store.ingest)
+    collector.derive("views", ("logs",), ViewEngine(store, log_store).ingest)
+    collector.derive("network_views", ("logs",), NetworkViewEngine(store, distinct).ingest)
+    collector.derive("anomalies", ("time_series",), AnomalyEngine().ingest)
+    collector.derive("cohorts", ("activity",), CohortEngine().ingest)
+    collector.derive("forecasts", ("time_series", "server_metrics"), ForecastEngine().ingest)
+    collector.derive("alerts", ("time_series", "server_metrics", "host"), AlertEngine(store).ingest)
+    return collector
+
+# =====COLLECTOR PROCESS=====
+def run_collector_process(path: str) -> None:
+    """Entry point of the collector process spawned by get_collector()"""
+    store = FileStore(path)
+    collector = build_collector(store, LeaderLock(os.path.join(path, "leader.lock")), shm_prefix=path)
+    collector.start()
+
+    # Exit with the Streamlit process that spawned us
+    parent = multiprocessing.parent_process()
+    try:
+        while parent is None or parent.is_alive():
+            time.sleep(collector.tick)
+    finally:
+        collector.stop()
+
+def start_collector_process(path: str) -> multiprocessing.Process:
+    # Never fork a threaded Streamlit server
+    context = multiprocessing.get_context("spawn")
+    worker = context.Process(target=run_collector_process, args=(path,), name="bluebrie-collector", daemon=True)
+    # Spawn re-runs the parent's __main__ in the child, and under Streamlit
+    # that is the page script; give the child an empty one instead
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        worker.start()
+    finally:
+        sys.modules["__main__"] = main
+    return worker
+
+@st.cache_resource
+def get_collector() -> Collector:
+    if os.environ.get(COLLECTOR_MODE_ENV, "process") == "thread":
+        collector = build_collector(open_store(), open_leader_lock())
+        collector.start()
+        collector.register_metrics()
+        return collector
+
+    # The collector process and this process share snapshots through a
+    # state directory, private to this replica unless one is configured
+    path = state_dir() or tempfile.mkdtemp(prefix="bluebrie-")
+    collector = build_collector(FileStore(path), LeaderLock(os.path.join(path, "leader.lock")), shm_prefix=path)
+    collector.worker = start_collector_process(path)
+    # Keeps watch so this process takes over if the collector process dies
+    collector.start()
+    collector.register_metrics()
+    return collector
+
+__all__ = ["Collector", "build_collector", "get_collector", "run_collector_process"]
@@ -1,32 +1,294 @@
+import functools
+import hashlib
+import os
+import socket
+import threading
+import time
+from typing import Callable, NamedTuple
+
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.metrics import (LENTIL_COALESCED, LENTIL_ERRORS, LENTIL_LOGINS, LENTIL_PAYLOAD_BYTES, LENTIL_PHASE_SECONDS, LENTIL_REQUESTS,
+                         LENTIL_SECONDS, LENTIL_TIMELINE)
+from src.probes import Probe
+from src.singleflight import SingleFlight
+
+# The Lentil instance this dashboard watches: its URL, and the name of the
+# Streamlit SQL connection to its database
+LENTIL_URL_ENV = "BLUEBRIE_LENTIL_URL"
+LENTIL_DB_ENV = "BLUEBRIE_LENTIL_DB"
+
+# =====TIMED TRANSPORT=====
+# DNS and connect times of the connection opened by the current thread's
+# request; a request on a pooled connection has neither
+_phases = threading.local()
+
+class _TimedConnection:
+    def _new_conn(self) -> socket.socket:
+        started = time.perf_counter()
+        host = self._dns_host
+        try:
+            address = socket.getaddrinfo(host, self.port, type=socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            address = None
+        _phases.dns = time.perf_counter() - started
+        if address is None:
+            return super()._new_conn()
+        # Connect to the resolved address; on failure fall back to the
+        # normal path, which tries every address
+        self._dns_host = address
+        try:
+            return super()._new_conn()
+        except OSError:
+            self._dns_host = host
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        # TCP, plus the TLS handshake for https
+        _phases.connect = time.perf_counter() - started - getattr(_phases, "dns", 0.0)
+
+class TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedAdapter(HTTPAdapter):
+    """Keeps connections alive like any adapter, and times new ones"""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+def timed_session() -> requests.Session:
+    session = requests.Session()
+    adapter = TimedAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _timed(endpoint: str, send, *args, **kwargs) -> requests.Response:
+    """Send a request, recording total time, DNS/connect/TTFB when known,
+    body sizes, and the status code"""
+    _phases.dns = _phases.connect = None
+    started = time.perf_counter()
+    try:
+        response = send(*args, **kwargs)
+    except requests.RequestException:
+        elapsed = time.perf_counter() - started
+        LENTIL_REQUESTS.inc(endpoint=endpoint, status="exception")
+        LENTIL_ERRORS.inc(endpoint=endpoint, status="exception")
+        LENTIL_SECONDS.observe(elapsed, endpoint=endpoint, status="exception")
+        LENTIL_TIMELINE.observe(elapsed, endpoint=endpoint, status="exception")
+        raise
+    # The body has been read by now unless the caller streams it
+    elapsed = time.perf_counter() - started
+    status = response.status_code
+    LENTIL_REQUESTS.inc(endpoint=endpoint, status=status)
+    if status not in (200, 202):
+        LENTIL_ERRORS.inc(endpoint=endpoint, status=status)
+    LENTIL_SECONDS.observe(elapsed, endpoint=endpoint, status=status)
+    LENTIL_TIMELINE.observe(elapsed, endpoint=endpoint, status=status)
+    # response.elapsed runs from sending to the headers, and so includes
+    # DNS and connect when the request opened a new connection
+    ttfb = response.elapsed.total_seconds() - (_phases.dns or 0.0) - (_phases.connect or 0.0)
+    phases = {"dns": _phases.dns, "connect": _phases.connect, "ttfb": max(ttfb, 0.0)}
+    for phase, seconds in phases.items():
+        if seconds is not None:
+            LENTIL_PHASE_SECONDS.observe(seconds, endpoint=endpoint, phase=phase)
+    LENTIL_PAYLOAD_BYTES.observe(len(response.request.body or b""), endpoint=endpoint, direction="request")
+    if not kwargs.get("stream"):
+        LENTIL_PAYLOAD_BYTES.observe(len(response.content), endpoint=endpoint, direction="response")
+    return response
+
+# =====SESSIONS=====
+class Session(NamedTuple):
+    token: str
+    expires_at: float   # epoch seconds
+
+class SessionManager:
+    """Caches one Lentil session token and logs in again shortly before it
+    expires. Only one caller logs in at a time; while it does, the others
+    keep using the current token if it is still valid, or wait for the new
+    one if it is not"""
+
+    def __init__(self, login: Callable[[], Session], refresh_before: float = 60.0):
+        self.login = login
+        self.refresh_before = refresh_before
+        self.session: Session | None = None
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def _fresh(self, now: float) -> Session | None:
+        session = self.session
+        if session is not None and now < session.expires_at - self.refresh_before:
+            return session
+        return None
+
+    def token(self) -> str:
+        now = time.time()
+        session = self._fresh(now)
+        if session is not None:
+            return session.token
+        session = self.session
+        if session is not None and now < session.expires_at and self._flight.in_flight("login"):
+            return session.token
+        token, _ = self._flight.do("login", self._login)
+        return token
+
+    def _login(self) -> str:
+        # Another caller may have logged in between our check and this flight
+        session = self._fresh(time.time())
+        if session is not None:
+            return session.token
+        try:
+            session = self.login()
+        except Exception:
+            LENTIL_LOGINS.inc(result="failed")
+            raise
+        LENTIL_LOGINS.inc(result="ok")
+        with self._lock:
+            self.session = session
+        return session.token
+
+    def invalidate(self, token: str) -> None:
+        """Drop `token` after the server rejected it, unless it has already
+        been replaced"""
+        with self._lock:
+            if self.session is not None and self.session.token == token:
+                self.session = None
+
+class LoginError(ConnectionError):
+    pass
+
+# One manager per server and credentials, shared by every LentilConnection
+# (and so every session and rerun) in the process. A changed password gets
+# a manager of its own; the key holds only a digest of it
+_sessions: dict[tuple[str, str, str], SessionManager] = {}
+_sessions_lock = threading.Lock()
+
+def session_manager(url: str, username: str, password: str) -> SessionManager:
+    key = (url, username, hashlib.sha256(password.encode()).hexdigest())
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = SessionManager(functools.partial(_new_session, url, username, password))
+        return _sessions[key]
+
+def _new_session(url: str, username: str, password: str) -> Session:
+    # Logs in through a connection of its own, so the shared manager keeps
+    # no caller's connection alive
+    connection = LentilConnection(url, "", username, password)
+    try:
+        return connection._login()
+    finally:
+        connection.session.close()
+
+# =====COALESCING=====
+# Identical reads in flight at the same time, from any session, share one request
+_reads = SingleFlight()
 
 class LentilConnection:
-    def __init__(self, url: str, db_url: str):
+    # Used when the login response does not say how long its token lasts
+    SESSION_TTL = 3600.0
+
+    def __init__(self, url: str, db_url: str, username: str = "", password: str = ""):
         self.url: str = url
         self.db_url = db_url
-        self.lntl_conn = st.connection(url)
-        self.db_conn = st.connection(db_url, type="sql")
+        self.username = username
+        self.password = password
+        # Reuses connections between calls and times the new ones
+        self.session = timed_session()
+        self.auth = session_manager(url, username, password)
+
+    # Opened on first use, so a connection can be made for plain HTTP calls
+    # (e.g. by the load generator) without configured Streamlit secrets
+    @functools.cached_property
+    def lntl_conn(self):
+        return st.connection(self.url)
+
+    @functools.cached_property
+    def db_conn(self):
+        return st.connection(self.db_url, type="sql")
+
+    def probes(self) -> list[Probe]:
+        """Health probes for this server and its database, for ProbeEngine"""
+        probes = [Probe("Lentil", "http", self.url)]
+        if self.db_url:
+            probes.append(Probe("Database", "sql", self.db_url))
+        return probes
 
     def start_session(self) -> str | requests.Response: 
         payload: dict[str, str] = {
-            "username": f"",
-            "password": f"",
+            "username": self.username,
+            "password": self.password,
         }
-        response: requests.Response = requests.post(self.url, json=payload)
+        response: requests.Response = _timed("start_session", self.session.post, self.url, json=payload)
         
         match response.status_code:
             case 200 | 202: return response
             case 400: return "bad request"
             case 500: return "server error"
             case _: return "something went wrong"
+
+    def _login(self) -> Session:
+        response = self.start_session()
+        if isinstance(response, str):
+            raise LoginError(response)
+        try:
+            body = response.json() if response.content else {}
+        except ValueError:
+            body = {}
+        token = body.get("token") or body.get("access_token") or response.cookies.get("session")
+        if not token:
+            raise LoginError("no session token in login response")
+        return Session(token, time.time() + float(body.get("expires_in") or self.SESSION_TTL))
+
+    def _authorized(self, endpoint: str, send, *args, **kwargs) -> requests.Response | None:
+        """Send with the shared session token, logging in again once if the
+        server has dropped it; None when logging in fails"""
+        for attempt in range(2):
+            try:
+                token = self.auth.token()
+            except (LoginError, requests.RequestException):
+                return None
+            response = _timed(endpoint, send, *args, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+            if response.status_code != 401:
+                break
+            self.auth.invalidate(token)
+        return response
+    
+    def _coalesced(self, endpoint: str, send, url: str, payload: dict) -> requests.Response | None:
+        """_authorized for idempotent reads: callers asking for the same
+        endpoint, URL and payload while one is in flight get its response.
+        Not for send_message, where every call must reach the server"""
+        key = (endpoint, url, self.username, tuple(sorted(payload.items())))
+        response, shared = _reads.do(key, self._authorized, endpoint, send, url, json=payload)
+        if shared:
+            LENTIL_COALESCED.inc(endpoint=endpoint)
+        return response
     
     def fetch_profile(self) -> str | requests.Response:
         payload = {
             "username": f"",
             "password": f"",
         }
-        response: requests.Response = requests.get(self.url %"", json=payload)
+        response = self._coalesced("fetch_profile", self.session.get, self.url %"", payload)
+        if response is None:
+            return "authentication failed"
         
         match response.status_code:
             case 200 | 202: return response
@@ -35,7 +297,9 @@ class LentilConnection:
     
     def send_message(self, msg: str) -> str | requests.Response:
         payload = {"": "", "": ""}
-        response = requests.get(self.url, json=payload)
+        response = self._authorized("send_message", self.session.get, self.url, json=payload)
+        if response is None:
+            return "authentication failed"
 
         match response.status_code:
             case 200 | 202: return response
@@ -43,3 +307,6 @@ class LentilConnection:
             case _: return "something went wrong"
     
 
+def configured_connection() -> LentilConnection | None:
+    url = os.environ.get(LENTIL_URL_ENV)
+    return LentilConnection(url, os.environ.get(LENTIL_DB_ENV, "")) if url else None
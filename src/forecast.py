@@ -0,0 +1,170 @@
+# src/forecast.py - Capacity Forecasting
+import itertools
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stats import HOUR, RunningStats, epoch_seconds, now_seconds
+
+# =====MODEL=====
+class HoltWinters:
+    """Additive Holt-Winters; with season=0 it is Holt's linear trend.
+    update() folds in one observation in O(1), so the model never refits
+    over history unless asked to."""
+
+    def __init__(self, alpha: float, beta: float, gamma: float = 0.0, season: int = 0):
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.season = season
+        self.level: float | None = None
+        self.trend = 0.0
+        self.seasonals = np.zeros(season)
+        self.n = 0
+        self.errors = RunningStats()
+
+    def initialise(self, values: np.ndarray) -> np.ndarray:
+        """Seed the state from the first values; returns the values not used"""
+        if self.season:
+            first, second = values[:self.season], values[self.season:2 * self.season]
+            self.level = float(first.mean())
+            self.trend = float((second.mean() - first.mean()) / self.season)
+            # Measured from the trend line through the first season, so the
+            # ramp within it does not skew the seasonal shape
+            self.seasonals = first - self.level - self.trend * (np.arange(self.season) - (self.season - 1) / 2)
+            self.n = self.season
+            return values[self.season:]
+        self.level = float(values[0])
+        self.trend = float(values[1] - values[0]) if len(values) > 1 else 0.0
+        self.n = 1
+        return values[1:]
+
+    def update(self, x: float) -> None:
+        seasonal = self.seasonals[self.n % self.season] if self.season else 0.0
+        self.errors.push(x - (self.level + self.trend + seasonal))
+        previous = self.level
+        self.level = self.alpha * (x - seasonal) + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (self.level - previous) + (1 - self.beta) * self.trend
+        if self.season:
+            self.seasonals[self.n % self.season] = self.gamma * (x - self.level) + (1 - self.gamma) * seasonal
+        self.n += 1
+
+    def forecast(self, steps: int) -> np.ndarray:
+        h = np.arange(1, steps + 1)
+        values = self.level + h * self.trend
+        if self.season:
+            values = values + self.seasonals[(self.n + h - 1) % self.season]
+        return values
+
+    @classmethod
+    def fit(cls, values: np.ndarray, season: int = 0) -> "HoltWinters":
+        """Pick smoothing parameters by one-step-ahead squared error"""
+        season = season if len(values) >= 2 * season else 0
+        gammas = (0.05, 0.2, 0.5) if season else (0.0,)
+        best, best_sse = None, np.inf
+        for alpha, beta, gamma in itertools.product((0.1, 0.3, 0.5, 0.8), (0.01, 0.1, 0.3), gammas):
+            model = cls(alpha, beta, gamma, season)
+            for x in model.initialise(values).tolist():
+                model.update(x)
+            sse = model.errors.m2 + model.errors.count * model.errors.mean ** 2
+            if sse < best_sse:
+                best, best_sse = model, sse
+        return best
+
+class Forecast(NamedTuple):
+    history_times: np.ndarray    # epoch seconds of closed hourly buckets
+    history: np.ndarray
+    times: np.ndarray
+    values: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    fitted_at: float
+
+# =====ROLLUPS=====
+class Rollup:
+    """Hourly means; a bucket is closed once a sample for a later hour arrives"""
+
+    def __init__(self, bucket: float = HOUR, keep: int = 24 * 28):
+        self.bucket = bucket
+        self.key: int | None = None
+        self.total = 0.0
+        self.count = 0
+        self.closed: deque[tuple[float, float]] = deque(maxlen=keep)
+
+    def push(self, ts: float, x: float) -> list[tuple[float, float]]:
+        key = int(ts // self.bucket)
+        landed = []
+        if self.key is not None and key > self.key and self.count:
+            landed.append((self.key * self.bucket, self.total / self.count))
+            self.closed.append(landed[-1])
+            self.total, self.count = 0.0, 0
+        if self.key is None or key >= self.key:
+            self.key = key
+            self.total += x
+            self.count += 1
+        return landed
+
+# =====ENGINE=====
+# metric -> (source, column)
+SERIES: dict[str, tuple[str, str]] = {
+    "requests": ("time_series", "requests"),
+    "memory": ("time_series", "memory"),
+    "disk": ("server_metrics", "disk_usage"),
+}
+
+class ForecastEngine:
+    """Keeps one model per metric. New hourly buckets are folded in with
+    update(); parameters are re-chosen once a day of buckets has landed."""
+
+    def __init__(self, horizon: int = 24, season: int = 24, refit_every: int = 24, min_buckets: int = 6):
+        self.horizon = horizon
+        self.season = season
+        self.refit_every = refit_every
+        self.min_buckets = min_buckets
+        self.rollups = {metric: Rollup() for metric in SERIES}
+        self.models: dict[str, HoltWinters] = {}
+        self.since_fit = {metric: 0 for metric in SERIES}
+        self.last_ts: dict[str, float] = {}
+        self.forecasts: dict[str, Forecast] = {}
+
+    def ingest(self, source: str, value) -> dict[str, Forecast]:
+        for metric, (metric_source, column) in SERIES.items():
+            if metric_source != source:
+                continue
+            if source == "server_metrics":
+                samples = [(now_seconds(), float(value[column]))]
+            else:
+                ts = epoch_seconds(value['timestamp'])
+                start = 0 if metric not in self.last_ts else np.searchsorted(ts, self.last_ts[metric], side="right")
+                samples = list(zip(ts[start:].tolist(), value[column].to_numpy(dtype=float)[start:].tolist()))
+            if not samples:
+                continue
+            self.last_ts[metric] = samples[-1][0]
+
+            landed = [bucket for ts, x in samples for bucket in self.rollups[metric].push(ts, x)]
+            if landed:
+                self._advance(metric, landed)
+        return dict(self.forecasts)
+
+    def _advance(self, metric: str, landed: list[tuple[float, float]]) -> None:
+        rollup = self.rollups[metric]
+        model = self.models.get(metric)
+        self.since_fit[metric] += len(landed)
+
+        if model is None or self.since_fit[metric] >= self.refit_every:
+            if len(rollup.closed) < self.min_buckets:
+                return
+            history = np.array([x for _, x in rollup.closed])
+            model = self.models[metric] = HoltWinters.fit(history, self.season)
+            self.since_fit[metric] = 0
+        else:
+            for _, x in landed:
+                model.update(x)
+
+        times = np.array([t for t, _ in rollup.closed])
+        history = np.array([x for _, x in rollup.closed])
+        future = times[-1] + rollup.bucket * np.arange(1, self.horizon + 1)
+        values = model.forecast(self.horizon)
+        spread = 1.96 * model.errors.std * np.sqrt(np.arange(1, self.horizon + 1))
+        self.forecasts[metric] = Forecast(times, history, future, values, values - spread, values + spread, now_seconds())
+
+__all__ = ["HoltWinters", "Forecast", "Rollup", "ForecastEngine"]
@@ -0,0 +1,383 @@
+# src/host.py - Host Metrics
+#
+# Counters are read from /proc and /sys through descriptors opened once and
+# re-read with pread, so a sample is a handful of syscalls and some string
+# splitting. Rates come from the delta between consecutive samples.
+import glob
+import math
+import os
+import platform
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+HOST_COLUMNS = ("cpu", "memory", "net_rx", "net_tx", "disk_read", "disk_write", "temperature", "power")
+
+# Log source -> process names (/proc/<pid>/comm, at most 15 characters)
+SERVICE_PROCESSES = {
+    "gleam_server": ("beam.smp",),
+    "nginx": ("nginx",),
+    "postgres": ("postgres", "postmaster"),
+    "redis": ("redis-server",),
+}
+
+# Devices whose diskstats would double count or are not disks
+_VIRTUAL_DISKS = ("loop", "ram", "zram", "dm-", "md")
+
+class ProcFile:
+    """A /proc or /sys file kept open and re-read from the start"""
+
+    def __init__(self, path: str, size: int = 65536):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> str:
+        return os.pread(self.fd, self.size, 0).decode(errors="replace")
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+def _open(path: str, size: int = 65536) -> ProcFile | None:
+    try:
+        pf = ProcFile(path, size)
+        pf.read()  # energy_uj is root-only on patched kernels
+        return pf
+    except OSError:
+        return None
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+# =====PARSERS=====
+def parse_cpu(text: str) -> tuple[int, int]:
+    """(busy, total) jiffies from the aggregate line of /proc/stat"""
+    fields = [int(v) for v in text[:text.index("\n")].split()[1:]]
+    # guest time is already counted in user/nice
+    total = sum(fields[:8])
+    idle = fields[3] + fields[4]
+    return total - idle, total
+
+def parse_meminfo(text: str) -> tuple[int, int]:
+    """(total, available) bytes"""
+    values = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(":")
+        if key in ("MemTotal", "MemAvailable"):
+            values[key] = int(rest.split()[0]) * 1024
+            if len(values) == 2:
+                break
+    return values["MemTotal"], values["MemAvailable"]
+
+def parse_net_dev(text: str) -> dict[str, tuple[int, int]]:
+    """Interface -> (rx bytes, tx bytes), loopback excluded"""
+    counters = {}
+    for line in text.splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        name = name.strip()
+        if name == "lo":
+            continue
+        fields = rest.split()
+        counters[name] = (int(fields[0]), int(fields[8]))
+    return counters
+
+def parse_diskstats(text: str, disks: set[str]) -> tuple[int, int]:
+    """(read, written) bytes summed over whole disks"""
+    read = written = 0
+    for line in text.splitlines():
+        fields = line.split()
+        if fields[2] in disks:
+            read += int(fields[5]) * 512
+            written += int(fields[9]) * 512
+    return read, written
+
+def whole_disks() -> set[str]:
+    try:
+        return {name for name in os.listdir("/sys/block") if not name.startswith(_VIRTUAL_DISKS)}
+    except OSError:
+        return set()
+
+# =====SAMPLER=====
+class HostSampler:
+    """Keeps the counter files open and returns one row of rates per call.
+
+    The last `history` rows are kept in a ring of numpy columns. Each
+    sample returns only the last `recent` rows, small enough to publish
+    every second; the whole ring goes to shared memory through arrays().
+    """
+
+    def __init__(self, history: int = 3600, recent: int = 60, clock: Callable[[], float] = time.time):
+        self.history = history
+        self.recent = recent
+        self.clock = clock
+        self.stat = _open("/proc/stat", 4096)
+        self.meminfo = _open("/proc/meminfo")
+        self.net_dev = _open("/proc/net/dev")
+        self.diskstats = _open("/proc/diskstats", 262144)
+        self.disks = whole_disks()
+        self.thermal = [f for f in (_open(p, 32) for p in sorted(glob.glob("/sys/class/thermal/thermal_zone*/temp"))) if f]
+        # Package-level RAPL zones only (intel-rapl:0, not intel-rapl:0:0)
+        self.power = []
+        for path in sorted(glob.glob("/sys/class/powercap/*/energy_uj")):
+            zone = os.path.basename(os.path.dirname(path))
+            pf = _open(path, 32)
+            if pf is not None and zone.count(":") == 1:
+                wrap = _read_text(os.path.join(os.path.dirname(path), "max_energy_range_uj"))
+                self.power.append((pf, int(wrap) if wrap else 2 ** 32))
+
+        self.timestamps = np.zeros(history, dtype="datetime64[ns]")
+        self.columns = {column: np.full(history, np.nan) for column in HOST_COLUMNS}
+        self.rows = 0
+        self._last = self.counters()
+
+    def counters(self) -> dict:
+        counters = {"time": self.clock()}
+        if self.stat:
+            counters["cpu"] = parse_cpu(self.stat.read())
+        if self.meminfo:
+            counters["memory"] = parse_meminfo(self.meminfo.read())
+        if self.net_dev:
+            counters["net"] = parse_net_dev(self.net_dev.read())
+        if self.diskstats:
+            counters["disk"] = parse_diskstats(self.diskstats.read(), self.disks)
+        temps = [int(f.read()) / 1000 for f in self.thermal]
+        if temps:
+            counters["temperature"] = max(temps)
+        if self.power:
+            counters["energy"] = [int(pf.read()) for pf, _ in self.power]
+        return counters
+
+    def rates(self, last: dict, now: dict) -> dict[str, float]:
+        dt = now["time"] - last["time"]
+        row = dict.fromkeys(HOST_COLUMNS, math.nan)
+        if dt <= 0:
+            return row
+        if "cpu" in now:
+            busy = now["cpu"][0] - last["cpu"][0]
+            total = now["cpu"][1] - last["cpu"][1]
+            row["cpu"] = 100 * busy / total if total > 0 else math.nan
+        if "memory" in now:
+            total, available = now["memory"]
+            row["memory"] = 100 * (1 - available / total)
+        if "net" in now:
+            # Interfaces that appeared since the last sample have no delta yet
+            shared = now["net"].keys() & last["net"].keys()
+            rx = sum(now["net"][i][0] - last["net"][i][0] for i in shared)
+            tx = sum(now["net"][i][1] - last["net"][i][1] for i in shared)
+            row["net_rx"], row["net_tx"] = rx / dt, tx / dt
+        if "disk" in now:
+            row["disk_read"] = (now["disk"][0] - last["disk"][0]) / dt
+            row["disk_write"] = (now["disk"][1] - last["disk"][1]) / dt
+        row["temperature"] = now.get("temperature", math.nan)
+        if "energy" in now:
+            joules = sum((e - p) % wrap for e, p, (_, wrap) in zip(now["energy"], last["energy"], self.power)) / 1e6
+            row["power"] = joules / dt
+        # Counter resets (interface or device replaced) show up as negative
+        return {k: v if not v < 0 else math.nan for k, v in row.items()}
+
+    def sample(self) -> pd.DataFrame:
+        now = self.counters()
+        row = self.rates(self._last, now)
+        self._last = now
+        i = self.rows % self.history
+        # Naive local time, like every other collector
+        self.timestamps[i] = np.datetime64(datetime.fromtimestamp(now["time"]), "ns")
+        for column, value in row.items():
+            self.columns[column][i] = value
+        self.rows += 1
+        return self.frame(self.recent)
+
+    def arrays(self, limit: int | None = None) -> dict[str, np.ndarray]:
+        """Last `limit` rows (default the whole history), oldest first"""
+        count = min(self.rows, self.history, limit or self.history)
+        order = np.arange(self.rows - count, self.rows) % self.history
+        return {"timestamp": self.timestamps[order], **{column: values[order] for column, values in self.columns.items()}}
+
+    def frame(self, limit: int | None = None) -> pd.DataFrame:
+        return pd.DataFrame(self.arrays(limit))
+
+# =====PROCESSES=====
+def parse_pid_stat(text: str) -> tuple[int, int, int]:
+    """(utime + stime ticks, rss pages, start time ticks) from /proc/<pid>/stat"""
+    # comm may contain spaces and parentheses; the fields follow the last ')'
+    fields = text[text.rindex(")") + 2:].split()
+    return int(fields[11]) + int(fields[12]), int(fields[21]), int(fields[19])
+
+def parse_pid_io(text: str) -> tuple[int, int]:
+    """(read, written) storage bytes from /proc/<pid>/io"""
+    values = dict(line.split(": ") for line in text.splitlines() if line)
+    return int(values["read_bytes"]), int(values["write_bytes"])
+
+class ProcessSampler:
+    """CPU, RSS and I/O per service, summed over its processes.
+
+    Each pid's name is read once and cached; only pids of a known service
+    keep their stat and io files open. Names of other pids are forgotten
+    every `rescan` seconds, in case one of them has since exec'd a service.
+    """
+
+    def __init__(self, services: dict[str, tuple[str, ...]] = SERVICE_PROCESSES, history: int = 180,
+                 rescan: float = 30.0, proc: str = "/proc", clock: Callable[[], float] = time.time):
+        self.services = list(services)
+        self.names = {name: service for service, names in services.items() for name in names}
+        self.rescan = rescan
+        self.proc = proc
+        self.clock = clock
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self._service: dict[int, str | None] = {}
+        self._files: dict[int, tuple[ProcFile, ProcFile | None]] = {}
+        self._last: dict[int, tuple[int, int, int, int]] = {}   # pid -> ticks, read, written, start time
+        self._last_time: float | None = None
+        self._next_rescan = 0.0
+        self.rows: deque[dict] = deque(maxlen=history * len(self.services))
+
+    def _forget(self, pid: int) -> None:
+        self._service.pop(pid, None)
+        self._last.pop(pid, None)
+        for pf in self._files.pop(pid, ()):
+            if pf is not None:
+                pf.close()
+
+    def _scan(self, now: float) -> None:
+        try:
+            pids = {int(entry.name) for entry in os.scandir(self.proc) if entry.name.isdigit()}
+        except OSError:
+            return
+        if now >= self._next_rescan:
+            self._service = {pid: service for pid, service in self._service.items() if service is not None}
+            self._next_rescan = now + self.rescan
+        for pid in self._service.keys() - pids:
+            self._forget(pid)
+        for pid in pids - self._service.keys():
+            service = self.names.get(_read_text(f"{self.proc}/{pid}/comm"))
+            self._service[pid] = service
+            if service is not None:
+                stat = _open(f"{self.proc}/{pid}/stat", 1024)
+                if stat is None:
+                    self._service[pid] = None
+                    continue
+                # io is only readable for our own user's processes
+                self._files[pid] = (stat, _open(f"{self.proc}/{pid}/io", 1024))
+
+    def sample(self) -> pd.DataFrame:
+        now = self.clock()
+        self._scan(now)
+        dt = now - self._last_time if self._last_time is not None else None
+        self._last_time = now
+        totals = {service: {"processes": 0, "cpu": 0.0, "rss": 0, "io_read": 0.0, "io_write": 0.0}
+                  for service in self.services}
+
+        for pid, (stat, io) in list(self._files.items()):
+            try:
+                ticks, rss, started = parse_pid_stat(stat.read())
+                read, written = parse_pid_io(io.read()) if io is not None else (0, 0)
+            except (OSError, ValueError, KeyError):
+                # Exited since the scan
+                self._forget(pid)
+                continue
+            last = self._last.get(pid)
+            if last is not None and last[3] != started:
+                # The pid was reused by another process; its name is read
+                # again on the next scan
+                self._forget(pid)
+                continue
+            total = totals[self._service[pid]]
+            total["processes"] += 1
+            total["rss"] += rss * self.page_size
+            self._last[pid] = (ticks, read, written, started)
+            # New processes count from their second sample, not their lifetime
+            if last is not None and dt:
+                total["cpu"] += 100 * (ticks - last[0]) / self.ticks / dt
+                total["io_read"] += (read - last[1]) / dt
+                total["io_write"] += (written - last[2]) / dt
+
+        timestamp = datetime.fromtimestamp(now)
+        for service, total in totals.items():
+            self.rows.append({"timestamp": timestamp, "service": service, **total})
+        return pd.DataFrame(list(self.rows))
+
+def format_bytes(value: float | None, suffix: str = "B") -> str:
+    if value is None or math.isnan(value):
+        return "n/a"
+    units = ("", "K", "M", "G", "T")
+    i = 0
+    while abs(value) >= 1024 and i < len(units) - 1:
+        value /= 1024
+        i += 1
+    return f"{value:.0f} {suffix}" if i == 0 else f"{value:.1f} {units[i]}{suffix}"
+
+# =====STATIC INFO=====
+def _os_name() -> str:
+    release = _read_text("/etc/os-release") or ""
+    for line in release.splitlines():
+        if line.startswith("PRETTY_NAME="):
+            return line.split("=", 1)[1].strip('"')
+    return f"{platform.system()} {platform.release()}"
+
+def _cpu_model() -> str:
+    for line in (_read_text("/proc/cpuinfo") or "").splitlines():
+        if line.startswith("model name"):
+            return line.split(":", 1)[1].strip()
+    return platform.processor() or platform.machine()
+
+def _interfaces() -> list[dict]:
+    interfaces = []
+    for path in sorted(glob.glob("/sys/class/net/*")):
+        name = os.path.basename(path)
+        if name == "lo":
+            continue
+        speed = _read_text(os.path.join(path, "speed"))
+        interfaces.append({
+            "interface": name,
+            "state": _read_text(os.path.join(path, "operstate")) or "unknown",
+            "speed_mbps": int(speed) if speed and speed.lstrip("-").isdigit() and int(speed) > 0 else None,
+        })
+    return interfaces
+
+def _filesystems() -> list[dict]:
+    filesystems, seen = [], set()
+    for line in (_read_text("/proc/mounts") or "").splitlines():
+        device, mount = line.split()[:2]
+        if not device.startswith("/dev/") or device in seen:
+            continue
+        seen.add(device)
+        try:
+            st = os.statvfs(mount)
+        except OSError:
+            continue
+        total = st.f_blocks * st.f_frsize
+        if total:
+            free = st.f_bavail * st.f_frsize
+            filesystems.append({"mount": mount, "device": device, "total": total, "used": total - free})
+    return filesystems
+
+def get_host_info() -> dict:
+    """Hardware and filesystem details that change rarely"""
+    meminfo = _read_text("/proc/meminfo")
+    disk_bytes = sum(int(_read_text(f"/sys/block/{disk}/size") or 0) * 512 for disk in whole_disks())
+    uptime = _read_text("/proc/uptime")
+    return {
+        "processor": _cpu_model(),
+        "cores": os.cpu_count(),
+        "memory": parse_meminfo(meminfo)[0] if meminfo else None,
+        "storage": disk_bytes or None,
+        "board": " ".join(filter(None, (_read_text("/sys/class/dmi/id/board_vendor"),
+                                        _read_text("/sys/class/dmi/id/board_name")))) or None,
+        "os": _os_name(),
+        "kernel": platform.release(),
+        "uptime_hours": float(uptime.split()[0]) / 3600 if uptime else None,
+        "interfaces": _interfaces(),
+        "filesystems": _filesystems(),
+    }
+
+__all__ = ["HOST_COLUMNS", "SERVICE_PROCESSES", "ProcFile", "HostSampler", "ProcessSampler", "get_host_info", "format_bytes",
+           "parse_cpu", "parse_meminfo", "parse_net_dev", "parse_diskstats", "parse_pid_stat", "parse_pid_io"]
@@ -0,0 +1,263 @@
+# src/loadtest.py - Lentil Load Generator
+#
+#   python -m src.loadtest --stand-in --rate 200 --duration 30
+#   python -m src.loadtest --url http://lentil:8000/ --rate 50 --ramp-to 500 --duration 120
+#
+# Open loop: requests are sent on a fixed schedule whether or not earlier
+# ones have finished. Latency is measured from the time a request was due,
+# not from when a worker got to it, so a stalled server shows up as queueing
+# delay instead of hiding it (coordinated omission).
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.conn import LentilConnection
+
+ENDPOINTS = ("send_message", "start_session")
+
+# =====SCHEDULE=====
+class LoadPlan(NamedTuple):
+    rate: float                   # requests per second at the start
+    duration: float               # seconds
+    end_rate: float | None = None # ramp linearly to this rate; None holds `rate`
+
+    def times(self) -> np.ndarray:
+        """Offsets in seconds at which each request is due"""
+        r0 = self.rate
+        r1 = r0 if self.end_rate is None else self.end_rate
+        count = int((r0 + r1) / 2 * self.duration)
+        i = np.arange(count, dtype=float)
+        if r1 == r0:
+            return i / r0
+        # Requests due by t: r0 t + a t^2, solved for t at each request
+        a = (r1 - r0) / (2 * self.duration)
+        return (-r0 + np.sqrt(np.maximum(r0 * r0 + 4 * a * i, 0))) / (2 * a)
+
+# =====RECORDING=====
+class Sample(NamedTuple):
+    due: float       # seconds since the test started
+    queued: float    # due -> a worker started it
+    service: float   # worker start -> response
+    ok: bool
+
+    @property
+    def latency(self) -> float:
+        """Corrected latency, from when the request was due"""
+        return self.queued + self.service
+
+class LoadTest:
+    """Drives one LentilConnection endpoint on a schedule from an asyncio
+    loop on its own thread; calls run on a pool of worker threads, each
+    with its own connection and pooled session"""
+
+    def __init__(self, connect: Callable[[], LentilConnection], plan: LoadPlan, endpoint: str = "send_message",
+                 workers: int = 32):
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint '{endpoint}' (expected one of {', '.join(ENDPOINTS)})")
+        self.connect = connect
+        self.plan = plan
+        self.endpoint = endpoint
+        self.workers = workers
+        self.samples: list[Sample] = []
+        self.sent = 0
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._local = threading.local()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "LoadTest":
+        self._thread = threading.Thread(target=asyncio.run, args=(self._drive(),), name="bluebrie-loadtest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.finished.wait(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self.finished.is_set()
+
+    def _call(self, due: float) -> None:
+        # Queued calls drain without a request once the test is stopped
+        if self._stop.is_set():
+            return
+        started = time.perf_counter()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+        try:
+            if self.endpoint == "send_message":
+                result = conn.send_message("load test")
+            else:
+                result = conn.start_session()
+            ok = isinstance(result, requests.Response)
+        except requests.RequestException:
+            ok = False
+        finished = time.perf_counter()
+        # list.append is atomic; readers copy the list before using it
+        self.samples.append(Sample(due - self.started_at, started - due, finished - started, ok))
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bluebrie-load")
+        pending = []
+        self.started_at = time.perf_counter()
+        try:
+            for offset in self.plan.times():
+                if self._stop.is_set():
+                    break
+                due = self.started_at + offset
+                delay = due - time.perf_counter()
+                # Sleeping costs ~1 ms; requests closer than that go out together
+                if delay > 0.001:
+                    await asyncio.sleep(delay)
+                pending.append(loop.run_in_executor(pool, self._call, due))
+                self.sent += 1
+            await asyncio.gather(*pending)
+            if self._stop.is_set():
+                # Calls skipped after stop() never went out
+                self.sent = len(self.samples)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.finished_at = time.perf_counter()
+            self.finished.set()
+
+    # =====RESULTS=====
+    def frame(self) -> pd.DataFrame:
+        samples = list(self.samples)
+        return pd.DataFrame(samples, columns=Sample._fields).assign(
+            latency=lambda df: df['queued'] + df['service'])
+
+    def per_second(self) -> pd.DataFrame:
+        """Throughput, errors and corrected vs uncorrected latency per second
+        of the schedule"""
+        df = self.frame()
+        if df.empty:
+            return pd.DataFrame(columns=["second", "requests", "errors", "p50_ms", "p99_ms", "service_p99_ms"])
+        grouped = df.groupby(df['due'].astype(int))
+        return pd.DataFrame({
+            "requests": grouped.size(),
+            "errors": grouped['ok'].apply(lambda ok: int((~ok).sum())),
+            "p50_ms": grouped['latency'].quantile(0.5) * 1000,
+            "p99_ms": grouped['latency'].quantile(0.99) * 1000,
+            "service_p99_ms": grouped['service'].quantile(0.99) * 1000,
+        }).rename_axis("second").reset_index()
+
+    def summary(self) -> dict:
+        df = self.frame()
+        elapsed = ((self.finished_at or time.perf_counter()) - self.started_at) if self.started_at else 0.0
+        if df.empty:
+            return {"sent": self.sent, "completed": 0, "errors": 0, "elapsed_s": elapsed}
+        last = df['due'] + df['latency']
+        return {
+            "sent": self.sent,
+            "completed": len(df),
+            "errors": int((~df['ok']).sum()),
+            "elapsed_s": elapsed,
+            "throughput": len(df) / max(float(last.max()), 1e-9),
+            **{f"p{q:g}_ms": float(df['latency'].quantile(q / 100) * 1000) for q in (50, 90, 99, 99.9)},
+            "max_ms": float(df['latency'].max() * 1000),
+            # What a closed-loop tool would have reported
+            "uncorrected_p99_ms": float(df['service'].quantile(0.99) * 1000),
+        }
+
+# =====STAND-IN SERVER=====
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 resets connections when workers start together
+    request_queue_size = 256
+
+class StandInServer:
+    """Local HTTP server that answers like a healthy (or flaky) Lentil, for
+    trying the load generator without a real instance"""
+
+    def __init__(self, latency_ms: float = 5.0, jitter_ms: float = 2.0, error_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        config = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, so clients pool connections
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                time.sleep(max(random.gauss(config.latency_ms, config.jitter_ms), 0) / 1000)
+                status = 500 if random.random() < config.error_rate else 200
+                # Any token is accepted, so LentilConnection logs in once and reuses it
+                body = json.dumps({"ok": status == 200, "token": "stand-in", "expires_in": 3600}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.server = _StandInHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, name="bluebrie-standin", daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+# =====COMMAND LINE=====
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test a Lentil instance through LentilConnection")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Lentil endpoint URL")
+    target.add_argument("--stand-in", action="store_true", help="start a local stand-in server and target it")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="send_message")
+    parser.add_argument("--rate", type=float, default=100, help="requests per second (at the start of a ramp)")
+    parser.add_argument("--ramp-to", type=float, help="ramp linearly to this rate over the duration")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--stand-in-latency-ms", type=float, default=5.0)
+    parser.add_argument("--stand-in-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = StandInServer(args.stand_in_latency_ms, error_rate=args.stand_in_error_rate) if args.stand_in else None
+    url = server.url if server else args.url
+    test = LoadTest(lambda: LentilConnection(url, ""), LoadPlan(args.rate, args.duration, args.ramp_to),
+                    args.endpoint, args.workers).start()
+    try:
+        while not test.wait(5):
+            s = test.summary()
+            print(f"{s['elapsed_s']:6.0f}s  sent {s['sent']:,}  done {s['completed']:,}  errors {s['errors']:,}  "
+                  f"p99 {s.get('p99_ms', float('nan')):8.1f} ms", file=sys.stderr)
+    except KeyboardInterrupt:
+        test.stop()
+        test.wait()
+    finally:
+        if server:
+            server.close()
+    print(json.dumps(test.summary(), indent=2))
+    return 0
+
+__all__ = ["ENDPOINTS", "LoadPlan", "Sample", "LoadTest", "StandInServer", "main"]
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# src/logmine.py - Log Template Mining
+import heapq
+import re
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from src.stats import HOUR, epoch_seconds
+
+WILDCARD = "<*>"
+_HAS_DIGIT = re.compile(r"\d")
+
+# =====DRAIN=====
+class LogCluster:
+    __slots__ = ("id", "tokens", "leaf", "count", "levels", "hourly", "last_seen")
+
+    def __init__(self, cluster_id: int, tokens: list[str], leaf: list):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.leaf = leaf  # the leaf list this cluster lives in, for eviction
+        self.count = 0
+        self.levels: dict[str, int] = {}
+        self.hourly: dict[int, int] = {}
+        self.last_seen = 0.0
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+class Drain:
+    """Online log template miner (Drain). Messages are routed by token
+    count and their first tokens through a fixed-depth tree, then matched
+    against the few templates in that leaf. Fan-out per node and the total
+    number of templates are bounded, so memory is too."""
+
+    def __init__(self, depth: int = 4, similarity: float = 0.4, max_children: int = 100, max_clusters: int = 1000):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.root: dict = {}
+        self.clusters: OrderedDict[int, LogCluster] = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def tokenize(message: str) -> list[str]:
+        return [WILDCARD if _HAS_DIGIT.search(token) else token for token in message.split()]
+
+    def _leaf(self, tokens: list[str]) -> list:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.depth - 2]:
+            if token not in node:
+                # A full node sends new tokens down the wildcard branch
+                token = token if len(node) < self.max_children else WILDCARD
+            node = node.setdefault(token, {})
+        return node.setdefault(None, [])
+
+    def _score(self, template: list[str], tokens: list[str]) -> tuple[float, int]:
+        same = params = 0
+        for a, b in zip(template, tokens):
+            if a == WILDCARD:
+                params += 1
+            elif a == b:
+                same += 1
+        return same / len(tokens), params
+
+    def add(self, message: str) -> LogCluster:
+        tokens = self.tokenize(message)
+        if not tokens:
+            tokens = [""]
+        leaf = self._leaf(tokens)
+
+        best, best_score = None, (-1.0, -1)
+        for cluster in leaf:
+            score = self._score(cluster.tokens, tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+
+        if best is not None and best_score[0] >= self.similarity:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            self.clusters.move_to_end(best.id)
+            return best
+
+        cluster = LogCluster(self._next_id, tokens, leaf)
+        self._next_id += 1
+        leaf.append(cluster)
+        self.clusters[cluster.id] = cluster
+        if len(self.clusters) > self.max_clusters:
+            _, evicted = self.clusters.popitem(last=False)
+            evicted.leaf.remove(evicted)
+        return cluster
+
+# =====ENGINE=====
+class TemplateStats(NamedTuple):
+    template: str
+    count: int
+    levels: dict[str, int]
+    trend: list[int]      # occurrences per hour, oldest first
+    last_seen: float
+
+class TemplateEngine:
+    """Mines each new log line into a template and bumps that template's
+    counters; views read the counters and never rescan messages"""
+
+    def __init__(self, hours: int = 24, top: int = 50, **drain_options):
+        self.drain = Drain(**drain_options)
+        self.hours = hours
+        self.top = top
+        self.last_ts: float | None = None
+        self.hour: int | None = None
+
+    def _prune(self, hour: int) -> None:
+        # Once per new hour, drop the hours that fell out of the trend window
+        # from every cluster; evicted clusters take their counters with them
+        for cluster in self.drain.clusters.values():
+            for old in [h for h in cluster.hourly if h <= hour - self.hours]:
+                del cluster.hourly[old]
+
+    def ingest(self, source: str, logs) -> list[TemplateStats]:
+        ts = epoch_seconds(logs['timestamp'])
+        start = 0 if self.last_ts is None else np.searchsorted(ts, self.last_ts, side="right")
+        if start < len(ts):
+            rows = zip(ts[start:].tolist(), logs['level'].iloc[start:].tolist(), logs['message'].iloc[start:].tolist())
+            for t, level, message in rows:
+                hour = int(t // HOUR)
+                if self.hour is None or hour > self.hour:
+                    self._prune(hour)
+                    self.hour = hour
+                cluster = self.drain.add(message)
+                cluster.count += 1
+                level = str(level)
+                cluster.levels[level] = cluster.levels.get(level, 0) + 1
+                cluster.hourly[hour] = cluster.hourly.get(hour, 0) + 1
+                cluster.last_seen = t
+            self.last_ts = float(ts[-1])
+        return self.stats()
+
+    def stats(self) -> list[TemplateStats]:
+        """The top templates by count, and by each level's count, so rare
+        ERROR templates are not crowded out by chatty INFO ones"""
+        if self.last_ts is None:
+            return []
+        now_hour = int(self.last_ts // HOUR)
+        hours = range(now_hour - self.hours + 1, now_hour + 1)
+        clusters = list(self.drain.clusters.values())
+        levels = {level for cluster in clusters for level in cluster.levels}
+        top = {c.id: c for c in heapq.nlargest(self.top, clusters, key=lambda c: c.count)}
+        for level in levels:
+            ranked = heapq.nlargest(self.top, clusters, key=lambda c: c.levels.get(level, 0))
+            top.update((c.id, c) for c in ranked if c.levels.get(level))
+        return [
+            TemplateStats(
+                cluster.template,
+                cluster.count,
+                dict(cluster.levels),
+                [cluster.hourly.get(hour, 0) for hour in hours],
+                cluster.last_seen,
+            )
+            for cluster in sorted(top.values(), key=lambda c: c.count, reverse=True)
+        ]
+
+__all__ = ["Drain", "LogCluster", "TemplateStats", "TemplateEngine"]
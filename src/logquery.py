@@ -0,0 +1,176 @@
+# src/logquery.py - Log Query Language
+#
+#   level:ERROR,WARN source:postgres ip:192.168.1.0/24 "connection failed"
+#   -source:nginx /time(out|d out)/ msg:disk
+#
+# Terms are ANDed. Bare words and "phrases" match message text without
+# case, /.../ is a case-insensitive regex on the message, and a leading -
+# negates a term. A word: prefix that is not a field name is searched for
+# as message text, so "Timeout:30s" needs no quoting.
+import functools
+import ipaddress
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from src.logstore import LogTable
+from src.sources import LOG_LEVELS, LOG_SOURCES
+
+FIELDS = ("level", "source", "ip", "message")
+ALIASES = {"msg": "message", "lvl": "level", "src": "source"}
+
+_TERM = re.compile(r'(-)?(?:(\w+):)?("[^"]*"|/(?:[^/\\]|\\.)*/|\S+)')
+
+class QueryError(ValueError):
+    pass
+
+# =====COMPILATION=====
+@dataclass
+class Step:
+    label: str
+    column: str
+    test: Callable[[np.ndarray], np.ndarray]   # column values -> bool mask
+    negate: bool = False
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        hits = self.test(values)
+        return ~hits if self.negate else hits
+
+def _codes_step(label: str, column: str, codes: np.ndarray, size: int, negate: bool) -> Step:
+    keep = np.zeros(size, dtype=bool)
+    keep[codes] = True
+    return Step(label, column, lambda values: keep[values], negate)
+
+def _labels(field: str, value: str, labels: list[str]) -> np.ndarray:
+    lookup = {label.lower(): i for i, label in enumerate(labels)}
+    codes = []
+    for name in value.split(","):
+        if name.lower() not in lookup:
+            raise QueryError(f"unknown {field} '{name}' (expected one of {', '.join(labels)})")
+        codes.append(lookup[name.lower()])
+    return np.array(codes)
+
+def _ip_range(value: str) -> tuple[int, int]:
+    try:
+        network = ipaddress.IPv4Network(value, strict=False)
+    except ValueError:
+        raise QueryError(f"invalid IPv4 address or network '{value}'") from None
+    return int(network.network_address), int(network.broadcast_address)
+
+class Term(NamedTuple):
+    field: str
+    value: str
+    negate: bool
+    pattern: re.Pattern | None   # for message terms
+
+    def step(self, table: LogTable) -> Step:
+        label = f"{'-' if self.negate else ''}{self.field}:{self.value}"
+        if self.field == "level":
+            return _codes_step(label, "level", _labels("level", self.value, LOG_LEVELS), len(LOG_LEVELS), self.negate)
+        if self.field == "source":
+            return _codes_step(label, "source", _labels("source", self.value, LOG_SOURCES), len(LOG_SOURCES), self.negate)
+        if self.field == "ip":
+            lo, hi = _ip_range(self.value)
+            return Step(label, "ip", lambda values: (values >= lo) & (values <= hi), self.negate)
+        # Message text: run the regex over the distinct messages only
+        hits = [i for i, message in enumerate(table.messages) if self.pattern.search(message)]
+        return _codes_step(label, "message", np.array(hits, dtype=np.int64), len(table.messages), self.negate)
+
+@functools.lru_cache(maxsize=256)
+def parse(query: str) -> tuple[Term, ...]:
+    """Query text -> terms, with message patterns compiled once per query"""
+    terms = []
+    for match in _TERM.finditer(query):
+        negate, name, value = bool(match.group(1)), match.group(2), match.group(3)
+        field = ALIASES.get((name or "message").lower(), (name or "message").lower())
+        if field not in FIELDS:
+            # Not a field after all: the text as written, as a message term
+            field, value = "message", name + ":" + value.strip('"')
+        pattern = None
+        if field == "message":
+            if len(value) > 1 and value.startswith("/") and value.endswith("/"):
+                try:
+                    pattern = re.compile(value[1:-1], re.IGNORECASE)
+                except re.error as e:
+                    raise QueryError(f"invalid regex {value}: {e}") from None
+            else:
+                value = value.strip('"')
+                pattern = re.compile(re.escape(value), re.IGNORECASE)
+        elif field == "ip":
+            _ip_range(value)  # validate now rather than at execution
+        terms.append(Term(field, value, negate, pattern))
+    return tuple(terms)
+
+# =====PLANNING=====
+class PlanStep(NamedTuple):
+    label: str
+    estimate: float      # estimated fraction of rows kept
+    rows_in: int
+    rows_out: int
+    ms: float
+
+class Plan:
+    """Predicates ordered by estimated selectivity over a time window.
+
+    Each step filters the positions the previous steps kept, so the most
+    selective predicate runs on the most rows and the rest on few; once
+    nothing is left the remaining steps are skipped.
+    """
+
+    SAMPLE = 2048
+
+    def __init__(self, table: LogTable, steps: list[Step], since=None, until=None, first_row: int = 0):
+        self.table = table
+        self.start, self.end = table.window(since, until)
+        self.start = min(max(self.start, first_row), self.end)
+        # Estimate each step on an evenly spaced sample of the window
+        sample = np.linspace(self.start, self.end - 1, min(self.SAMPLE, self.end - self.start)).astype(np.int64)
+        self.estimates = [
+            float(step.mask(getattr(table, step.column)[sample]).mean()) if len(sample) else 0.0
+            for step in steps
+        ]
+        order = np.argsort(self.estimates, kind="stable")
+        self.steps = [steps[i] for i in order]
+        self.estimates = [self.estimates[i] for i in order]
+        self.trace: list[PlanStep] = []
+        self.window_ms = 0.0
+
+    def execute(self) -> np.ndarray:
+        self.trace = []
+        positions = None
+        rows = self.end - self.start
+        for step, estimate in zip(self.steps, self.estimates):
+            started = time.perf_counter()
+            column = getattr(self.table, step.column)
+            if rows == 0:
+                self.trace.append(PlanStep(step.label, estimate, 0, 0, 0.0))
+                continue
+            if positions is None:
+                positions = self.start + np.flatnonzero(step.mask(column[self.start:self.end]))
+            else:
+                positions = positions[step.mask(column[positions])]
+            self.trace.append(PlanStep(step.label, estimate, rows, len(positions), (time.perf_counter() - started) * 1000))
+            rows = len(positions)
+        return np.arange(self.start, self.end) if positions is None else positions
+
+    def explain(self) -> list[PlanStep]:
+        window = PlanStep("compile, time window search, estimates", 1.0, len(self.table), self.end - self.start, self.window_ms)
+        return [window] + self.trace
+
+def plan(table: LogTable, query: str = "", since=None, until=None, levels=None, sources=None, first_row: int = 0) -> Plan:
+    """Compile a query plus the page's level/source pickers into a plan;
+    rows before `first_row` are skipped, e.g. ones already evaluated"""
+    started = time.perf_counter()
+    steps = [term.step(table) for term in parse(query.strip())]
+    if levels is not None:
+        steps.append(_codes_step("level (picker)", "level", np.asarray(levels), len(LOG_LEVELS), False))
+    if sources is not None:
+        steps.append(_codes_step("source (picker)", "source", np.asarray(sources), len(LOG_SOURCES), False))
+    compiled = Plan(table, steps, since, until, first_row)
+    compiled.window_ms = (time.perf_counter() - started) * 1000
+    return compiled
+
+__all__ = ["QueryError", "Term", "Step", "PlanStep", "Plan", "parse", "plan"]
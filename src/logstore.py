@@ -0,0 +1,219 @@
+# src/logstore.py - Log Store
+import ipaddress
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.sources import LOG_LEVELS, LOG_SOURCES
+
+LEVEL_ICONS = {'ERROR': '🔴', 'WARN': '🟡', 'INFO': '🟢', 'DEBUG': '🔵'}
+
+# A cursor names one row: (timestamp, id). Ids grow in arrival order, so
+# together they give a total order that survives rows being dropped.
+Cursor = tuple[np.datetime64, int]
+
+def pack_ips(ips) -> np.ndarray:
+    """Dotted IPv4 strings -> uint32; anything unparsable packs to 0"""
+    codes, uniques = pd.factorize(np.asarray(ips, dtype=object))
+    packed = np.zeros(len(uniques) + 1, dtype=np.uint32)  # last slot for missing values
+    for i, ip in enumerate(uniques):
+        try:
+            packed[i] = int(ipaddress.IPv4Address(ip))
+        except (ipaddress.AddressValueError, TypeError, ValueError):
+            pass
+    return packed[codes]
+
+def unpack_ips(packed: np.ndarray) -> list[str]:
+    return [str(ipaddress.IPv4Address(int(ip))) if ip else "" for ip in packed]
+
+# =====TABLE=====
+class LogTable(NamedTuple):
+    """Read-only columnar snapshot of the store, sorted by (timestamp, id).
+    Messages are dictionary encoded: `message` holds codes into `messages`.
+    The dictionary is shared with the store, which only ever appends to it,
+    so it may hold entries newer than this snapshot's rows."""
+    timestamp: np.ndarray   # datetime64[ns]
+    id: np.ndarray          # int64
+    level: np.ndarray       # int8 codes into LOG_LEVELS
+    source: np.ndarray      # int8 codes into LOG_SOURCES
+    message: np.ndarray     # int32 codes into messages
+    ip: np.ndarray          # uint32 packed IPv4
+    messages: list[str]
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def locate(self, cursor: Cursor) -> int:
+        """Position of the cursor row, or of where it would be"""
+        ts, row_id = cursor
+        lo = np.searchsorted(self.timestamp, ts, side="left")
+        hi = np.searchsorted(self.timestamp, ts, side="right")
+        return int(lo + np.searchsorted(self.id[lo:hi], row_id, side="left"))
+
+    def window(self, since=None, until=None) -> tuple[int, int]:
+        """Row range [start, end) with since <= timestamp < until"""
+        start = 0 if since is None else int(np.searchsorted(self.timestamp, since, side="left"))
+        end = len(self) if until is None else int(np.searchsorted(self.timestamp, until, side="left"))
+        return start, max(start, end)
+
+    def select(self, since=None, until=None, levels=None, sources=None, messages=None) -> np.ndarray:
+        """Sorted positions of rows in the time window matching every given
+        predicate (level/source codes, message codes).
+
+        The window is found by binary search, so only rows inside it are
+        touched. Level and source are checked together through one lookup
+        table, and messages through a per-code table, so each column is
+        read once.
+        """
+        start, end = self.window(since, until)
+        if levels is None and sources is None and messages is None:
+            return np.arange(start, end)
+        allowed = np.ones((len(LOG_LEVELS), len(LOG_SOURCES)), dtype=bool)
+        if levels is not None:
+            allowed[np.setdiff1d(np.arange(len(LOG_LEVELS)), levels), :] = False
+        if sources is not None:
+            allowed[:, np.setdiff1d(np.arange(len(LOG_SOURCES)), sources)] = False
+        mask = allowed[self.level[start:end], self.source[start:end]]
+        if messages is not None:
+            keep = np.zeros(len(self.messages), dtype=bool)
+            keep[messages] = True
+            mask &= keep[self.message[start:end]]
+        return start + np.flatnonzero(mask)
+
+    def cursor(self, position: int) -> Cursor:
+        return self.timestamp[position], int(self.id[position])
+
+    def frame(self, positions: np.ndarray) -> pd.DataFrame:
+        # Look up only the rows asked for, not the whole dictionary
+        messages = np.array([self.messages[code] for code in self.message[positions].tolist()], dtype=object)
+        return pd.DataFrame({
+            'timestamp': self.timestamp[positions],
+            'id': self.id[positions],
+            'level': np.asarray(LOG_LEVELS, dtype=object)[self.level[positions]],
+            'source': np.asarray(LOG_SOURCES, dtype=object)[self.source[positions]],
+            'message': messages,
+            'ip': unpack_ips(self.ip[positions]),
+        })
+
+# =====STORE=====
+class LogStore:
+    """Append-only columnar log store with a row cap.
+
+    Columns live in buffers with spare capacity. A snapshot is a prefix
+    view of those buffers, and appends only write past it, so snapshots
+    already handed out never change. Trimming or growing copies into new
+    buffers for the same reason. The message dictionary is shared the same
+    way: appended to in place, and rebuilt with only the messages still in
+    use when rows are trimmed.
+    """
+
+    COLUMNS = {"timestamp": "datetime64[ns]", "id": np.int64, "level": np.int8,
+               "source": np.int8, "message": np.int32, "ip": np.uint32}
+
+    def __init__(self, max_rows: int = 2_000_000):
+        self.max_rows = max_rows
+        self.buffers = {name: np.empty(1024, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.rows = 0
+        self.next_id = 0
+        self.messages: list[str] = []
+        self.message_codes: dict[str, int] = {}
+
+    def _encode(self, messages) -> np.ndarray:
+        codes, uniques = pd.factorize(np.asarray(messages, dtype=object))
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for i, message in enumerate(uniques):
+            message = str(message)
+            code = self.message_codes.get(message)
+            if code is None:
+                code = self.message_codes[message] = len(self.messages)
+                self.messages.append(message)
+            lookup[i] = code
+        return lookup[codes]
+
+    def _reserve(self, extra: int) -> None:
+        keep = self.rows
+        if self.rows + extra > self.max_rows:
+            # Drop the oldest quarter at once so trims stay rare
+            keep = min(self.rows, max(self.max_rows - self.max_rows // 4 - extra, 0))
+        capacity = len(self.buffers["id"])
+        if keep == self.rows and self.rows + extra <= capacity:
+            return
+        capacity = min(max(2 * (keep + extra), capacity), self.max_rows)
+        start = self.rows - keep
+        for name, buffer in self.buffers.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[:keep] = buffer[start:self.rows]
+            self.buffers[name] = grown
+        trimmed = keep < self.rows
+        self.rows = keep
+        if trimmed:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop messages no stored row refers to. Snapshots handed out keep
+        the old dictionary, so this builds a new one and recodes the rows"""
+        codes = self.buffers["message"][:self.rows]
+        used, recoded = np.unique(codes, return_inverse=True)
+        codes[:] = recoded
+        self.messages = [self.messages[code] for code in used.tolist()]
+        self.message_codes = {message: code for code, message in enumerate(self.messages)}
+
+    def append(self, logs: pd.DataFrame) -> int:
+        """Append rows newer than anything stored; returns how many were new"""
+        timestamps = logs['timestamp'].to_numpy(dtype="datetime64[ns]")
+        start = np.searchsorted(timestamps, self.buffers["timestamp"][self.rows - 1], side="right") if self.rows else 0
+        start = max(start, len(timestamps) - self.max_rows)
+        new = len(timestamps) - start
+        if new <= 0:
+            return 0
+        self._reserve(new)
+        logs = logs.iloc[start:]
+        columns = {
+            "timestamp": timestamps[start:],
+            "id": np.arange(self.next_id, self.next_id + new),
+            "level": pd.Categorical(logs['level'], categories=LOG_LEVELS).codes,
+            "source": pd.Categorical(logs['source'], categories=LOG_SOURCES).codes,
+            "message": self._encode(logs['message']),
+            "ip": pack_ips(logs['ip']) if 'ip' in logs else np.zeros(new, dtype=np.uint32),
+        }
+        for name, values in columns.items():
+            self.buffers[name][self.rows:self.rows + new] = values
+        self.rows += new
+        self.next_id += new
+        return new
+
+    def snapshot(self) -> LogTable:
+        columns = {name: buffer[:self.rows] for name, buffer in self.buffers.items()}
+        return LogTable(**columns, messages=self.messages)
+
+    def ingest(self, source: str, logs: pd.DataFrame) -> LogTable:
+        self.append(logs)
+        return self.snapshot()
+
+# =====PAGING=====
+class LogPage(NamedTuple):
+    rows: pd.DataFrame      # newest first
+    offset: int             # matching rows newer than this page
+    total: int              # number of matching rows
+    newer: Cursor | None    # anchor for the next newer page
+    older: Cursor | None    # anchor for the next older page
+
+def page(table: LogTable, matches: np.ndarray, anchor: Cursor | None, limit: int) -> LogPage:
+    """The `limit` matching rows at or before `anchor`, newest first.
+
+    `matches` are sorted row positions. With no anchor the page follows the
+    newest rows as they arrive.
+    """
+    total = len(matches)
+    if total == 0:
+        return LogPage(table.frame(matches), 0, 0, None, None)
+    end = total if anchor is None else int(np.searchsorted(matches, table.locate(anchor), side="right"))
+    end = max(end, min(limit, total))
+    start = max(end - limit, 0)
+    positions = matches[start:end][::-1]
+    newer = table.cursor(matches[min(end - 1 + limit, total - 1)]) if end < total else None
+    older = table.cursor(matches[start - 1]) if start > 0 else None
+    return LogPage(table.frame(positions), total - end, total, newer, older)
+
+__all__ = ["LEVEL_ICONS", "Cursor", "LogTable", "LogStore", "LogPage", "page", "pack_ips", "unpack_ips"]
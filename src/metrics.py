@@ -0,0 +1,288 @@
+# src/metrics.py - Self Metrics
+#
+# Counters and histograms are a dict update under a lock; gauges are only
+# computed when the endpoint is scraped, so unscraped metrics cost nothing.
+import bisect
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Port of the local metrics endpoint; set to 0 to turn it off
+METRICS_PORT_ENV = "BLUEBRIE_METRICS_PORT"
+DEFAULT_PORT = 9464
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+# =====METRIC TYPES=====
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def samples(self) -> list[str]:
+        return []
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in values]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self._values: dict[tuple, list] = {}   # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict[tuple, list]:
+        with self._lock:
+            return {key: row[:] for key, row in self._values.items()}
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, row in self.snapshot().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = _labels(self.labels, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {row[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {row[-1]}")
+        return lines
+
+class Gauge(Metric):
+    """Value computed at scrape time; `fn` returns a number, or a dict of
+    label-value tuples to numbers"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float | dict], labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def samples(self) -> list[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            logger.exception("gauge %s failed", self.name)
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [f"{self.name}{_labels(self.labels, key)} {v}" for key, v in value.items()]
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; registering a name again replaces the old one"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = Registry()
+
+# =====TIMELINES=====
+class Timeline:
+    """Fixed-bucket histograms per label set and per minute, so pages can
+    chart percentiles over time; minutes older than `minutes` are dropped"""
+
+    def __init__(self, labels: tuple[str, ...], buckets: tuple[float, ...] = LATENCY_BUCKETS, minutes: int = 60,
+                 clock: Callable[[], float] = time.time):
+        self.labels = labels
+        self.buckets = buckets
+        self.minutes = minutes
+        self.clock = clock
+        self._rows: dict[tuple, list[int]] = {}    # (minute, *labels) -> bucket counts (+Inf last)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        minute = int(self.clock() // 60)
+        key = (minute, *(labels.get(name, "") for name in self.labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = [0] * (len(self.buckets) + 1)
+                # A new minute is the only time anything can expire
+                oldest = minute - self.minutes
+                for stale in [k for k in self._rows if k[0] <= oldest]:
+                    del self._rows[stale]
+            row[index] += 1
+
+    def quantiles(self, qs: tuple[float, ...] = (0.5, 0.95, 0.99), by: tuple[str, ...] = ()) -> list[dict]:
+        """Per minute and `by` labels: request count and each quantile, read
+        as the upper bound of the bucket it falls in (the last finite bound
+        for the +Inf bucket). Rows are oldest first."""
+        groups: dict[tuple, list[int]] = {}
+        with self._lock:
+            for key, counts in self._rows.items():
+                group = (key[0], *(key[1 + self.labels.index(name)] for name in by))
+                merged = groups.setdefault(group, [0] * len(counts))
+                for i, count in enumerate(counts):
+                    merged[i] += count
+        rows = []
+        for group, counts in sorted(groups.items()):
+            total = sum(counts)
+            cumulative = list(itertools.accumulate(counts))
+            row = {"minute": group[0] * 60, **dict(zip(by, group[1:])), "count": total}
+            for q in qs:
+                index = bisect.bisect_left(cumulative, q * total)
+                row[f"p{q * 100:g}"] = self.buckets[min(index, len(self.buckets) - 1)]
+            rows.append(row)
+        return rows
+
+# =====BUILT-IN METRICS=====
+PAGE_RERUNS = REGISTRY.register(Counter(
+    "bluebrie_page_reruns_total", "Script reruns per page", ("page",)))
+PAGE_RERUN_SECONDS = REGISTRY.register(Histogram(
+    "bluebrie_page_rerun_seconds", "Script rerun duration per page", ("page",)))
+STORE_READS = REGISTRY.register(Counter(
+    "bluebrie_store_reads_total", "Snapshot store reads by cache result (hit, miss, absent)", ("store", "result")))
+LENTIL_REQUESTS = REGISTRY.register(Counter(
+    "bluebrie_lentil_requests_total", "Requests to the Lentil server by endpoint and status code", ("endpoint", "status")))
+LENTIL_ERRORS = REGISTRY.register(Counter(
+    "bluebrie_lentil_errors_total", "Lentil requests that did not succeed, by endpoint and status code", ("endpoint", "status")))
+LENTIL_SECONDS = REGISTRY.register(Histogram(
+    "bluebrie_lentil_request_seconds", "Lentil request latency by endpoint and status code", ("endpoint", "status")))
+LENTIL_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "bluebrie_lentil_request_phase_seconds", "DNS, connect and time-to-first-byte of Lentil requests", ("endpoint", "phase")))
+LENTIL_PAYLOAD_BYTES = REGISTRY.register(Histogram(
+    "bluebrie_lentil_payload_bytes", "Lentil request and response body sizes", ("endpoint", "direction"), SIZE_BUCKETS))
+LENTIL_LOGINS = REGISTRY.register(Counter(
+    "bluebrie_lentil_logins_total", "Lentil session logins by result (ok, failed)", ("result",)))
+LENTIL_COALESCED = REGISTRY.register(Counter(
+    "bluebrie_lentil_coalesced_total", "Lentil reads answered by an identical request already in flight", ("endpoint",)))
+# Client-observed Lentil latency for the Network page
+LENTIL_TIMELINE = Timeline(("endpoint", "status"))
+
+def resident_memory() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current where /proc is unavailable. resource is
+        # Unix-only, so it is imported here and not by src.state's import
+        try:
+            import resource
+        except ImportError:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+REGISTRY.register(Gauge("process_resident_memory_bytes", "Resident memory of this process", resident_memory))
+
+# =====ENDPOINT=====
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server: ThreadingHTTPServer | None = None
+_server_started = False
+_server_lock = threading.Lock()
+
+def serve(port: int | None = None, host: str = "127.0.0.1") -> ThreadingHTTPServer | None:
+    """Start the metrics endpoint on a daemon thread, once per process"""
+    global _server, _server_started
+    port = int(os.environ.get(METRICS_PORT_ENV, DEFAULT_PORT)) if port is None else port
+    with _server_lock:
+        if _server_started or port == 0:
+            return _server
+        _server_started = True
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            # Another replica on this host may already hold the port
+            logger.warning("metrics endpoint not started on %s:%d: %s", host, port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="bluebrie-metrics", daemon=True).start()
+        return _server
+
+__all__ = [
+    "METRICS_PORT_ENV", "Counter", "Histogram", "Gauge", "Registry", "REGISTRY", "Timeline",
+    "PAGE_RERUNS", "PAGE_RERUN_SECONDS", "STORE_READS", "LENTIL_REQUESTS", "LENTIL_ERRORS", "LENTIL_SECONDS",
+    "LENTIL_PHASE_SECONDS", "LENTIL_PAYLOAD_BYTES", "LENTIL_LOGINS", "LENTIL_COALESCED",
+    "LENTIL_TIMELINE",
+    "serve",
+]
@@ -0,0 +1,147 @@
+# src/pagebench.py - Page Render Benchmarks
+#
+#   python -m src.pagebench                              # every page, 4 sessions x 10 reruns
+#   python -m src.pagebench --sessions 16 --reruns 20 dashboard reports
+#   python -m src.pagebench --save-baseline
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from src.bench import compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "bench", "pages_baseline.json")
+
+PAGES = {
+    "dashboard": "src/pages/dashboard/bb_dashboard.py",
+    "analytics": "src/pages/analytics/bb_analytics.py",
+    "reports": "src/pages/reports/bb_reports.py",
+    "peripherals": "src/pages/peripherals/bb_peripherals.py",
+    "settings": "src/pages/settings/bb_settings.py",
+}
+
+# =====MEASUREMENT=====
+def tree_bytes(node) -> int:
+    """Serialized size of every element and block a rerun produced; a
+    close stand-in for the deltas sent to the browser"""
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if proto is not None else 0
+    return size + sum(tree_bytes(child) for child in getattr(node, "children", {}).values())
+
+def _rerun(at: AppTest, path: str) -> tuple[float, int]:
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(f"{path}: {at.exception[0].value}")
+    return elapsed, tree_bytes(at._tree)
+
+def bench_page(page: str, sessions: int, reruns: int, timeout: float) -> dict:
+    """Run in a fresh process, so peak RSS belongs to this page alone.
+
+    Every round, each simulated session reruns the page once, as if all
+    viewers hit it at the same moment. App tests share one runtime and
+    cannot run in parallel threads, so the reruns are served one after
+    another; reruns are GIL-bound anyway, so a viewer's latency is its
+    wait from the start of the round plus its own rerun.
+    """
+    sys.path.insert(0, ROOT)
+    path = os.path.join(ROOT, PAGES[page])
+    apps = [AppTest.from_file(path, default_timeout=timeout) for _ in range(sessions)]
+
+    # The first round builds caches and the collector; report it apart
+    cold = [_rerun(at, path)[0] for at in apps]
+
+    latency, service, sizes = [], [], []
+    started = time.perf_counter()
+    for _ in range(max(reruns - 1, 1)):
+        round_start = time.perf_counter()
+        for at in apps:
+            elapsed, size = _rerun(at, path)
+            latency.append((time.perf_counter() - round_start) * 1000)
+            service.append(elapsed)
+            sizes.append(size)
+    wall = time.perf_counter() - started
+
+    return {
+        "page": page,
+        "cold_ms": float(np.median(cold)),
+        "rerun_ms": float(np.median(service)),
+        "p50_ms": float(np.percentile(latency, 50)),
+        "p95_ms": float(np.percentile(latency, 95)),
+        "p99_ms": float(np.percentile(latency, 99)),
+        "max_ms": float(max(latency)),
+        "reruns_per_sec": len(service) / wall,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "bytes_per_rerun": int(np.median(sizes)),
+    }
+
+def run(pages: list[str], sessions: int, reruns: int, timeout: float) -> dict[str, dict]:
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for page in pages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = results[page] = pool.submit(bench_page, page, sessions, reruns, timeout).result()
+        print(f"{page:12s} rerun {result['rerun_ms']:7.1f} ms  p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+              f"p99 {result['p99_ms']:8.1f} ms  rss {result['peak_rss_mb']:7.1f} MB  "
+              f"{result['bytes_per_rerun']:,} B/rerun", file=sys.stderr)
+    return results
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark BlueBrie page reruns under concurrent sessions")
+    parser.add_argument("pages", nargs="*", metavar="page", help=f"pages to run (default: all of {', '.join(PAGES)})")
+    parser.add_argument("--sessions", type=int, default=4, help="simulated viewers rerunning together")
+    parser.add_argument("--reruns", type=int, default=10, help="reruns per session")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+    unknown = set(args.pages) - set(PAGES)
+    if unknown:
+        parser.error(f"unknown page(s): {', '.join(sorted(unknown))}")
+
+    current = {
+        "meta": {
+            "sessions": args.sessions, "reruns": args.reruns,
+            "python": platform.python_version(), "streamlit": st.__version__,
+            "machine": platform.machine(), "created": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": run(args.pages or list(PAGES), args.sessions, args.reruns, args.timeout),
+    }
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance, args.min_delta_ms,
+                                  metric="p95_ms", match=("sessions", "reruns"))
+        return 1 if regressions else 0
+    return 0
+
+__all__ = ["PAGES", "tree_bytes", "bench_page", "run", "main"]
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,40 +7,13 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-# =====SAMPLE DATA GENERATION=====
-@st.cache_data
-def generate_analytics_data():
-    np.random.seed(42)
-    
-    # Generate time series data
-    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
-    
-    # Website analytics data
-    website_data = pd.DataFrame({
-        'date': dates,
-        'page_views': np.random.poisson(1000, len(dates)) + np.sin(np.arange(len(dates)) * 2 * np.pi / 365) * 200,
-        'unique_visitors': np.random.poisson(300, len(dates)) + np.sin(np.arange(len(dates)) * 2 * np.pi / 365) * 50,
-        'bounce_rate': np.random.beta(2, 3, len(dates)) * 100,
-        'avg_session_duration': np.random.normal(180, 60, len(dates)).clip(30, 600),
-        'conversion_rate': np.random.beta(1, 20, len(dates)) * 100
-    })
-    
-    # Sales analytics data
-    sales_data = pd.DataFrame({
-        'product': ['Product A', 'Product B', 'Product C', 'Product D', 'Product E'],
-        'revenue': np.random.normal([50000, 35000, 25000, 15000, 10000], 5000),
-        'units_sold': np.random.poisson([500, 350, 250, 150, 100]),
-        'profit_margin': np.random.normal([25, 30, 20, 35, 15], 5)
-    })
-    
-    # Geographic data
-    geo_data = pd.DataFrame({
-        'country': ['United States', 'United Kingdom', 'Germany', 'France', 'Canada', 'Australia', 'Japan', 'Brazil'],
-        'users': np.random.poisson([5000, 2000, 1500, 1200, 800, 600, 400, 300]),
-        'revenue': np.random.normal([100000, 40000, 30000, 25000, 15000, 12000, 8000, 6000], 5000)
-    })
-    
-    return website_data, sales_data, geo_data
+from src.cards import card_section
+from src.collector import get_collector
+from src.conn import LentilConnection
+from src.loadtest import ENDPOINTS, LoadPlan, LoadTest, StandInServer
+from src.metrics import LENTIL_TIMELINE
+from src.stats import format_delta
+from src.views import PERIODS, NetworkView, period_start
 
 # =====ANALYTICS PAGE=====
 def analytics_page():
@@ -52,15 +25,63 @@ def analytics_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # Generate data
-    website_data, sales_data, geo_data = generate_analytics_data()
+    # Get data
+    collector = get_collector()
+    website_data, sales_data, geo_data = collector.read("analytics")
     
+    # Saved views: picking one loads its time period and endpoint filters
+    network_views = collector.read("saved_network_views") or []
+    view_results = collector.read("network_views") or {}
+
+    def load_view():
+        view = NetworkView(*next(v for v in network_views if v[0] == st.session_state["network_view"]))
+        st.session_state.update(network_period=view.time_period, lentil_endpoint=view.endpoint)
+
+    col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+    with col1:
+        view_names = [v[0] for v in network_views]
+        if view_names:
+            st.selectbox("Saved View", view_names, index=None, placeholder="Open a saved view...",
+                         key="network_view", on_change=load_view)
+    with col2:
+        view_name = st.text_input("View Name", placeholder="Name these filters to save them...", key="network_view_name")
+    with col3:
+        if st.button("💾 Save View", disabled=not view_name, key="network_save_view"):
+            view = NetworkView(view_name, st.session_state.get("network_period", PERIODS[0]),
+                               st.session_state.get("lentil_endpoint", "All"))
+            collector.publish("saved_network_views", [v for v in network_views if v[0] != view_name] + [tuple(view)])
+            st.success(f"Saved view '{view_name}'")
+    with col4:
+        open_view = st.session_state.get("network_view")
+        if st.button("🗑️ Delete View", disabled=open_view is None, key="network_delete_view"):
+            collector.publish("saved_network_views", [v for v in network_views if v[0] != open_view])
+            st.session_state.pop("network_view", None)
+            st.rerun()
+
     # Time period selector
     col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
-        time_period = st.selectbox("Time Period", ["Last 7 Days", "Last 30 Days", "Last 90 Days", "Year to Date"])
+        time_period = st.selectbox("Time Period", PERIODS, key="network_period")
     with col2:
         metric_type = st.selectbox("Primary Metric", ["Page Views", "Revenue", "Users", "Conversions"])
+    with col3:
+        # Approximate distinct counts: kept by the collector for saved time
+        # periods, otherwise merged here from the daily log sketches
+        materialized = next((r for r in view_results.values() if r.view.time_period == time_period), None)
+        if materialized is not None:
+            users, ips = materialized.users, materialized.ips
+        else:
+            distinct = collector.read("distinct")
+            now = pd.Timestamp.now()
+            start = period_start(time_period, now).timestamp()
+            users, ips = distinct['users'].count(start, now.timestamp()), distinct['ips'].count(start, now.timestamp())
+        col_users, col_ips = st.columns(2)
+        with col_users:
+            st.metric("Unique Users", f"{users:,.0f}")
+        with col_ips:
+            st.metric("Unique IPs", f"{ips:,.0f}")
+        if materialized is not None:
+            st.caption(f"⚡ Served from saved view '{materialized.view.name}'")
     
     # Key Performance Indicators
     st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
@@ -68,42 +89,48 @@ def analytics_page():
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
+    # Values and day-over-day deltas are maintained by the collector
+    kpis = get_collector().read("kpis") or {}
     latest_data = website_data.iloc[-1]
     
+    def kpi_value(name):
+        card = kpis.get(name)
+        return card.value if card else latest_data[name]
+    
     with col1:
         st.metric(
             "Page Views", 
-            f"{latest_data['page_views']:.0f}",
-            f"{np.random.randint(-15, 25)}%"
+            f"{kpi_value('page_views'):.0f}",
+            format_delta(kpis.get('page_views'))
         )
     
     with col2:
         st.metric(
             "Unique Visitors", 
-            f"{latest_data['unique_visitors']:.0f}",
-            f"{np.random.randint(-10, 20)}%"
+            f"{kpi_value('unique_visitors'):.0f}",
+            format_delta(kpis.get('unique_visitors'))
         )
     
     with col3:
         st.metric(
             "Bounce Rate", 
-            f"{latest_data['bounce_rate']:.1f}%",
-            f"{np.random.randint(-5, 15)}%",
+            f"{kpi_value('bounce_rate'):.1f}%",
+            format_delta(kpis.get('bounce_rate')),
             delta_color="inverse"
         )
     
     with col4:
         st.metric(
             "Avg Session", 
-            f"{latest_data['avg_session_duration']:.0f}s",
-            f"{np.random.randint(-20, 30)}s"
+            f"{kpi_value('avg_session_duration'):.0f}s",
+            format_delta(kpis.get('avg_session_duration'), "s", 0)
         )
     
     with col5:
         st.metric(
             "Conversion Rate", 
-            f"{latest_data['conversion_rate']:.2f}%",
-            f"{np.random.randint(-2, 8)}%"
+            f"{kpi_value('conversion_rate'):.2f}%",
+            format_delta(kpis.get('conversion_rate'), "%", 2)
         )
     
     st.markdown("</div>", unsafe_allow_html=True)
@@ -234,6 +261,120 @@ def analytics_page():
         
         st.markdown("</div>", unsafe_allow_html=True)
     
+    # Lentil API Latency
+    with card_section("🛰️ Lentil API Latency"):
+        # Client-side timings of LentilConnection calls made by this process,
+        # in per-minute latency histograms
+        by_endpoint = LENTIL_TIMELINE.quantiles(by=("endpoint", "status"))
+        if not by_endpoint:
+            st.info("No Lentil API calls have been made from this server yet.")
+        else:
+            calls = pd.DataFrame(by_endpoint)
+            calls['status'] = calls['status'].astype(str)
+            endpoints = ["All"] + sorted(calls['endpoint'].unique())
+            if st.session_state.get("lentil_endpoint") not in endpoints:
+                # A saved view's endpoint this process has not called yet
+                st.session_state.pop("lentil_endpoint", None)
+            endpoint = st.selectbox("Endpoint", endpoints, key="lentil_endpoint")
+            by = () if endpoint == "All" else ("endpoint",)
+            latency = pd.DataFrame(LENTIL_TIMELINE.quantiles(by=by))
+            if endpoint != "All":
+                latency = latency[latency['endpoint'] == endpoint]
+                calls = calls[calls['endpoint'] == endpoint]
+            latency['time'] = [datetime.fromtimestamp(m) for m in latency['minute']]
+            calls['time'] = [datetime.fromtimestamp(m) for m in calls['minute']]
+            
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                fig_latency = go.Figure()
+                for column, color in (('p50', '#3b82f6'), ('p95', '#f59e0b'), ('p99', '#ef4444')):
+                    fig_latency.add_trace(go.Scatter(
+                        x=latency['time'],
+                        y=latency[column] * 1000,
+                        mode='lines+markers',
+                        name=column,
+                        line=dict(color=color, width=2, shape='hv')
+                    ))
+                fig_latency.update_layout(
+                    height=300,
+                    yaxis_title="Latency (ms, bucket upper bound)",
+                    yaxis_type="log",
+                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                    margin=dict(l=0, r=0, t=30, b=0)
+                )
+                st.plotly_chart(fig_latency, use_container_width=True)
+            with col2:
+                fig_calls = px.bar(calls, x='time', y='count', color='status', title="Calls per Minute by Status")
+                fig_calls.update_layout(height=300, margin=dict(l=0, r=0, t=40, b=0))
+                st.plotly_chart(fig_calls, use_container_width=True)
+
+    # Load Test
+    with card_section("🚀 Load Test"):
+        test = st.session_state.get("load_test")
+        running = test is not None and test.running
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            url = st.text_input("Lentil URL", placeholder="http://127.0.0.1:8000/", key="load_url", disabled=running)
+            stand_in = st.checkbox("Use local stand-in server", value=True, key="load_stand_in", disabled=running)
+        with col2:
+            endpoint = st.selectbox("Endpoint", ENDPOINTS, key="load_endpoint", disabled=running)
+            workers = st.number_input("Workers", 1, 256, 32, key="load_workers", disabled=running)
+        with col3:
+            rate = st.number_input("Rate (req/s)", 1, 5000, 100, key="load_rate", disabled=running)
+            ramp_to = st.number_input("Ramp to (req/s, 0 = constant)", 0, 5000, 0, key="load_ramp_to", disabled=running)
+        with col4:
+            duration = st.number_input("Duration (s)", 1, 3600, 30, key="load_duration", disabled=running)
+            if running:
+                if st.button("⏹️ Stop", use_container_width=True):
+                    test.stop()
+            elif st.button("▶️ Start", use_container_width=True, disabled=not (stand_in or url)):
+                if stand_in:
+                    # One stand-in per session, kept between runs
+                    if "load_stand_in_server" not in st.session_state:
+                        st.session_state.load_stand_in_server = StandInServer()
+                    url = st.session_state.load_stand_in_server.url
+                test = LoadTest(lambda: LentilConnection(url, ""), LoadPlan(rate, duration, ramp_to or None),
+                                endpoint, workers).start()
+                st.session_state.load_test = test
+                running = True
+
+        # Redrawn every second while the test runs, without rerunning the page
+        @st.fragment(run_every=1 if running else None)
+        def load_test_charts():
+            if test is None:
+                st.info("Open-loop load against LentilConnection: requests go out on schedule even when the server falls behind.")
+                return
+            summary = test.summary()
+            per_second = test.per_second()
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Sent", f"{summary['sent']:,}")
+            col2.metric("Completed", f"{summary['completed']:,}")
+            col3.metric("Errors", f"{summary['errors']:,}")
+            col4.metric("p99 Latency", f"{summary['p99_ms']:,.1f} ms" if 'p99_ms' in summary else "n/a")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                fig_throughput = px.bar(per_second, x='second', y=['requests', 'errors'], barmode='overlay',
+                                        title="Requests per Second (by scheduled time)")
+                fig_throughput.update_layout(height=300, margin=dict(l=0, r=0, t=40, b=0))
+                st.plotly_chart(fig_throughput, use_container_width=True)
+            with col2:
+                fig_load_latency = px.line(per_second, x='second', y=['p50_ms', 'p99_ms', 'service_p99_ms'],
+                                           title="Latency (ms)", labels={'value': 'ms', 'variable': ''})
+                fig_load_latency.update_layout(height=300, margin=dict(l=0, r=0, t=40, b=0))
+                st.plotly_chart(fig_load_latency, use_container_width=True)
+            st.caption("p50/p99 count from when each request was due; service_p99 counts from when a worker sent it, "
+                       "as a closed-loop tool would report.")
+            if not test.running:
+                st.caption(f"Finished after {summary['elapsed_s']:.1f}s")
+                if running:
+                    # Rerun the page once to re-enable the controls and stop polling
+                    st.rerun()
+
+        load_test_charts()
+
     # Advanced Analytics Section
     st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
     st.subheader("🔬 Advanced Analytics")
@@ -244,23 +385,26 @@ def analytics_page():
     with tab1:
         st.write("**User Cohort Analysis**")
         
-        # Generate cohort data
-        cohort_data = np.random.rand(12, 12) * 100
-        cohort_df = pd.DataFrame(cohort_data, 
-                               columns=[f"Month {i+1}" for i in range(12)],
-                               index=[f"Jan Cohort", f"Feb Cohort", f"Mar Cohort", f"Apr Cohort",
-                                     f"May Cohort", f"Jun Cohort", f"Jul Cohort", f"Aug Cohort",
-                                     f"Sep Cohort", f"Oct Cohort", f"Nov Cohort", f"Dec Cohort"])
+        # Retention matrix maintained by the collector from user activity
+        cohorts = get_collector().read("cohorts")
         
-        fig_cohort = px.imshow(
-            cohort_df.values,
-            labels=dict(x="Months Since First Purchase", y="Cohort", color="Retention %"),
-            x=cohort_df.columns,
-            y=cohort_df.index,
-            color_continuous_scale="RdYlBu_r"
-        )
-        fig_cohort.update_layout(height=400)
-        st.plotly_chart(fig_cohort, use_container_width=True)
+        if cohorts is None or not cohorts.cohorts:
+            st.info("No completed days of user activity yet.")
+        else:
+            cohort_df = pd.DataFrame(cohorts.retention, 
+                                   columns=[f"Month {i}" for i in range(cohorts.retention.shape[1])],
+                                   index=[f"{label} Cohort" for label in cohorts.cohorts])
+            
+            fig_cohort = px.imshow(
+                cohort_df.values,
+                labels=dict(x="Months Since First Message", y="Cohort", color="Retention %"),
+                x=cohort_df.columns,
+                y=cohort_df.index,
+                color_continuous_scale="RdYlBu_r"
+            )
+            fig_cohort.update_layout(height=400)
+            st.plotly_chart(fig_cohort, use_container_width=True)
+            st.caption(f"{int(cohorts.sizes.sum()):,} users, from completed days before {cohorts.updated_through:%Y-%m-%d}")
     
     with tab2:
         st.write("**Customer Segmentation**")
@@ -278,38 +422,63 @@ def analytics_page():
         st.plotly_chart(fig_segments, use_container_width=True)
     
     with tab3:
-        st.write("**Revenue Prediction**")
-        
-        # Generate prediction data
-        future_dates = pd.date_range(start='2025-01-01', end='2025-12-31', freq='M')
-        actual_revenue = np.random.normal(50000, 10000, 12)
-        predicted_revenue = actual_revenue * np.random.normal(1.1, 0.1, 12)
-        
-        fig_prediction = go.Figure()
-        
-        fig_prediction.add_trace(go.Scatter(
-            x=future_dates,
-            y=predicted_revenue,
-            mode='lines+markers',
-            name='Predicted Revenue',
-            line=dict(color='#1f77b4', dash='dash')
-        ))
+        st.write("**Capacity Forecast**")
         
-        fig_prediction.add_trace(go.Scatter(
-            x=future_dates[:6],  # Show actual for first 6 months
-            y=actual_revenue[:6],
-            mode='lines+markers',
-            name='Actual Revenue',
-            line=dict(color='#ff7f0e')
-        ))
+        # Models are fitted and updated by the collector; this only plots them
+        forecasts = get_collector().read("forecasts") or {}
+        forecast_metric = st.selectbox("Metric", ["Request Rate", "Memory", "Disk"], key="forecast_metric")
+        forecast = forecasts.get({"Request Rate": "requests", "Memory": "memory", "Disk": "disk"}[forecast_metric])
         
-        fig_prediction.update_layout(
-            height=400,
-            title="Revenue Prediction for 2025",
-            xaxis_title="Month",
-            yaxis_title="Revenue ($)"
-        )
-        st.plotly_chart(fig_prediction, use_container_width=True)
+        if forecast is None:
+            st.info("Not enough hourly history yet; the forecast appears once six hours have been collected.")
+        else:
+            history_times = pd.to_datetime(forecast.history_times, unit='s')
+            future_times = pd.to_datetime(forecast.times, unit='s')
+            
+            fig_prediction = go.Figure()
+            
+            fig_prediction.add_trace(go.Scatter(
+                x=future_times,
+                y=forecast.upper,
+                mode='lines',
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo='skip'
+            ))
+            
+            fig_prediction.add_trace(go.Scatter(
+                x=future_times,
+                y=forecast.lower,
+                mode='lines',
+                name='95% Interval',
+                line=dict(width=0),
+                fill='tonexty',
+                fillcolor='rgba(31,119,180,0.15)'
+            ))
+            
+            fig_prediction.add_trace(go.Scatter(
+                x=future_times,
+                y=forecast.values,
+                mode='lines+markers',
+                name='Forecast',
+                line=dict(color='#1f77b4', dash='dash')
+            ))
+            
+            fig_prediction.add_trace(go.Scatter(
+                x=history_times,
+                y=forecast.history,
+                mode='lines+markers',
+                name='Hourly Actual',
+                line=dict(color='#ff7f0e')
+            ))
+            
+            fig_prediction.update_layout(
+                height=400,
+                title=f"{forecast_metric} Forecast (Next 24 Hours)",
+                xaxis_title="Time",
+                yaxis_title=forecast_metric
+            )
+            st.plotly_chart(fig_prediction, use_container_width=True)
     
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -3,46 +3,31 @@ import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+import html
+import time
 from datetime import datetime, timedelta
 
-# =====SERVER DATA SIMULATION=====
-@st.cache_data
-def get_server_metrics():
-    np.random.seed(42)
-    
-    # Simulate server uptime and basic metrics
-    uptime_hours = np.random.randint(120, 8760)  # 5 days to 1 year
-    cpu_usage = np.random.uniform(15, 85)
-    memory_usage = np.random.uniform(40, 90)
-    disk_usage = np.random.uniform(25, 75)
-    
-    # Network metrics
-    requests_per_sec = np.random.poisson(45)
-    active_connections = np.random.randint(10, 200)
-    
-    return {
-        'uptime_hours': uptime_hours,
-        'cpu_usage': cpu_usage,
-        'memory_usage': memory_usage,
-        'disk_usage': disk_usage,
-        'requests_per_sec': requests_per_sec,
-        'active_connections': active_connections
-    }
+from src.alerts import status_class, status_label
+from src.anomaly import anomaly_points
+from src.cards import MetricCard, card_grid, card_section
+from src.collector import get_collector
+from src.host import format_bytes
+from src.stats import format_delta
 
-@st.cache_data
-def get_time_series_data():
-    # Generate last 24 hours of data
-    times = pd.date_range(start=datetime.now() - timedelta(hours=24), end=datetime.now(), freq='5min')
-    
-    data = pd.DataFrame({
-        'timestamp': times,
-        'cpu': np.random.normal(50, 15, len(times)).clip(0, 100),
-        'memory': np.random.normal(65, 10, len(times)).clip(0, 100),
-        'requests': np.random.poisson(40, len(times)),
-        'response_time': np.random.gamma(2, 50, len(times))  # Response time in ms
-    })
-    
-    return data
+# =====CHART HELPERS=====
+def add_anomaly_markers(fig, metric_anomalies):
+    if not metric_anomalies:
+        return
+    x, y = anomaly_points(metric_anomalies)
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=y,
+        mode='markers',
+        name='Anomaly',
+        marker=dict(color='#ef4444', size=8, symbol='circle-open', line=dict(color='#ef4444', width=2)),
+        hovertext=[f"{a.detector} score {a.score:+.1f}" for a in metric_anomalies],
+        showlegend=False
+    ))
 
 # =====SERVER OVERVIEW PAGE=====
 def dashboard_page():
@@ -55,174 +40,208 @@ def dashboard_page():
     """, unsafe_allow_html=True)
     
     # Get server metrics
-    metrics = get_server_metrics()
-    time_data = get_time_series_data()
+    collector = get_collector()
+    metrics = collector.read("server_metrics")
+    time_data = collector.read_frame("time_series")
+    alerts = collector.read("alerts") or {}
+    anomalies = collector.read("anomalies") or {}
     
     # Server Status Row
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        uptime_days = metrics['uptime_hours'] // 24
-        uptime_hours = metrics['uptime_hours'] % 24
-        st.markdown(f"""
-        <div class='metric-card'>
-            <div class='metric-label'>Uptime</div>
-            <div class='metric-value'>{uptime_days}d {uptime_hours}h</div>
-            <div class='metric-sublabel status-good'>Running</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        cpu_status = "status-danger" if metrics['cpu_usage'] > 80 else "status-warning" if metrics['cpu_usage'] > 60 else "status-good"
-        st.markdown(f"""
-        <div class='metric-card'>
-            <div class='metric-label'>CPU</div>
-            <div class='metric-value'>{metrics['cpu_usage']:.0f}%</div>
-            <div class='metric-sublabel {cpu_status}'>{"High" if metrics['cpu_usage'] > 80 else "Normal" if metrics['cpu_usage'] < 60 else "Medium"}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <div class='metric-label'>Connections</div>
-            <div class='metric-value'>{metrics['active_connections']}</div>
-            <div class='metric-sublabel status-good'>Active</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class='metric-card'>
-            <div class='metric-label'>Requests/sec</div>
-            <div class='metric-value'>{metrics['requests_per_sec']}</div>
-            <div class='metric-sublabel status-good'>{(metrics['requests_per_sec']*60):.0f}/min</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
+    uptime_days = metrics['uptime_hours'] // 24
+    uptime_hours = metrics['uptime_hours'] % 24
+    # Status comes from the alert engine and the thresholds on the Config page
+    cpu_alert = alerts.get('cpu')
+    cpu_usage = cpu_alert.value if cpu_alert and cpu_alert.value is not None else metrics['cpu_usage']
+    card_grid([
+        MetricCard("Uptime", f"{uptime_days}d {uptime_hours}h", "Running", "status-good"),
+        MetricCard("CPU", f"{cpu_usage:.0f}%", status_label(cpu_alert), status_class(cpu_alert)),
+        MetricCard("Connections", f"{metrics['active_connections']}", "Active", "status-good"),
+        MetricCard("Requests/sec", f"{metrics['requests_per_sec']}", f"{(metrics['requests_per_sec']*60):.0f}/min", "status-good"),
+    ])
     
     # System Metrics Row
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("Performance Trends")
-        
-        # Clean performance chart
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=time_data['timestamp'],
-            y=time_data['cpu'],
-            mode='lines',
-            name='CPU',
-            line=dict(color='#3b82f6', width=2)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=time_data['timestamp'],
-            y=time_data['memory'],
-            mode='lines',
-            name='Memory',
-            line=dict(color='#10b981', width=2)
-        ))
-        
-        fig.update_layout(
-            height=280,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            yaxis=dict(range=[0, 100], showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            margin=dict(l=0, r=0, t=30, b=0)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("Performance Trends"):
+            # Clean performance chart
+            fig = go.Figure()
+        
+            fig.add_trace(go.Scatter(
+                x=time_data['timestamp'],
+                y=time_data['cpu'],
+                mode='lines',
+                name='CPU',
+                line=dict(color='#3b82f6', width=2)
+            ))
+        
+            fig.add_trace(go.Scatter(
+                x=time_data['timestamp'],
+                y=time_data['memory'],
+                mode='lines',
+                name='Memory',
+                line=dict(color='#10b981', width=2)
+            ))
+        
+            for metric in ('cpu', 'memory'):
+                add_anomaly_markers(fig, anomalies.get(metric, []))
+        
+            fig.update_layout(
+                height=280,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(range=[0, 100], showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                margin=dict(l=0, r=0, t=30, b=0)
+            )
+        
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("System Health")
-        
-        # Clean metrics display
-        memory_usage = (time_data['memory'].iloc[-1])
-        disk_usage = np.random.uniform(35, 65)
-        
-        st.metric("Memory", f"{memory_usage:.0f}%", 
-                 f"{np.random.randint(-3, 8)}%")
-        st.metric("Disk", f"{disk_usage:.0f}%",
-                 f"{np.random.randint(-1, 3)}%")
-        
-        st.markdown("**Services**")
-        services = [
-            ("HTTP Server", "Running"),
-            ("Database", "Running"), 
-            ("Cache", "Running"),
-            ("Queue", "Running")
-        ]
-        
-        for service, status in services:
-            status_class = "status-good" if status == "Running" else "status-danger"
-            st.markdown(f"<span class='{status_class}'>●</span> {service}", unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+        with card_section("System Health"):
+            # Clean metrics display, deltas vs the previous hour
+            kpis = collector.read("kpis") or {}
+            memory_usage = kpis['memory'].value if 'memory' in kpis else time_data['memory'].iloc[-1]
+            disk_usage = kpis['disk'].value if 'disk' in kpis else metrics['disk_usage']
+        
+            st.metric("Memory", f"{memory_usage:.0f}%", 
+                     format_delta(kpis.get('memory')), delta_color="inverse")
+            st.metric("Disk", f"{disk_usage:.0f}%",
+                     format_delta(kpis.get('disk')), delta_color="inverse")
+        
+            firing = [alert for alert in alerts.values() if alert.firing]
+            if firing:
+                st.markdown("**Alerts**")
+                for alert in firing:
+                    since = pd.Timestamp(alert.since, unit='s').strftime('%H:%M') if alert.since else "-"
+                    st.markdown(f"<span class='{status_class(alert)}'>●</span> {alert.metric.title()} above {alert.threshold:.0f} since {since}", unsafe_allow_html=True)
+        
+            st.markdown("**Services**")
+            # Summed over each service's processes by the collector's /proc sampler
+            services = collector.read("services")
+            if services is not None and len(services):
+                latest = services.groupby('service', sort=False).last()
+                st.dataframe(
+                    pd.DataFrame({
+                        'Service': [("🟢 " if n else "🔴 ") + name for name, n in latest['processes'].items()],
+                        'CPU %': latest['cpu'].round(1).to_numpy(),
+                        'Memory': [format_bytes(rss) for rss in latest['rss']],
+                        'I/O': [format_bytes(io, 'B/s') for io in latest['io_read'] + latest['io_write']],
+                        'CPU': [series.tolist() for _, series in services.groupby('service', sort=False)['cpu']],
+                    }),
+                    column_config={'CPU': st.column_config.LineChartColumn("CPU (15 min)", y_min=0)},
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            else:
+                st.caption("Waiting for the first process sample")
+        
+            # Probed on the collector; a dead dependency only costs it a timeout
+            health = collector.read("health") or {}
+            if health:
+                lines = []
+                for result in health.values():
+                    if result.circuit == "open":
+                        retry = int(max(result.retry_at - time.time(), 0))
+                        status, text = "status-danger", f"down, retry in {retry}s ({result.detail})"
+                    elif result.ok:
+                        status, text = "status-good", f"{result.latency_ms:.0f} ms"
+                    else:
+                        status, text = "status-warning", result.detail
+                    lines.append(f"<span class='{status}'>●</span> {html.escape(result.name)} <span class='metric-sublabel'>{html.escape(text)}</span>")
+                st.markdown("<br>".join(lines), unsafe_allow_html=True)
+        
     # Performance Charts
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("Request Rate")
-        
-        fig_requests = go.Figure()
-        fig_requests.add_trace(go.Scatter(
-            x=time_data['timestamp'],
-            y=time_data['requests'],
-            mode='lines',
-            name='Requests',
-            line=dict(color='#8b5cf6', width=2),
-            fill='tonexty'
-        ))
-        
-        fig_requests.update_layout(
-            height=200,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            margin=dict(l=0, r=0, t=0, b=0)
-        )
-        
-        st.plotly_chart(fig_requests, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("Request Rate"):
+            fig_requests = go.Figure()
+            fig_requests.add_trace(go.Scatter(
+                x=time_data['timestamp'],
+                y=time_data['requests'],
+                mode='lines',
+                name='Requests',
+                line=dict(color='#8b5cf6', width=2),
+                fill='tonexty'
+            ))
+            add_anomaly_markers(fig_requests, anomalies.get('requests', []))
+        
+            fig_requests.update_layout(
+                height=200,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                showlegend=False,
+                yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                margin=dict(l=0, r=0, t=0, b=0)
+            )
+        
+            st.plotly_chart(fig_requests, use_container_width=True)
     
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("Response Time")
-        
-        fig_response = go.Figure()
-        fig_response.add_trace(go.Scatter(
-            x=time_data['timestamp'],
-            y=time_data['response_time'],
-            mode='lines',
-            name='Response Time',
-            line=dict(color='#f59e0b', width=2)
-        ))
-        
-        fig_response.update_layout(
-            height=200,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            showlegend=False,
-            yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            margin=dict(l=0, r=0, t=0, b=0)
-        )
-        
-        st.plotly_chart(fig_response, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("Response Time"):
+            # Percentiles come from merging the per-bucket latency sketches
+            latency = collector.read("latency")
+            window = st.selectbox("Percentile Window", ["Last Hour", "Last 6 Hours", "Last 24 Hours"], key="latency_window")
+            window_hours = {"Last Hour": 1, "Last 6 Hours": 6, "Last 24 Hours": 24}[window]
+            end = time_data['timestamp'].iloc[-1].timestamp()
+            p50, p95, p99 = latency.window(end - window_hours * 3600, end + 1).quantiles([0.5, 0.95, 0.99])
+            if p50 is not None:
+                st.caption(f"p50 {p50:.0f} ms · p95 {p95:.0f} ms · p99 {p99:.0f} ms")
+        
+            fig_response = go.Figure()
+        
+            # Hourly p50-p99 band with the p95 line
+            band_starts, bands = latency.bands(3600, [0.5, 0.95, 0.99])
+            band_times = pd.to_datetime(band_starts + 1800, unit='s')
+            fig_response.add_trace(go.Scatter(
+                x=band_times,
+                y=bands[:, 2],
+                mode='lines',
+                name='p99',
+                line=dict(color='rgba(245,158,11,0)', width=0),
+                hoverinfo='skip'
+            ))
+            fig_response.add_trace(go.Scatter(
+                x=band_times,
+                y=bands[:, 0],
+                mode='lines',
+                name='p50-p99',
+                line=dict(color='rgba(245,158,11,0)', width=0),
+                fill='tonexty',
+                fillcolor='rgba(245,158,11,0.15)',
+                hoverinfo='skip'
+            ))
+            fig_response.add_trace(go.Scatter(
+                x=band_times,
+                y=bands[:, 1],
+                mode='lines',
+                name='p95',
+                line=dict(color='#ef4444', width=1, dash='dot')
+            ))
+        
+            fig_response.add_trace(go.Scatter(
+                x=time_data['timestamp'],
+                y=time_data['response_time'],
+                mode='lines',
+                name='Response Time',
+                line=dict(color='#f59e0b', width=2)
+            ))
+            add_anomaly_markers(fig_response, anomalies.get('response_time', []))
+        
+            fig_response.update_layout(
+                height=200,
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                showlegend=False,
+                yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                xaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                margin=dict(l=0, r=0, t=0, b=0)
+            )
+        
+            st.plotly_chart(fig_response, use_container_width=True)
 
 # Call the dashboard page function
 dashboard_page()
\ No newline at end of file
@@ -6,6 +6,35 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from src.cards import card_section
+from src.collector import get_collector
+from src.host import format_bytes
+
+# =====GAUGES=====
+def gauge(value, title, axis_max, color, steps):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = value,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': title},
+        gauge = {
+            'axis': {'range': [None, axis_max]},
+            'bar': {'color': color},
+            'steps': steps
+        }
+    ))
+    fig.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20))
+    return fig
+
+def latest(host, column):
+    """Last sampled value and its change over the last minute"""
+    values = host[column].dropna()
+    if values.empty:
+        return None, None
+    minute_ago = host['timestamp'].iloc[-1] - pd.Timedelta(minutes=1)
+    older = values[host.loc[values.index, 'timestamp'] <= minute_ago]
+    return values.iloc[-1], (values.iloc[-1] - older.iloc[-1]) if not older.empty else None
+
 # =====PERIPHERALS PAGE=====
 def peripherals_page():
     # Header
@@ -15,178 +44,126 @@ def peripherals_page():
         <div class='header-subtitle'>System Components & Hardware Status</div>
     </div>
     """, unsafe_allow_html=True)
-    
+
+    # Rates sampled every second from /proc and /sys by the collector; the
+    # hour of history comes from shared memory when the collector process
+    # publishes it
+    collector = get_collector()
+    host = collector.read_frame("host")
+    info = collector.read("host_info") or {}
+
     # System Overview Row
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("💻 System Status")
-        
-        # Mock system data
-        system_data = {
-            "CPU Usage": 65,
-            "Memory Usage": 78,
-            "Disk Usage": 45,
-            "Network": 23
-        }
-        
-        for metric, value in system_data.items():
-            delta_value = np.random.randint(-5, 10)
-            delta_color = "normal" if delta_value >= 0 else "inverse"
-            st.metric(metric, f"{value}%", f"{delta_value}%", delta_color=delta_color)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+        with card_section("💻 System Status"):
+            for metric, column in (("CPU Usage", 'cpu'), ("Memory Usage", 'memory')):
+                value, delta = latest(host, column)
+                st.metric(metric, f"{value:.0f}%" if value is not None else "n/a",
+                          f"{delta:+.1f}%" if delta is not None else None, delta_color="inverse")
+
+            root = next((fs for fs in info.get('filesystems', []) if fs['mount'] == "/"), None)
+            st.metric("Disk Usage", f"{root['used'] / root['total'] * 100:.0f}%" if root else "n/a")
+            rx, _ = latest(host, 'net_rx')
+            tx, _ = latest(host, 'net_tx')
+            st.metric("Network", f"↓ {format_bytes(rx, 'B/s')}  ↑ {format_bytes(tx, 'B/s')}")
+
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("🌡️ Temperature Monitoring")
-        
-        # Temperature gauge
-        temp_fig = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = 67,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "CPU Temperature (°C)"},
-            gauge = {
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#ff7f0e"},
-                'steps': [
+        with card_section("🌡️ Temperature Monitoring"):
+            temperature, _ = latest(host, 'temperature')
+            if temperature is None:
+                st.info("No thermal zones are exposed on this host")
+            else:
+                st.plotly_chart(gauge(temperature, "CPU Temperature (°C)", 100, "#ff7f0e", [
                     {'range': [0, 60], 'color': "lightgreen"},
                     {'range': [60, 80], 'color': "yellow"},
                     {'range': [80, 100], 'color': "red"}
-                ]
-            }
-        ))
-        
-        temp_fig.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20))
-        st.plotly_chart(temp_fig, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+                ]), use_container_width=True)
+
     with col3:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("⚡ Power Consumption")
-        
-        # Power gauge
-        power_fig = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = 145,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Power Usage (W)"},
-            gauge = {
-                'axis': {'range': [None, 300]},
-                'bar': {'color': "#2ca02c"},
-                'steps': [
+        with card_section("⚡ Power Consumption"):
+            power, _ = latest(host, 'power')
+            if power is None:
+                st.info("No readable RAPL power counters on this host")
+            else:
+                st.plotly_chart(gauge(power, "Power Usage (W)", 300, "#2ca02c", [
                     {'range': [0, 150], 'color': "lightgreen"},
                     {'range': [150, 250], 'color': "yellow"},
                     {'range': [250, 300], 'color': "red"}
-                ]
-            }
-        ))
-        
-        power_fig.update_layout(height=300, margin=dict(l=20, r=20, t=40, b=20))
-        st.plotly_chart(power_fig, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+                ]), use_container_width=True)
+
     # Hardware Details
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("🖥️ Hardware Information")
-        
-        hardware_info = {
-            "Processor": "Intel Core i7-12700K",
-            "Memory": "32 GB DDR4-3200",
-            "Storage": "1TB NVMe SSD",
-            "Graphics": "NVIDIA RTX 4070",
-            "Motherboard": "ASUS ROG Strix Z690",
-            "OS": "Windows 11 Pro"
-        }
-        
-        for component, spec in hardware_info.items():
-            st.text(f"**{component}:** {spec}")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+        with card_section("🖥️ Hardware Information"):
+            hardware_info = {
+                "Processor": f"{info['processor']} ({info['cores']} cores)" if info else None,
+                "Memory": format_bytes(info.get('memory')) if info.get('memory') else None,
+                "Storage": format_bytes(info.get('storage')) if info.get('storage') else None,
+                "Motherboard": info.get('board'),
+                "OS": info.get('os'),
+                "Kernel": info.get('kernel'),
+                "Uptime": f"{info['uptime_hours'] // 24:.0f}d {info['uptime_hours'] % 24:.0f}h" if info.get('uptime_hours') else None,
+            }
+
+            for component, spec in hardware_info.items():
+                if spec:
+                    st.text(f"**{component}:** {spec}")
+
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("📊 Performance History")
-        
-        # Generate sample performance data
-        np.random.seed(42)
-        dates = pd.date_range(start=datetime.now() - timedelta(days=7), end=datetime.now(), freq='H')
-        perf_data = pd.DataFrame({
-            'CPU': np.random.normal(65, 15, len(dates)).clip(0, 100),
-            'Memory': np.random.normal(70, 10, len(dates)).clip(0, 100),
-            'Disk': np.random.normal(40, 20, len(dates)).clip(0, 100)
-        }, index=dates)
-        
-        fig_perf = px.line(
-            perf_data.reset_index(), 
-            x='index', 
-            y=['CPU', 'Memory', 'Disk'],
-            title="System Performance (Last 7 Days)",
-            labels={'index': 'Time', 'value': 'Usage (%)', 'variable': 'Component'}
-        )
-        fig_perf.update_layout(height=350)
-        st.plotly_chart(fig_perf, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+        with card_section("📊 Performance History"):
+            fig_perf = px.line(
+                host,
+                x='timestamp',
+                y=['cpu', 'memory'],
+                title="System Performance (Last Hour)",
+                labels={'timestamp': 'Time', 'value': 'Usage (%)', 'variable': 'Component'}
+            )
+            fig_perf.update_layout(height=350, yaxis=dict(range=[0, 100]))
+            st.plotly_chart(fig_perf, use_container_width=True)
+
     # Network and Storage Details
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("🌐 Network Status")
-        
-        network_data = {
-            "Interface": "Ethernet",
-            "Speed": "1 Gbps",
-            "Status": "Connected",
-            "IP Address": "192.168.1.100",
-            "Download": "45.2 Mbps",
-            "Upload": "12.8 Mbps",
-            "Latency": "15 ms"
-        }
-        
-        for item, value in network_data.items():
-            if item == "Status" and value == "Connected":
-                st.success(f"**{item}:** {value}")
-            else:
-                st.text(f"**{item}:** {value}")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-    
+        with card_section("🌐 Network Status"):
+            for interface in info.get('interfaces', []):
+                speed = f"{interface['speed_mbps']:,} Mbps" if interface['speed_mbps'] else "speed unknown"
+                if interface['state'] == "up":
+                    st.success(f"**{interface['interface']}:** Connected, {speed}")
+                else:
+                    st.text(f"**{interface['interface']}:** {interface['state'].title()}")
+
+            st.text(f"**Download:** {format_bytes(rx, 'B/s')}")
+            st.text(f"**Upload:** {format_bytes(tx, 'B/s')}")
+            read, _ = latest(host, 'disk_read')
+            write, _ = latest(host, 'disk_write')
+            st.text(f"**Disk I/O:** {format_bytes(read, 'B/s')} read, {format_bytes(write, 'B/s')} written")
+
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("💾 Storage Details")
-        
-        # Storage usage chart
-        storage_data = pd.DataFrame({
-            'Drive': ['C: System', 'D: Data', 'E: Backup'],
-            'Used': [450, 750, 200],
-            'Total': [1000, 2000, 1000]
-        })
-        storage_data['Free'] = storage_data['Total'] - storage_data['Used']
-        storage_data['Usage %'] = (storage_data['Used'] / storage_data['Total'] * 100).round(1)
-        
-        fig_storage = px.bar(
-            storage_data, 
-            x='Drive', 
-            y=['Used', 'Free'],
-            title="Storage Usage (GB)",
-            color_discrete_map={'Used': '#ff7f0e', 'Free': '#2ca02c'}
-        )
-        fig_storage.update_layout(height=300)
-        st.plotly_chart(fig_storage, use_container_width=True)
-        
-        # Display usage percentages
-        for _, row in storage_data.iterrows():
-            usage_color = "🔴" if row['Usage %'] > 80 else "🟡" if row['Usage %'] > 60 else "🟢"
-            st.text(f"{usage_color} {row['Drive']}: {row['Usage %']}% used")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("💾 Storage Details"):
+            # Storage usage chart
+            storage_data = pd.DataFrame(info.get('filesystems', []), columns=['mount', 'device', 'total', 'used'])
+            storage_data['Drive'] = storage_data['mount']
+            storage_data['Used'] = (storage_data['used'] / 1024 ** 3).round(1)
+            storage_data['Free'] = ((storage_data['total'] - storage_data['used']) / 1024 ** 3).round(1)
+            storage_data['Usage %'] = (storage_data['used'] / storage_data['total'] * 100).round(1)
+
+            fig_storage = px.bar(
+                storage_data,
+                x='Drive',
+                y=['Used', 'Free'],
+                title="Storage Usage (GB)",
+                color_discrete_map={'Used': '#ff7f0e', 'Free': '#2ca02c'}
+            )
+            fig_storage.update_layout(height=300)
+            st.plotly_chart(fig_storage, use_container_width=True)
+
+            # Display usage percentages
+            for _, row in storage_data.iterrows():
+                usage_color = "🔴" if row['Usage %'] > 80 else "🟡" if row['Usage %'] > 60 else "🟢"
+                st.text(f"{usage_color} {row['Drive']}: {row['Usage %']}% used")
 
 # Call the peripherals page function
-peripherals_page()
\ No newline at end of file
+peripherals_page()
@@ -5,63 +5,17 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 
-# =====LOG DATA GENERATION=====
-@st.cache_data
-def generate_log_data():
-    np.random.seed(42)
-    
-    # Generate server logs for the last 24 hours
-    log_levels = ['INFO', 'WARN', 'ERROR', 'DEBUG']
-    log_sources = ['gleam_server', 'nginx', 'postgres', 'redis', 'system']
-    
-    # Generate timestamps
-    base_time = datetime.now() - timedelta(hours=24)
-    log_times = []
-    for i in range(500):  # 500 log entries
-        log_times.append(base_time + timedelta(seconds=np.random.exponential(172.8)))  # ~500 logs per day
-    
-    logs_data = []
-    for timestamp in sorted(log_times):
-        level = np.random.choice(log_levels, p=[0.7, 0.2, 0.05, 0.05])
-        source = np.random.choice(log_sources, p=[0.4, 0.25, 0.15, 0.1, 0.1])
-        
-        # Generate realistic log messages based on source and level
-        messages = {
-            'gleam_server': {
-                'INFO': ['Request processed successfully', 'Connection established', 'Cache hit', 'User authenticated'],
-                'WARN': ['High memory usage detected', 'Slow query detected', 'Connection timeout'],
-                'ERROR': ['Database connection failed', 'Authentication failed', 'Internal server error'],
-                'DEBUG': ['Function entered', 'Variable state', 'Debug checkpoint']
-            },
-            'nginx': {
-                'INFO': ['GET /api/health 200', 'POST /api/users 201', 'Static file served'],
-                'WARN': ['Rate limit approaching', '404 error for unknown route'],
-                'ERROR': ['Upstream server unreachable', '502 Bad Gateway'],
-                'DEBUG': ['Request headers logged', 'Routing decision made']
-            },
-            'postgres': {
-                'INFO': ['Query executed successfully', 'Connection opened', 'Checkpoint completed'],
-                'WARN': ['Lock wait timeout', 'Table scan detected'],
-                'ERROR': ['Connection limit reached', 'Disk space low'],
-                'DEBUG': ['Query plan generated', 'Index usage statistics']
-            }
-        }
-        
-        if source in messages and level in messages[source]:
-            message = np.random.choice(messages[source][level])
-        else:
-            message = f"{level} message from {source}"
-        
-        logs_data.append({
-            'timestamp': timestamp,
-            'level': level,
-            'source': source,
-            'message': message,
-            'ip': f"192.168.1.{np.random.randint(1, 255)}",
-            'user_id': np.random.randint(1000, 9999) if np.random.random() > 0.3 else None
-        })
-    
-    return pd.DataFrame(logs_data)
+from src.cards import MetricCard, card_grid, card_section
+from src.collector import get_collector
+from src.logquery import QueryError
+from src.logstore import LEVEL_ICONS, page
+from src.sources import LOG_LEVELS, LOG_SOURCES
+from src.views import TIME_RANGES, SavedView, filter_plan, since
+
+# =====LOG COUNTS=====
+def count_codes(codes, labels):
+    counts = pd.Series(np.bincount(codes, minlength=len(labels)), index=labels)
+    return counts[counts > 0].sort_values(ascending=False)
 
 # =====LOG ANALYSIS PAGE=====
 def reports_page():
@@ -73,229 +27,265 @@ def reports_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # Generate log data
-    logs_df = generate_log_data()
+    # Get log data
+    collector = get_collector()
+    logs_df = collector.read("logs")
+    
+    # Level/source counts come straight from the shared log index when the
+    # collector process publishes one
+    log_index = collector.read_arrays("logs")
+    if log_index is not None:
+        level_counts = count_codes(log_index['level'], LOG_LEVELS)
+        source_counts = count_codes(log_index['source'], LOG_SOURCES)
+        error_by_source = count_codes(log_index['source'][log_index['level'] == LOG_LEVELS.index('ERROR')], LOG_SOURCES)
+    else:
+        level_counts = logs_df['level'].value_counts()
+        source_counts = logs_df['source'].value_counts()
+        error_by_source = logs_df.loc[logs_df['level'] == 'ERROR', 'source'].value_counts()
     
     # Log level statistics
-    level_counts = logs_df['level'].value_counts()
     error_count = level_counts.get('ERROR', 0)
     warn_count = level_counts.get('WARN', 0)
     info_count = level_counts.get('INFO', 0)
-    total_logs = len(logs_df)
+    total_logs = int(level_counts.sum())
     
     # Log Summary Row
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card' style='background: linear-gradient(135deg, #28a745 0%, #20c997 100%);'>
-            <div class='metric-label'>Total Logs (24h)</div>
-            <div class='metric-value'>{total_logs}</div>
-            <div class='metric-label'>📋 Entries</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        error_rate = (error_count / total_logs * 100) if total_logs > 0 else 0
-        error_color = "#dc3545" if error_rate > 5 else "#ffc107" if error_rate > 2 else "#28a745"
-        st.markdown(f"""
-        <div class='metric-card' style='background: linear-gradient(135deg, {error_color} 0%, {error_color}aa 100%);'>
-            <div class='metric-label'>Errors</div>
-            <div class='metric-value'>{error_count}</div>
-            <div class='metric-label'>{error_rate:.1f}% rate</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class='metric-card' style='background: linear-gradient(135deg, #ffc107 0%, #fd7e14 100%);'>
-            <div class='metric-label'>Warnings</div>
-            <div class='metric-value'>{warn_count}</div>
-            <div class='metric-label'>⚠️ Issues</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        unique_sources = logs_df['source'].nunique()
-        st.markdown(f"""
-        <div class='metric-card' style='background: linear-gradient(135deg, #007bff 0%, #6610f2 100%);'>
-            <div class='metric-label'>Active Sources</div>
-            <div class='metric-value'>{unique_sources}</div>
-            <div class='metric-label'>🔧 Services</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
+    error_rate = (error_count / total_logs * 100) if total_logs > 0 else 0
+    error_color = "#dc3545" if error_rate > 5 else "#ffc107" if error_rate > 2 else "#28a745"
+    card_grid([
+        MetricCard("Total Logs (24h)", f"{total_logs}", "📋 Entries",
+                   style="background: linear-gradient(135deg, #28a745 0%, #20c997 100%);", footer="metric-label"),
+        MetricCard("Errors", f"{error_count}", f"{error_rate:.1f}% rate",
+                   style=f"background: linear-gradient(135deg, {error_color} 0%, {error_color}aa 100%);", footer="metric-label"),
+        MetricCard("Warnings", f"{warn_count}", "⚠️ Issues",
+                   style="background: linear-gradient(135deg, #ffc107 0%, #fd7e14 100%);", footer="metric-label"),
+        MetricCard("Active Sources", f"{len(source_counts)}", "🔧 Services",
+                   style="background: linear-gradient(135deg, #007bff 0%, #6610f2 100%);", footer="metric-label"),
+    ])
     
     # Log Filters and Search
-    st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-    st.subheader("🔍 Log Filters")
+    with card_section("🔍 Log Filters"):
+        # Saved views: picking one loads its filters into the widgets below
+        saved_views = collector.read("saved_views") or []
+        view_results = collector.read("views") or {}
     
-    col1, col2, col3, col4 = st.columns(4)
+        def load_view():
+            view = SavedView(*next(v for v in saved_views if v[0] == st.session_state["log_view"]))
+            st.session_state.update(log_level=view.level, log_source=view.source,
+                                    log_time=view.time_range, log_query=view.query)
     
-    with col1:
-        selected_level = st.selectbox("Log Level", ["All"] + list(logs_df['level'].unique()))
+        col1, col2 = st.columns(2)
     
-    with col2:
-        selected_source = st.selectbox("Source", ["All"] + list(logs_df['source'].unique()))
+        with col1:
+            view_names = [v[0] for v in saved_views]
+            if view_names:
+                st.selectbox("Saved View", view_names, index=None, placeholder="Open a saved view...",
+                             key="log_view", on_change=load_view)
     
-    with col3:
-        time_filter = st.selectbox("Time Range", ["Last Hour", "Last 6 Hours", "Last 24 Hours"])
+        with col2:
+            view_name = st.text_input("View Name", placeholder="Name these filters to save them...")
     
-    with col4:
-        search_term = st.text_input("Search in logs", placeholder="Enter search term...")
+        col1, col2, col3, col4 = st.columns(4)
     
-    # Apply filters
-    filtered_logs = logs_df.copy()
+        with col1:
+            selected_level = st.selectbox("Log Level", ["All"] + LOG_LEVELS, key="log_level")
     
-    if selected_level != "All":
-        filtered_logs = filtered_logs[filtered_logs['level'] == selected_level]
+        with col2:
+            selected_source = st.selectbox("Source", ["All"] + LOG_SOURCES, key="log_source")
+    
+        with col3:
+            time_filter = st.selectbox("Time Range", list(TIME_RANGES), key="log_time")
     
-    if selected_source != "All":
-        filtered_logs = filtered_logs[filtered_logs['source'] == selected_source]
+        with col4:
+            search_term = st.text_input("Search in logs", placeholder='level:ERROR source:postgres "connection failed"', key="log_query",
+                                        help='Terms are ANDed. Fields: level, source, ip (address or CIDR), message. '
+                                             'Bare words and "phrases" search messages, /regex/ matches them, and a leading - negates a term.')
     
-    if search_term:
-        filtered_logs = filtered_logs[filtered_logs['message'].str.contains(search_term, case=False, na=False)]
+        filters = (selected_level, selected_source, search_term, time_filter)
     
-    # Time range filter
-    now = datetime.now()
-    if time_filter == "Last Hour":
-        time_threshold = now - timedelta(hours=1)
-    elif time_filter == "Last 6 Hours":
-        time_threshold = now - timedelta(hours=6)
-    else:
-        time_threshold = now - timedelta(hours=24)
+        col1, col2, col3 = st.columns([1, 1, 3])
     
-    filtered_logs = filtered_logs[filtered_logs['timestamp'] >= time_threshold]
+        with col1:
+            if st.button("💾 Save View", disabled=not view_name):
+                views = [v for v in saved_views if v[0] != view_name] + [tuple(SavedView(view_name, *filters))]
+                collector.publish("saved_views", views)
+                st.success(f"Saved view '{view_name}'")
     
-    st.markdown("</div>", unsafe_allow_html=True)
+        with col2:
+            open_view = st.session_state.get("log_view")
+            if st.button("🗑️ Delete View", disabled=open_view is None):
+                collector.publish("saved_views", [v for v in saved_views if v[0] != open_view])
+                st.session_state.pop("log_view", None)
+                st.rerun()
+    
+        # Apply filters against the log store
+        log_table = collector.read("log_store")
+        time_threshold = since(time_filter)
+    
+        # A saved view with these filters is kept up to date by the collector;
+        # otherwise resolve the time window first (binary search), then the
+        # query's predicates in order of selectivity over that slice
+        materialized = next((r for r in view_results.values() if r.view.filters() == filters and r.error is None), None)
+        log_plan = None
+        if materialized is not None:
+            matches = materialized.positions(log_table, time_threshold)
+            with col3:
+                st.caption(f"⚡ Served from saved view '{materialized.view.name}'")
+        else:
+            try:
+                log_plan = filter_plan(log_table, *filters)
+                matches = log_plan.execute()
+            except QueryError as e:
+                st.error(f"Invalid query: {e}")
+                matches = np.empty(0, dtype=np.int64)
+    
+        if log_plan is not None and (search_term or selected_level != "All" or selected_source != "All"):
+            with st.expander("Query plan"):
+                st.dataframe(
+                    pd.DataFrame(log_plan.explain()).rename(columns={
+                        'label': "Step", 'estimate': "Est. selectivity", 'rows_in': "Rows in",
+                        'rows_out': "Rows out", 'ms': "Time (ms)",
+                    }),
+                    column_config={
+                        "Est. selectivity": st.column_config.NumberColumn(format="%.3f"),
+                        "Time (ms)": st.column_config.NumberColumn(format="%.2f"),
+                    },
+                    hide_index=True,
+                    use_container_width=True,
+                )
     
     # Log Analysis Charts
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("📊 Log Distribution by Level")
-        
-        import plotly.express as px
-        level_chart = px.pie(
-            values=level_counts.values,
-            names=level_counts.index,
-            color_discrete_map={
-                'INFO': '#28a745',
-                'WARN': '#ffc107', 
-                'ERROR': '#dc3545',
-                'DEBUG': '#6c757d'
-            }
-        )
-        level_chart.update_layout(height=300)
-        st.plotly_chart(level_chart, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("📊 Log Distribution by Level"):
+            import plotly.express as px
+            level_chart = px.pie(
+                values=level_counts.values,
+                names=level_counts.index,
+                color_discrete_map={
+                    'INFO': '#28a745',
+                    'WARN': '#ffc107', 
+                    'ERROR': '#dc3545',
+                    'DEBUG': '#6c757d'
+                }
+            )
+            level_chart.update_layout(height=300)
+            st.plotly_chart(level_chart, use_container_width=True)
     
     with col2:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("🔧 Logs by Source")
-        
-        source_counts = logs_df['source'].value_counts()
-        source_chart = px.bar(
-            x=source_counts.index,
-            y=source_counts.values,
-            color=source_counts.values,
-            color_continuous_scale='Blues'
-        )
-        source_chart.update_layout(
-            height=300,
-            xaxis_title="Source",
-            yaxis_title="Log Count",
-            showlegend=False
-        )
-        st.plotly_chart(source_chart, use_container_width=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+        with card_section("🔧 Logs by Source"):
+            source_chart = px.bar(
+                x=source_counts.index,
+                y=source_counts.values,
+                color=source_counts.values,
+                color_continuous_scale='Blues'
+            )
+            source_chart.update_layout(
+                height=300,
+                xaxis_title="Source",
+                yaxis_title="Log Count",
+                showlegend=False
+            )
+            st.plotly_chart(source_chart, use_container_width=True)
     
     # Recent Logs Table
-    st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-    st.subheader("📋 Recent Log Entries")
-    
-    # Display recent logs
-    display_logs = filtered_logs.tail(50).sort_values('timestamp', ascending=False)
-    
-    # Format the logs for display
-    display_logs['time'] = display_logs['timestamp'].dt.strftime('%H:%M:%S')
-    display_logs['level_icon'] = display_logs['level'].map({
-        'ERROR': '🔴',
-        'WARN': '🟡', 
-        'INFO': '🟢',
-        'DEBUG': '🔵'
-    })
-    
-    # Show logs in a clean format
-    for _, log in display_logs.head(20).iterrows():
-        col1, col2, col3, col4 = st.columns([1, 1, 2, 6])
-        
+    with card_section("📋 Recent Log Entries"):
+        # Only one page of rows is sent to the browser; the cursor in session
+        # state pins the newest row shown, or follows new logs when unset
+        page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="log_page_size")
+        log_page = page(log_table, matches, st.session_state.get("log_anchor"), page_size)
+    
+        display_logs = log_page.rows
+        display_logs['time'] = display_logs['timestamp'].dt.strftime('%H:%M:%S')
+        display_logs['level'] = display_logs['level'].map(LEVEL_ICONS) + " " + display_logs['level']
+    
+        st.dataframe(
+            display_logs[['time', 'level', 'source', 'message']],
+            column_config={
+                'time': "Time",
+                'level': "Level",
+                'source': "Source",
+                'message': st.column_config.TextColumn("Message", width="large"),
+            },
+            hide_index=True,
+            use_container_width=True,
+        )
+    
+        def set_anchor(anchor):
+            st.session_state["log_anchor"] = anchor
+    
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 3])
+    
         with col1:
-            st.text(log['time'])
+            st.button("⏮ Newest", on_click=set_anchor, args=(None,), disabled=log_page.offset == 0)
         with col2:
-            st.text(f"{log['level_icon']} {log['level']}")
+            st.button("◀ Newer", on_click=set_anchor, args=(log_page.newer,), disabled=log_page.newer is None)
         with col3:
-            st.text(log['source'])
+            st.button("Older ▶", on_click=set_anchor, args=(log_page.older,), disabled=log_page.older is None)
         with col4:
-            st.text(log['message'])
-    
-    if len(display_logs) > 20:
-        st.info(f"Showing 20 of {len(display_logs)} filtered logs")
-    
-    st.markdown("</div>", unsafe_allow_html=True)
+            if log_page.total:
+                st.caption(f"Showing {log_page.offset + 1:,}–{log_page.offset + len(display_logs):,} of {log_page.total:,} filtered logs")
+            else:
+                st.caption("No logs match the current filters")
     
     # Error Analysis
     if error_count > 0:
-        st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-        st.subheader("🚨 Error Analysis")
+        with card_section("🚨 Error Analysis"):
+            col1, col2 = st.columns([1, 2])
         
-        error_logs = logs_df[logs_df['level'] == 'ERROR']
-        error_by_source = error_logs['source'].value_counts()
+            with col1:
+                st.markdown("**Errors by Source:**")
+                for source, count in error_by_source.items():
+                    st.text(f"🔴 {source}: {count} errors")
         
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("**Errors by Source:**")
-            for source, count in error_by_source.items():
-                st.text(f"🔴 {source}: {count} errors")
+            with col2:
+                st.markdown("**Top Error Templates:**")
+                templates = [t for t in collector.read("templates") or [] if t.levels.get('ERROR')]
+                templates.sort(key=lambda t: t.levels['ERROR'], reverse=True)
+                if templates:
+                    st.dataframe(
+                        pd.DataFrame({
+                            'Template': [t.template for t in templates[:10]],
+                            'Errors': [t.levels['ERROR'] for t in templates[:10]],
+                            'Last 24h': [t.trend for t in templates[:10]],
+                            'Last Seen': pd.to_datetime([t.last_seen for t in templates[:10]], unit='s'),
+                        }),
+                        column_config={
+                            'Last 24h': st.column_config.LineChartColumn("Last 24h", y_min=0),
+                            'Last Seen': st.column_config.DatetimeColumn("Last Seen", format="HH:mm"),
+                        },
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+                else:
+                    st.info("Error templates are still being mined")
         
-        with col2:
-            st.markdown("**Recent Errors:**")
-            recent_errors = error_logs.tail(5)
-            for _, error in recent_errors.iterrows():
-                st.text(f"⚠️ {error['timestamp'].strftime('%H:%M')} - {error['message']}")
-        
-        st.markdown("</div>", unsafe_allow_html=True)
-    
     # Export Options
-    st.markdown("<div class='dashboard-card'>", unsafe_allow_html=True)
-    st.subheader("📤 Export Logs")
-    
-    col1, col2, col3 = st.columns(3)
+    with card_section("📤 Export Logs"):
+        col1, col2, col3 = st.columns(3)
     
-    with col1:
-        if st.button("📥 Download Filtered Logs"):
-            csv_data = filtered_logs.to_csv(index=False)
-            st.download_button(
-                label="💾 Save as CSV",
-                data=csv_data,
-                file_name=f"server_logs_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                mime="text/csv"
-            )
+        with col1:
+            if st.button("📥 Download Filtered Logs"):
+                csv_data = log_table.frame(matches).to_csv(index=False)
+                st.download_button(
+                    label="💾 Save as CSV",
+                    data=csv_data,
+                    file_name=f"server_logs_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                    mime="text/csv"
+                )
     
-    with col2:
-        if st.button("📧 Email Error Report"):
-            st.info("Error report will be emailed to administrators")
+        with col2:
+            if st.button("📧 Email Error Report"):
+                st.info("Error report will be emailed to administrators")
     
-    with col3:
-        if st.button("🔄 Refresh Logs"):
-            st.cache_data.clear()
-            st.success("Logs refreshed!")
-            st.rerun()
+        with col3:
+            if st.button("🔄 Refresh Logs"):
+                if get_collector().refresh("logs"):
+                    st.success("Logs refreshed!")
+                    st.rerun()
+                else:
+                    st.info("Refresh requested; the collector is busy and logs will update shortly")
     
-    st.markdown("</div>", unsafe_allow_html=True)
-
 # Call the reports page function
 reports_page()
\ No newline at end of file
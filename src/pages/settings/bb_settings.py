@@ -3,6 +3,9 @@ import streamlit as st
 import json
 from datetime import datetime
 
+from src.alerts import DEFAULT_SETTINGS
+from src.collector import get_collector
+
 # =====SETTINGS PAGE=====
 def settings_page():
     # Header
@@ -13,6 +16,10 @@ def settings_page():
     </div>
     """, unsafe_allow_html=True)
     
+    # Alert settings are shared with the collector's alert engine
+    collector = get_collector()
+    alert_settings = {**DEFAULT_SETTINGS, **(collector.read("settings") or {})}
+    
     # Create tabs for different settings categories
     tab1, tab2, tab3, tab4 = st.tabs(["🎨 Appearance", "📊 Data", "🔔 Notifications", "👤 Account"])
     
@@ -87,12 +94,14 @@ def settings_page():
         st.markdown("**Alert Thresholds**")
         col1, col2 = st.columns(2)
         with col1:
-            cpu_threshold = st.slider("CPU Usage Alert (%)", 0, 100, 80)
-            memory_threshold = st.slider("Memory Usage Alert (%)", 0, 100, 85)
+            cpu_threshold = st.slider("CPU Usage Alert (%)", 0, 100, alert_settings['cpu_threshold'])
+            memory_threshold = st.slider("Memory Usage Alert (%)", 0, 100, alert_settings['memory_threshold'])
+            alert_hysteresis = st.slider("Clear Alerts Below Threshold By", 0, 20, alert_settings['alert_hysteresis'])
             
         with col2:
-            disk_threshold = st.slider("Disk Usage Alert (%)", 0, 100, 90)
-            temp_threshold = st.slider("Temperature Alert (°C)", 0, 100, 75)
+            disk_threshold = st.slider("Disk Usage Alert (%)", 0, 100, alert_settings['disk_threshold'])
+            temp_threshold = st.slider("Temperature Alert (°C)", 0, 100, alert_settings['temp_threshold'])
+            alert_sustain_minutes = st.slider("Alert After Sustained (minutes)", 0, 60, alert_settings['alert_sustain_minutes'])
         
         st.markdown("**Email Settings**")
         email_address = st.text_input("Email Address", placeholder="your-email@example.com")
@@ -139,6 +148,15 @@ def settings_page():
     
     with col1:
         if st.button("💾 Save Settings", type="primary"):
+            collector.publish("settings", {
+                **alert_settings,
+                "cpu_threshold": cpu_threshold,
+                "memory_threshold": memory_threshold,
+                "disk_threshold": disk_threshold,
+                "temp_threshold": temp_threshold,
+                "alert_hysteresis": alert_hysteresis,
+                "alert_sustain_minutes": alert_sustain_minutes,
+            })
             st.success("✅ Settings saved successfully!")
             st.balloons()
     
@@ -0,0 +1,209 @@
+# src/probes.py - Service Health Probes
+#
+# Probes run concurrently on an asyncio loop on their own thread, each under
+# its own timeout; the collector waits only briefly for a round, and pages
+# only read the last published results. A probe that
+# keeps failing is circuit-broken: it is skipped until its back-off expires,
+# then tried once before it is probed normally again.
+import asyncio
+import json
+import os
+import ssl
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+# JSON list of [name, kind, target] (or [name, kind, target, timeout]) to
+# replace DEFAULT_PROBES; kind is http, tcp, sql or unix
+PROBES_ENV = "BLUEBRIE_PROBES"
+
+KINDS = ("http", "tcp", "sql", "unix")
+
+# Blocking checks get their own small pool, so a hung database driver ties
+# up one of these threads and never the probe loop
+_THREADS = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bluebrie-probe")
+
+class ProbeResult(NamedTuple):
+    name: str
+    kind: str
+    ok: bool
+    latency_ms: float | None
+    detail: str
+    checked_at: float
+    circuit: str            # closed, open or half-open
+    retry_at: float | None  # when an open circuit is tried again
+
+@dataclass
+class Probe:
+    name: str
+    kind: str
+    target: str             # URL, host:port, connection name or socket path
+    timeout: float = 2.0
+    _blocking: Future | None = field(default=None, repr=False, compare=False)
+
+    def busy(self) -> bool:
+        """A timed-out SQL check still holds its thread"""
+        return self._blocking is not None and not self._blocking.done()
+
+    async def check(self) -> str:
+        """Returns a short detail on success, raises on failure"""
+        if self.kind == "http":
+            return await _http(self.target)
+        if self.kind == "tcp":
+            host, _, port = self.target.rpartition(":")
+            _, writer = await asyncio.open_connection(host, int(port))
+            await _close(writer)
+            return "connected"
+        if self.kind == "unix":
+            _, writer = await asyncio.open_unix_connection(self.target)
+            await _close(writer)
+            return "connected"
+        if self.kind == "sql":
+            # The database driver blocks, so SELECT 1 runs on a worker thread
+            self._blocking = _THREADS.submit(_select_one, self.target)
+            await asyncio.wrap_future(self._blocking)
+            return "SELECT 1"
+        raise ValueError(f"unknown probe kind '{self.kind}' (expected one of {', '.join(KINDS)})")
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+async def _http(url: str) -> str:
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=ssl.create_default_context() if secure else None)
+    try:
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\nUser-Agent: bluebrie-probe\r\n\r\n".encode())
+        await writer.drain()
+        status_line = (await reader.readline()).decode(errors="replace").split()
+    finally:
+        await _close(writer)
+    if len(status_line) < 2 or not status_line[1].isdigit():
+        raise ConnectionError("malformed HTTP response")
+    status = int(status_line[1])
+    if status >= 400:
+        raise ConnectionError(f"HTTP {status}")
+    return f"HTTP {status}"
+
+def _select_one(name: str) -> None:
+    # Same connection LentilConnection opens as db_conn
+    import streamlit as st
+    st.connection(name, type="sql").query("SELECT 1", ttl=0)
+
+# =====CIRCUIT BREAKER=====
+@dataclass
+class CircuitBreaker:
+    """Opens after `failures` failures in a row; the back-off doubles on
+    every failed trial, up to `max_backoff` seconds"""
+    failures: int = 3
+    backoff: float = 30.0
+    max_backoff: float = 600.0
+    failed: int = 0
+    opened_for: float = 0.0
+    retry_at: float | None = None
+
+    def state(self, now: float) -> str:
+        if self.retry_at is None:
+            return "closed"
+        return "half-open" if now >= self.retry_at else "open"
+
+    def record(self, ok: bool, now: float) -> None:
+        if ok:
+            self.failed, self.opened_for, self.retry_at = 0, 0.0, None
+            return
+        self.failed += 1
+        if self.retry_at is not None or self.failed >= self.failures:
+            self.opened_for = min(self.opened_for * 2 or self.backoff, self.max_backoff)
+            self.retry_at = now + self.opened_for
+
+# =====ENGINE=====
+class ProbeEngine:
+    """Checks every probe whose circuit allows it, all at once"""
+
+    def __init__(self, probes: list[Probe], wait: float = 0.25):
+        self.probes = probes
+        self.wait = wait
+        self.breakers = {probe.name: CircuitBreaker() for probe in probes}
+        self.results: dict[str, ProbeResult] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._round: Future | None = None
+
+    def _start_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="bluebrie-probes", daemon=True).start()
+        return loop
+
+    async def _run(self, probe: Probe) -> ProbeResult:
+        started = time.perf_counter()
+        ok, latency = False, None
+        try:
+            detail = await asyncio.wait_for(probe.check(), probe.timeout)
+            ok, latency = True, (time.perf_counter() - started) * 1000
+        except asyncio.TimeoutError:
+            detail = f"timed out after {probe.timeout:g}s"
+        except Exception as e:
+            detail = str(e) or type(e).__name__
+        now = time.time()
+        breaker = self.breakers[probe.name]
+        breaker.record(ok, now)
+        return ProbeResult(probe.name, probe.kind, ok, latency, detail, now, breaker.state(now), breaker.retry_at)
+
+    async def _check_all(self) -> list[ProbeResult]:
+        now = time.time()
+        due = [self._run(probe) for probe in self.probes
+               if self.breakers[probe.name].state(now) != "open" and not probe.busy()]
+        return await asyncio.gather(*due)
+
+    def check(self) -> dict[str, ProbeResult]:
+        """Start a round of probes and return the latest result of every
+        probe. Waits at most `wait` seconds: a round still running then (a
+        probe heading for its timeout) is picked up by the next call. Probes
+        behind an open circuit keep their last result"""
+        if self._round is None:
+            if self._loop is None:
+                self._loop = self._start_loop()
+            self._round = asyncio.run_coroutine_threadsafe(self._check_all(), self._loop)
+        try:
+            results = self._round.result(self.wait)
+        except TimeoutError:
+            results = []
+        else:
+            self._round = None
+        for result in results:
+            self.results[result.name] = result
+        now = time.time()
+        for name, result in self.results.items():
+            self.results[name] = result._replace(circuit=self.breakers[name].state(now))
+        return dict(self.results)
+
+# =====CONFIGURATION=====
+DEFAULT_PROBES = [
+    Probe("HTTP Server", "http", "http://127.0.0.1:80/"),
+    Probe("Database", "tcp", "127.0.0.1:5432"),
+    Probe("Cache", "tcp", "127.0.0.1:6379"),
+]
+
+def configured_probes(connection_probes: list[Probe] = ()) -> list[Probe]:
+    """BLUEBRIE_PROBES, or DEFAULT_PROBES, plus the probes of the configured
+    Lentil connection. A connection probe replaces the default of the same
+    name; a probe listed in BLUEBRIE_PROBES replaces it"""
+    extra = {probe.name: probe for probe in connection_probes}
+    raw = os.environ.get(PROBES_ENV)
+    if raw:
+        probes = [Probe(*entry) for entry in json.loads(raw)]
+        names = {probe.name for probe in probes}
+        return probes + [probe for name, probe in extra.items() if name not in names]
+    probes = [extra.pop(probe.name, None) or replace(probe) for probe in DEFAULT_PROBES]
+    return probes + list(extra.values())
+
+__all__ = ["PROBES_ENV", "KINDS", "Probe", "ProbeResult", "CircuitBreaker", "ProbeEngine",
+           "DEFAULT_PROBES", "configured_probes"]
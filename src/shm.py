@@ -0,0 +1,178 @@
+# src/shm.py - Shared Memory Metric Frames
+import hashlib
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Header: sequence counter (odd while a write is in progress), row count,
+# row capacity, retired flag (set when the writer replaced the block)
+HEADER = 4
+SEQ, ROWS, CAPACITY, RETIRED = range(HEADER)
+
+# Every column is 8 bytes wide so offsets stay aligned
+SCHEMAS: dict[str, tuple[tuple[str, str], ...]] = {
+    "time_series": (
+        ("timestamp", "datetime64[ns]"),
+        ("cpu", "float64"),
+        ("memory", "float64"),
+        ("requests", "int64"),
+        ("response_time", "float64"),
+    ),
+    # Host rates sampled every second by src/host.py
+    "host": (
+        ("timestamp", "datetime64[ns]"),
+        ("cpu", "float64"),
+        ("memory", "float64"),
+        ("net_rx", "float64"),
+        ("net_tx", "float64"),
+        ("disk_read", "float64"),
+        ("disk_write", "float64"),
+        ("temperature", "float64"),
+        ("power", "float64"),
+    ),
+    # Index columns of the log snapshot, level/source as vocabulary codes
+    "logs": (
+        ("timestamp", "datetime64[ns]"),
+        ("level", "int64"),
+        ("source", "int64"),
+    ),
+}
+
+def block_name(prefix: str, name: str) -> str:
+    # POSIX shm names are short on some platforms, so hash the prefix
+    digest = hashlib.sha1(prefix.encode()).hexdigest()[:10]
+    return f"bb_{digest}_{name}"
+
+# Held while a reader attaches with resource tracking switched off
+_TRACKER_LOCK = threading.Lock()
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Readers must not unlink the writer's block when they exit. Processes
+    # share one resource tracker, so unregistering after attaching would
+    # also drop the writer's registration; never register instead.
+    with _TRACKER_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+def _create(name: str, size: int) -> shared_memory.SharedMemory:
+    with _TRACKER_LOCK:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+def _size(schema, capacity: int) -> int:
+    return (HEADER + len(schema) * capacity) * 8
+
+def _views(shm: shared_memory.SharedMemory, schema, capacity: int):
+    header = np.ndarray((HEADER,), dtype=np.int64, buffer=shm.buf)
+    columns = {}
+    for i, (column, dtype) in enumerate(schema):
+        offset = (HEADER + i * capacity) * 8
+        columns[column] = np.ndarray((capacity,), dtype=dtype, buffer=shm.buf, offset=offset)
+    return header, columns
+
+# =====WRITER=====
+class SharedFrameWriter:
+    """Single writer of a columnar block; only the collector leader writes"""
+
+    def __init__(self, name: str, schema, capacity: int = 4096):
+        self.name = name
+        self.schema = schema
+        self._open(capacity)
+
+    def _open(self, capacity: int) -> None:
+        size = _size(self.schema, capacity)
+        try:
+            self.shm = _create(self.name, size)
+        except FileExistsError:
+            # Left behind by a previous leader; reuse it if it is big enough
+            self.shm = shared_memory.SharedMemory(name=self.name)
+            existing = int(np.ndarray((HEADER,), dtype=np.int64, buffer=self.shm.buf)[CAPACITY])
+            if existing < capacity or self.shm.size < _size(self.schema, existing):
+                self._retire()
+                self.shm = _create(self.name, size)
+            else:
+                capacity = existing
+        self.capacity = capacity
+        self.header, self.columns = _views(self.shm, self.schema, capacity)
+        self.header[CAPACITY] = capacity
+        self.header[RETIRED] = 0
+
+    def _retire(self) -> None:
+        header = np.ndarray((HEADER,), dtype=np.int64, buffer=self.shm.buf)
+        header[RETIRED] = 1
+        del header
+        self.header = self.columns = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def write(self, arrays: dict[str, np.ndarray]) -> None:
+        rows = len(next(iter(arrays.values())))
+        if rows > self.capacity:
+            self._retire()
+            self._open(max(rows, self.capacity * 2))
+
+        self.header[SEQ] += 1
+        for column, _ in self.schema:
+            self.columns[column][:rows] = arrays[column]
+        self.header[ROWS] = rows
+        self.header[SEQ] += 1
+
+    def close(self, unlink: bool = True) -> None:
+        self.header = self.columns = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+# =====READER=====
+class SharedFrameReader:
+    def __init__(self, name: str, schema):
+        self.name = name
+        self.schema = schema
+        self.shm = None
+
+    def _attach(self) -> bool:
+        try:
+            self.shm = _attach(self.name)
+        except FileNotFoundError:
+            return False
+        capacity = int(np.ndarray((HEADER,), dtype=np.int64, buffer=self.shm.buf)[CAPACITY])
+        if capacity == 0:
+            # Writer is still initialising the block
+            self.shm.close()
+            self.shm = None
+            return False
+        self.header, self.columns = _views(self.shm, self.schema, capacity)
+        return True
+
+    def _detach(self) -> None:
+        self.header = self.columns = None
+        self.shm.close()
+        self.shm = None
+
+    def read(self, retries: int = 100) -> dict[str, np.ndarray] | None:
+        """Consistent copy of the current rows, or None if nothing is published"""
+        if self.shm is None and not self._attach():
+            return None
+        if self.header[RETIRED]:
+            self._detach()
+            if not self._attach():
+                return None
+
+        for _ in range(retries):
+            seq = int(self.header[SEQ])
+            if seq % 2:
+                continue
+            rows = int(self.header[ROWS])
+            data = {column: self.columns[column][:rows].copy() for column, _ in self.schema}
+            if int(self.header[SEQ]) == seq:
+                return data
+        return None
+
+__all__ = ["SCHEMAS", "SharedFrameWriter", "SharedFrameReader", "block_name"]
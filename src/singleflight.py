@@ -0,0 +1,43 @@
+# src/singleflight.py - Request Coalescing
+#
+# Concurrent calls with the same key share one execution: the first caller
+# runs the function and the others wait for its result (or its exception).
+# Nothing is kept once the call returns, so this is not a cache; a call that
+# starts after the last one finished runs again.
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> tuple[Any, bool]:
+        """Result of `fn(*args, **kwargs)`, and whether it came from a call
+        that was already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result(), True
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        call.set_result(result)
+        return result, False
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,264 @@
+# src/sketches.py - Mergeable Sketches
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.stats import DAY, epoch_seconds
+
+# =====QUANTILES=====
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (DDSketch). Values
+    fall into logarithmic bins, so two sketches merge by adding counts."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def copy(self) -> "DDSketch":
+        clone = DDSketch(self.relative_accuracy)
+        clone.bins = dict(self.bins)
+        clone.zero_count, clone.count = self.zero_count, self.count
+        clone.min, clone.max = self.min, self.max
+        return clone
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bin in relative terms
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs) -> list[float | None]:
+        return [self.quantile(q) for q in qs]
+
+class SketchSeries:
+    """One sketch per fixed-width time bucket; a window's quantiles come from
+    merging the sketches of the buckets it covers"""
+
+    def __init__(self, bucket: float, horizon: int, relative_accuracy: float = 0.01):
+        self.bucket = bucket
+        self.horizon = horizon
+        self.relative_accuracy = relative_accuracy
+        self.sketches: dict[int, DDSketch] = {}
+
+    def add(self, timestamps, values) -> None:
+        """timestamps in epoch seconds"""
+        keys = (np.asarray(timestamps, dtype=float) // self.bucket).astype(np.int64)
+        values = np.asarray(values, dtype=float)
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        unique, starts = np.unique(keys, return_index=True)
+        for key, chunk in zip(unique.tolist(), np.split(values, starts[1:])):
+            # Copy on write: published snapshots share the untouched buckets
+            sketch = self.sketches.get(key)
+            sketch = sketch.copy() if sketch is not None else DDSketch(self.relative_accuracy)
+            sketch.add(chunk)
+            self.sketches[key] = sketch
+
+        if len(self.sketches) > self.horizon:
+            cutoff = max(self.sketches) - self.horizon
+            for key in [k for k in self.sketches if k <= cutoff]:
+                del self.sketches[key]
+
+    def snapshot(self) -> "SketchSeries":
+        clone = SketchSeries(self.bucket, self.horizon, self.relative_accuracy)
+        clone.sketches = dict(self.sketches)
+        return clone
+
+    def window(self, start: float, end: float) -> DDSketch:
+        """Merged sketch of the buckets overlapping [start, end)"""
+        merged = DDSketch(self.relative_accuracy)
+        first, last = int(start // self.bucket), int(math.ceil(end / self.bucket))
+        for key, sketch in self.sketches.items():
+            if first <= key < last:
+                merged.merge(sketch)
+        return merged
+
+    def bands(self, width: float, qs) -> tuple[np.ndarray, np.ndarray]:
+        """Quantiles per consecutive window of the given width, for plotting.
+        Returns window start times (epoch seconds) and a (windows, len(qs)) array."""
+        if not self.sketches:
+            return np.empty(0), np.empty((0, len(qs)))
+        groups: dict[int, DDSketch] = {}
+        for key in sorted(self.sketches):
+            group = int(key * self.bucket // width)
+            merged = groups.get(group)
+            if merged is None:
+                merged = groups[group] = DDSketch(self.relative_accuracy)
+            merged.merge(self.sketches[key])
+        starts = np.array([group * width for group in groups], dtype=float)
+        values = np.array([sketch.quantiles(qs) for sketch in groups.values()], dtype=float)
+        return starts, values
+
+class LatencyEngine:
+    """Keeps response-time sketches per 5 minute bucket for a week"""
+
+    def __init__(self, bucket: float = 300, horizon: int = 7 * 24 * 12):
+        self.series = SketchSeries(bucket, horizon)
+        self.last_ts: float | None = None
+
+    def ingest(self, source: str, value) -> SketchSeries:
+        ts = epoch_seconds(value['timestamp'])
+        latency = value['response_time'].to_numpy(dtype=float)
+        if self.last_ts is not None:
+            start = np.searchsorted(ts, self.last_ts, side="right")
+            ts, latency = ts[start:], latency[start:]
+        if len(ts):
+            self.series.add(ts, latency)
+            self.last_ts = float(ts[-1])
+        return self.series.snapshot()
+
+# =====DISTINCT COUNTS=====
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # Smear the highest set bit downwards, then count the ones
+    for shift in (1, 2, 4, 8, 16, 32):
+        x = x | (x >> np.uint64(shift))
+    return np.bitwise_count(x).astype(np.uint8)
+
+class HyperLogLog:
+    """Distinct counter in 2**precision one-byte registers; merging two
+    sketches is an elementwise max, so it is lossless"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values) -> None:
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_array(values.to_numpy())
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = np.uint8(64 - self.precision + 1) - _bit_length(rest)
+        np.maximum.at(self.registers, index, rank)
+
+    def copy(self) -> "HyperLogLog":
+        clone = HyperLogLog(self.precision)
+        clone.registers = self.registers.copy()
+        return clone
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> float:
+        return hll_estimate(self.registers)
+
+def hll_estimate(registers: np.ndarray) -> float:
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(float)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate for small cardinalities
+        return m * math.log(m / zeros)
+    return float(estimate)
+
+class HllSeries:
+    """HyperLogLog per (time bucket, source); any window and any subset of
+    sources is answered by merging the matching registers"""
+
+    def __init__(self, bucket: float, horizon: int, precision: int = 12):
+        self.bucket = bucket
+        self.horizon = horizon
+        self.precision = precision
+        self.sketches: dict[tuple[int, str], HyperLogLog] = {}
+
+    def add(self, timestamps, sources, values) -> None:
+        frame = pd.DataFrame({
+            "key": (np.asarray(timestamps, dtype=float) // self.bucket).astype(np.int64),
+            "source": np.asarray(sources),
+            "value": np.asarray(values),
+        }).dropna(subset=["value"])
+        for (key, source), group in frame.groupby(["key", "source"], sort=False):
+            # Copy on write, as in SketchSeries
+            sketch = self.sketches.get((key, source))
+            sketch = sketch.copy() if sketch is not None else HyperLogLog(self.precision)
+            sketch.add(group["value"])
+            self.sketches[(key, source)] = sketch
+
+        if self.sketches:
+            cutoff = max(key for key, _ in self.sketches) - self.horizon
+            for stale in [k for k in self.sketches if k[0] <= cutoff]:
+                del self.sketches[stale]
+
+    def snapshot(self) -> "HllSeries":
+        clone = HllSeries(self.bucket, self.horizon, self.precision)
+        clone.sketches = dict(self.sketches)
+        return clone
+
+    def count(self, start: float, end: float, sources=None) -> float:
+        first, last = int(start // self.bucket), int(math.ceil(end / self.bucket))
+        matching = [
+            sketch.registers for (key, source), sketch in self.sketches.items()
+            if first <= key < last and (sources is None or source in sources)
+        ]
+        if not matching:
+            return 0.0
+        return hll_estimate(np.maximum.reduce(matching))
+
+class DistinctEngine:
+    """Unique users and IPs seen in the logs, per day and log source"""
+
+    def __init__(self, horizon: int = 400):
+        self.users = HllSeries(DAY, horizon)
+        self.ips = HllSeries(DAY, horizon)
+        self.last_ts: float | None = None
+
+    def ingest(self, source: str, logs) -> dict[str, HllSeries]:
+        ts = epoch_seconds(logs['timestamp'])
+        start = 0 if self.last_ts is None else np.searchsorted(ts, self.last_ts, side="right")
+        if start < len(ts):
+            new = logs.iloc[start:]
+            # Hash every id as int64: a nullable column turns into float64
+            # in a batch with a missing id, and 1001.0 hashes unlike 1001
+            user_ids = new['user_id'].astype("Int64")
+            known = user_ids.notna().to_numpy()
+            self.users.add(ts[start:][known], new['source'].to_numpy()[known], user_ids[known].to_numpy(np.int64))
+            self.ips.add(ts[start:], new['source'], new['ip'])
+            self.last_ts = float(ts[-1])
+        return {"users": self.users.snapshot(), "ips": self.ips.snapshot()}
+
+__all__ = ["DDSketch", "SketchSeries", "LatencyEngine", "HyperLogLog", "HllSeries", "DistinctEngine"]
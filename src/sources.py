@@ -0,0 +1,199 @@
+# src/sources.py - Simulated Telemetry Sources
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+
+# =====SERVER DATA SIMULATION=====
+def get_server_metrics():
+    np.random.seed(42)
+    
+    # Simulate server uptime and basic metrics
+    uptime_hours = np.random.randint(120, 8760)  # 5 days to 1 year
+    cpu_usage = np.random.uniform(15, 85)
+    memory_usage = np.random.uniform(40, 90)
+    disk_usage = np.random.uniform(25, 75)
+    
+    # Network metrics
+    requests_per_sec = np.random.poisson(45)
+    active_connections = np.random.randint(10, 200)
+    
+    return {
+        'uptime_hours': uptime_hours,
+        'cpu_usage': cpu_usage,
+        'memory_usage': memory_usage,
+        'disk_usage': disk_usage,
+        'requests_per_sec': requests_per_sec,
+        'active_connections': active_connections
+    }
+
+def get_time_series_data():
+    # Generate last 24 hours of data
+    times = pd.date_range(start=datetime.now() - timedelta(hours=24), end=datetime.now(), freq='5min')
+    
+    data = pd.DataFrame({
+        'timestamp': times,
+        'cpu': np.random.normal(50, 15, len(times)).clip(0, 100),
+        'memory': np.random.normal(65, 10, len(times)).clip(0, 100),
+        'requests': np.random.poisson(40, len(times)),
+        'response_time': np.random.gamma(2, 50, len(times))  # Response time in ms
+    })
+    
+    return data
+
+# =====LOG DATA GENERATION=====
+LOG_LEVELS = ['INFO', 'WARN', 'ERROR', 'DEBUG']
+LOG_SOURCES = ['gleam_server', 'nginx', 'postgres', 'redis', 'system']
+
+def generate_log_data():
+    np.random.seed(42)
+    
+    # Generate server logs for the last 24 hours
+    log_levels = LOG_LEVELS
+    log_sources = LOG_SOURCES
+    
+    # Generate timestamps
+    base_time = datetime.now() - timedelta(hours=24)
+    log_times = []
+    for i in range(500):  # 500 log entries
+        log_times.append(base_time + timedelta(seconds=np.random.exponential(172.8)))  # ~500 logs per day
+    
+    logs_data = []
+    for timestamp in sorted(log_times):
+        level = np.random.choice(log_levels, p=[0.7, 0.2, 0.05, 0.05])
+        source = np.random.choice(log_sources, p=[0.4, 0.25, 0.15, 0.1, 0.1])
+        
+        # Generate realistic log messages based on source and level
+        messages = {
+            'gleam_server': {
+                'INFO': ['Request processed successfully', 'Connection established', 'Cache hit', 'User authenticated'],
+                'WARN': ['High memory usage detected', 'Slow query detected', 'Connection timeout'],
+                'ERROR': ['Database connection failed', 'Authentication failed', 'Internal server error'],
+                'DEBUG': ['Function entered', 'Variable state', 'Debug checkpoint']
+            },
+            'nginx': {
+                'INFO': ['GET /api/health 200', 'POST /api/users 201', 'Static file served'],
+                'WARN': ['Rate limit approaching', '404 error for unknown route'],
+                'ERROR': ['Upstream server unreachable', '502 Bad Gateway'],
+                'DEBUG': ['Request headers logged', 'Routing decision made']
+            },
+            'postgres': {
+                'INFO': ['Query executed successfully', 'Connection opened', 'Checkpoint completed'],
+                'WARN': ['Lock wait timeout', 'Table scan detected'],
+                'ERROR': ['Connection limit reached', 'Disk space low'],
+                'DEBUG': ['Query plan generated', 'Index usage statistics']
+            }
+        }
+        
+        if source in messages and level in messages[source]:
+            message = np.random.choice(messages[source][level])
+        else:
+            message = f"{level} message from {source}"
+        
+        logs_data.append({
+            'timestamp': timestamp,
+            'level': level,
+            'source': source,
+            'message': message,
+            'ip': f"192.168.1.{np.random.randint(1, 255)}",
+            'user_id': np.random.randint(1000, 9999) if np.random.random() > 0.3 else None
+        })
+    
+    return pd.DataFrame(logs_data)
+
+# =====ANALYTICS DATA GENERATION=====
+def generate_analytics_data():
+    np.random.seed(42)
+    
+    # Generate time series data
+    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
+    
+    # Website analytics data
+    website_data = pd.DataFrame({
+        'date': dates,
+        'page_views': np.random.poisson(1000, len(dates)) + np.sin(np.arange(len(dates)) * 2 * np.pi / 365) * 200,
+        'unique_visitors': np.random.poisson(300, len(dates)) + np.sin(np.arange(len(dates)) * 2 * np.pi / 365) * 50,
+        'bounce_rate': np.random.beta(2, 3, len(dates)) * 100,
+        'avg_session_duration': np.random.normal(180, 60, len(dates)).clip(30, 600),
+        'conversion_rate': np.random.beta(1, 20, len(dates)) * 100
+    })
+    
+    # Sales analytics data
+    sales_data = pd.DataFrame({
+        'product': ['Product A', 'Product B', 'Product C', 'Product D', 'Product E'],
+        'revenue': np.random.normal([50000, 35000, 25000, 15000, 10000], 5000),
+        'units_sold': np.random.poisson([500, 350, 250, 150, 100]),
+        'profit_margin': np.random.normal([25, 30, 20, 35, 15], 5)
+    })
+    
+    # Geographic data
+    geo_data = pd.DataFrame({
+        'country': ['United States', 'United Kingdom', 'Germany', 'France', 'Canada', 'Australia', 'Japan', 'Brazil'],
+        'users': np.random.poisson([5000, 2000, 1500, 1200, 800, 600, 400, 300]),
+        'revenue': np.random.normal([100000, 40000, 30000, 25000, 15000, 12000, 8000, 6000], 5000)
+    })
+    
+    return website_data, sales_data, geo_data
+
+# =====USER ACTIVITY GENERATION=====
+def generate_user_activity():
+    np.random.seed(42)
+    
+    # Message events from users who signed up over the last year
+    now = datetime.now()
+    n_users = 20000
+    signup_days = np.random.randint(0, 365, n_users)
+    events_per_user = np.random.geometric(1 / 15, n_users)  # ~15 messages per user
+    
+    user_ids = np.repeat(np.arange(1000, 1000 + n_users), events_per_user)
+    signup = np.repeat(np.datetime64(now, 'ns') - signup_days.astype('timedelta64[D]'), events_per_user)
+    
+    # Activity decays after signup (churn)
+    offsets = (np.random.exponential(45, len(user_ids)) * 86400).astype('timedelta64[s]')
+    timestamps = signup + offsets
+    
+    activity = pd.DataFrame({'timestamp': timestamps, 'user_id': user_ids})
+    activity = activity[activity['timestamp'] <= np.datetime64(now, 'ns')]
+    return activity.sort_values('timestamp', ignore_index=True)
+
+# =====SYNTHETIC LOAD=====
+# Production-sized stand-ins for the generators above, for benchmarks
+def generate_synthetic_logs(rows=1_000_000, messages=1_000, ips=10_000, users=50_000, hours=24, seed=0):
+    rng = np.random.default_rng(seed)
+    end = datetime.now()
+    
+    offsets = np.sort(rng.uniform(0, hours * 3600, rows))
+    timestamps = np.datetime64(end - timedelta(hours=hours), 'ns') + (offsets * 1e9).astype('timedelta64[ns]')
+    
+    # Message and IP popularity is skewed, as in real traffic
+    def skewed(n):
+        weights = 1 / np.arange(1, n + 1)
+        return rng.choice(n, rows, p=weights / weights.sum())
+    
+    verbs = rng.choice(['Request', 'Query', 'Connection', 'Cache', 'Session'], messages)
+    nouns = rng.choice(['processed', 'failed', 'timed out', 'opened', 'evicted'], messages)
+    vocabulary = np.array([f"{verb} {noun} {i}" for i, (verb, noun) in enumerate(zip(verbs, nouns))], dtype=object)
+    addresses = np.array([f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(1, ips + 1)], dtype=object)
+    
+    user_ids = pd.array(rng.integers(1000, 1000 + users, rows), dtype='Int64')
+    user_ids[rng.random(rows) < 0.3] = pd.NA
+    
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'level': pd.Categorical.from_codes(rng.choice(len(LOG_LEVELS), rows, p=[0.7, 0.2, 0.05, 0.05]), LOG_LEVELS),
+        'source': pd.Categorical.from_codes(rng.choice(len(LOG_SOURCES), rows, p=[0.4, 0.25, 0.15, 0.1, 0.1]), LOG_SOURCES),
+        'message': vocabulary[skewed(messages)],
+        'ip': addresses[skewed(ips)],
+        'user_id': user_ids,
+    })
+
+def generate_synthetic_time_series(rows=1_000_000, freq='1s', seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(end=datetime.now(), periods=rows, freq=freq)
+    
+    return pd.DataFrame({
+        'timestamp': times,
+        'cpu': rng.normal(50, 15, rows).clip(0, 100),
+        'memory': rng.normal(65, 10, rows).clip(0, 100),
+        'requests': rng.poisson(40, rows),
+        'response_time': rng.gamma(2, 50, rows),
+    })
@@ -0,0 +1,174 @@
+# src/state.py - Shared Snapshot State
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, NamedTuple
+
+from src.metrics import STORE_READS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Set this to a directory shared by every BlueBrie replica (local disk or a
+# network mount) to share snapshots and elect a single collector leader.
+STATE_DIR_ENV = "BLUEBRIE_STATE_DIR"
+
+class Snapshot(NamedTuple):
+    value: Any
+    version: int
+    updated_at: float
+
+# =====STORES=====
+class MemoryStore:
+    """Per-process store used when no shared state directory is configured"""
+
+    def __init__(self):
+        self._data: dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Snapshot | None:
+        snapshot = self._data.get(key)
+        STORE_READS.inc(store="memory", result="absent" if snapshot is None else "hit")
+        return snapshot
+
+    def put(self, key: str, value: Any) -> Snapshot:
+        with self._lock:
+            previous = self._data.get(key)
+            version = previous.version + 1 if previous else 1
+            snapshot = Snapshot(value, version, time.time())
+            self._data[key] = snapshot
+        return snapshot
+
+class FileStore:
+    """Snapshots pickled into a shared directory, one file per key"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._cache: dict[str, tuple[tuple[int, int, int], Snapshot]] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.snap")
+
+    @staticmethod
+    def _identity(stat: os.stat_result) -> tuple[int, int, int]:
+        # Every put() replaces the file, so the inode changes even when a
+        # coarse-grained mtime (NFS, 1 s filesystems) does not
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: str) -> Snapshot | None:
+        try:
+            stat = os.stat(self._file(key))
+        except FileNotFoundError:
+            STORE_READS.inc(store="file", result="absent")
+            return None
+
+        # Only unpickle when the leader has replaced the file
+        cached = self._cache.get(key)
+        if cached and cached[0] == self._identity(stat):
+            STORE_READS.inc(store="file", result="hit")
+            return cached[1]
+        STORE_READS.inc(store="file", result="miss")
+
+        try:
+            with open(self._file(key), "rb") as f:
+                value, updated_at = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return cached[1] if cached else None
+
+        snapshot = Snapshot(value, stat.st_mtime_ns, updated_at)
+        with self._lock:
+            self._cache[key] = (self._identity(stat), snapshot)
+        return snapshot
+
+    def put(self, key: str, value: Any) -> Snapshot:
+        updated_at = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((value, updated_at), f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Atomic on POSIX and Windows: readers see the old or the new file
+            os.replace(tmp_path, self._file(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # The writer already has the value; cache it without reading it back
+        stat = os.stat(self._file(key))
+        snapshot = Snapshot(value, stat.st_mtime_ns, updated_at)
+        with self._lock:
+            self._cache[key] = (self._identity(stat), snapshot)
+        return snapshot
+
+# =====LEADER ELECTION=====
+class LeaderLock:
+    """Non-blocking exclusive lock on a file; the holder runs the collectors.
+
+    The OS drops the lock when the holding process exits, so a standby
+    replica takes over on its next acquire() attempt.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.path is None or self._file is not None
+
+    def acquire(self) -> bool:
+        if self.is_leader:
+            return True
+
+        with self._lock:
+            f = open(self.path, "a+")
+            try:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                f.close()
+                return False
+
+            f.seek(0)
+            f.truncate()
+            f.write(f"{os.getpid()}\n")
+            f.flush()
+            self._file = f
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+
+def state_dir() -> str | None:
+    return os.environ.get(STATE_DIR_ENV) or None
+
+def open_store() -> MemoryStore | FileStore:
+    path = state_dir()
+    return FileStore(path) if path else MemoryStore()
+
+def open_leader_lock() -> LeaderLock:
+    path = state_dir()
+    if path is None:
+        return LeaderLock()
+    os.makedirs(path, exist_ok=True)
+    return LeaderLock(os.path.join(path, "leader.lock"))
+
+__all__ = ["Snapshot", "MemoryStore", "FileStore", "LeaderLock", "open_store", "open_leader_lock", "state_dir"]
@@ -0,0 +1,202 @@
+# src/stats.py - Incremental Statistics
+import math
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# =====STREAMING AGGREGATES=====
+class RunningStats:
+    """Welford's online mean/variance"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+class Ewma:
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def push(self, x: float) -> None:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+
+class WindowedSum:
+    """Sums and counts per fixed-width time bucket, kept as prefix arrays so
+    any window of whole buckets is answered with two lookups"""
+
+    def __init__(self, bucket: float, horizon: int):
+        self.bucket = bucket
+        self.horizon = horizon
+        self.first: int | None = None
+        self._sums = [0.0]
+        self._counts = [0]
+
+    @property
+    def last(self) -> int | None:
+        return None if self.first is None else self.first + len(self._sums) - 2
+
+    def add(self, ts: float, value: float) -> None:
+        idx = int(ts // self.bucket)
+        if self.first is None:
+            self.first = idx
+        if idx < self.first:
+            return  # older than anything we keep
+
+        while self.last < idx:
+            self._sums.append(self._sums[-1])
+            self._counts.append(self._counts[-1])
+
+        # Late samples shift every later prefix; in-order ones touch only the tail
+        for i in range(idx - self.first + 1, len(self._sums)):
+            self._sums[i] += value
+            self._counts[i] += 1
+
+        if len(self._sums) > 2 * self.horizon:
+            self._trim()
+
+    def _trim(self) -> None:
+        drop = len(self._sums) - self.horizon - 1
+        base_sum, base_count = self._sums[drop], self._counts[drop]
+        self._sums = [s - base_sum for s in self._sums[drop:]]
+        self._counts = [c - base_count for c in self._counts[drop:]]
+        self.first += drop
+
+    def window(self, start: float, end: float) -> tuple[float, int]:
+        """Sum and count of the buckets covering [start, end)"""
+        if self.first is None:
+            return 0.0, 0
+        lo = min(max(int(start // self.bucket) - self.first, 0), len(self._sums) - 1)
+        hi = min(max(int(math.ceil(end / self.bucket)) - self.first, 0), len(self._sums) - 1)
+        return self._sums[hi] - self._sums[lo], self._counts[hi] - self._counts[lo]
+
+# =====KPI TRACKING=====
+class KpiCard(NamedTuple):
+    value: float
+    delta: float | None
+    mean: float
+    std: float
+    ewma: float
+
+class KpiTracker:
+    def __init__(self, bucket: float, horizon: int, alpha: float = 0.1):
+        self.stats = RunningStats()
+        self.ewma = Ewma(alpha)
+        self.sums = WindowedSum(bucket, horizon)
+        self.last_ts: float | None = None
+        self.value: float | None = None
+
+    def push(self, ts: float, value: float) -> None:
+        self.stats.push(value)
+        self.ewma.push(value)
+        self.sums.add(ts, value)
+        if self.last_ts is None or ts >= self.last_ts:
+            self.last_ts, self.value = ts, value
+
+    def window_mean(self, period: float, offset: float = 0.0) -> float | None:
+        # End on a bucket boundary, so consecutive periods share no bucket
+        end = (self.last_ts // self.sums.bucket + 1) * self.sums.bucket - offset
+        total, count = self.sums.window(end - period, end)
+        return total / count if count else None
+
+    def delta(self, period: float, pct: bool = False) -> float | None:
+        """Change of the mean over the last period versus the period before"""
+        if self.last_ts is None:
+            return None
+        current = self.window_mean(period)
+        previous = self.window_mean(period, offset=period)
+        if current is None or previous is None:
+            return None
+        if pct:
+            return (current - previous) / previous * 100 if previous else None
+        return current - previous
+
+    def card(self, period: float, pct: bool = False) -> KpiCard:
+        return KpiCard(self.value, self.delta(period, pct), self.stats.mean, self.stats.std, self.ewma.value)
+
+HOUR = 3600.0
+DAY = 86400.0
+
+# name -> (source, column, bucket seconds, delta period, percent change)
+KPIS: dict[str, tuple[str, str, float, float, bool]] = {
+    "cpu": ("time_series", "cpu", 300, HOUR, False),
+    "memory": ("time_series", "memory", 300, HOUR, False),
+    "requests": ("time_series", "requests", 300, HOUR, True),
+    "response_time": ("time_series", "response_time", 300, HOUR, True),
+    "disk": ("server_metrics", "disk_usage", 60, HOUR, False),
+    "page_views": ("analytics", "page_views", DAY, DAY, True),
+    "unique_visitors": ("analytics", "unique_visitors", DAY, DAY, True),
+    "bounce_rate": ("analytics", "bounce_rate", DAY, DAY, False),
+    "avg_session_duration": ("analytics", "avg_session_duration", DAY, DAY, False),
+    "conversion_rate": ("analytics", "conversion_rate", DAY, DAY, False),
+}
+
+def epoch_seconds(timestamps) -> np.ndarray:
+    return pd.to_datetime(timestamps).to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+def now_seconds() -> float:
+    """The current time on the clock epoch_seconds() uses: the sources
+    stamp samples with naive local times, so this is local wall-clock
+    time counted as if it were UTC, not time.time()"""
+    return pd.Timestamp.now().timestamp()
+
+class KpiEngine:
+    """Feeds new collector samples into per-KPI trackers; ingest() returns
+    the ready-to-render cards so pages never touch history"""
+
+    def __init__(self, horizon: int = 400):
+        self.trackers = {name: KpiTracker(spec[2], horizon) for name, spec in KPIS.items()}
+
+    def _push_new(self, name: str, ts: np.ndarray, values: np.ndarray) -> None:
+        tracker = self.trackers[name]
+        if tracker.last_ts is not None:
+            start = np.searchsorted(ts, tracker.last_ts, side="right")
+            ts, values = ts[start:], values[start:]
+        for t, v in zip(ts.tolist(), values.tolist()):
+            tracker.push(t, v)
+
+    def ingest(self, source: str, value) -> dict[str, KpiCard]:
+        if source == "time_series":
+            ts = epoch_seconds(value['timestamp'])
+        elif source == "analytics":
+            value = value[0]
+            ts = epoch_seconds(value['date'])
+
+        for name, (kpi_source, column, _, _, _) in KPIS.items():
+            if kpi_source != source:
+                continue
+            if source == "server_metrics":
+                self.trackers[name].push(now_seconds(), float(value[column]))
+            else:
+                self._push_new(name, ts, value[column].to_numpy(dtype=float))
+        return self.cards()
+
+    def cards(self) -> dict[str, KpiCard]:
+        return {
+            name: self.trackers[name].card(period, pct)
+            for name, (_, _, _, period, pct) in KPIS.items()
+            if self.trackers[name].value is not None
+        }
+
+def format_delta(card: KpiCard | None, unit: str = "%", precision: int = 1) -> str | None:
+    if card is None or card.delta is None:
+        return None
+    return f"{card.delta:+.{precision}f}{unit}"
+
+__all__ = ["RunningStats", "Ewma", "WindowedSum", "KpiCard", "KpiTracker", "KpiEngine", "epoch_seconds", "now_seconds",
+           "format_delta"]
@@ -0,0 +1,141 @@
+# src/views.py - Saved Log and Network Views
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.logquery import QueryError, plan
+from src.logstore import LogStore, LogTable
+from src.sources import LOG_LEVELS, LOG_SOURCES
+
+TIME_RANGES = {
+    "Last Hour": timedelta(hours=1),
+    "Last 6 Hours": timedelta(hours=6),
+    "Last 24 Hours": timedelta(hours=24),
+}
+
+class SavedView(NamedTuple):
+    name: str
+    level: str = "All"
+    source: str = "All"
+    query: str = ""
+    time_range: str = "Last Hour"
+
+    def filters(self) -> tuple[str, str, str, str]:
+        return self.level, self.source, self.query, self.time_range
+
+def since(time_range: str, now: datetime | None = None) -> np.datetime64:
+    return np.datetime64((now or datetime.now()) - TIME_RANGES[time_range], 'ns')
+
+def filter_plan(table: LogTable, level: str, source: str, query: str, time_range: str,
+                now: datetime | None = None, first_row: int = 0):
+    """Plan for the Logs page filters"""
+    levels = None if level == "All" else [LOG_LEVELS.index(level)]
+    sources = None if source == "All" else [LOG_SOURCES.index(source)]
+    return plan(table, query, since(time_range, now), None, levels, sources, first_row)
+
+class ViewResult(NamedTuple):
+    view: SavedView
+    ids: np.ndarray          # matching row ids, oldest first
+    timestamps: np.ndarray   # their timestamps, for trimming the window
+    error: str | None
+
+    def positions(self, table: LogTable, time_range_start: np.datetime64) -> np.ndarray:
+        """Matching rows of `table` still inside the window"""
+        first = np.searchsorted(self.timestamps, time_range_start, side="left")
+        ids = self.ids[first:]
+        positions = np.searchsorted(table.id, ids)
+        # Rows the table no longer has (trimmed) or does not have yet
+        found = positions < len(table)
+        found[found] = table.id[positions[found]] == ids[found]
+        return positions[found]
+
+# =====ENGINE=====
+class ViewEngine:
+    """Keeps the result of every saved view up to date.
+
+    Each time logs land, only rows past the last one a view has seen are
+    run through its plan, and matches that slid out of the time range are
+    dropped, so opening a view never re-filters the store.
+    """
+
+    def __init__(self, store, log_store: LogStore):
+        self.store = store
+        self.log_store = log_store
+        self.results: dict[str, ViewResult] = {}
+        self.last_id: dict[str, int] = {}
+
+    def definitions(self) -> list[SavedView]:
+        snapshot = self.store.get("saved_views")
+        return [SavedView(*view) for view in (snapshot.value if snapshot else [])]
+
+    def ingest(self, source: str, value) -> dict[str, ViewResult]:
+        table = self.log_store.snapshot()
+        now = datetime.now()
+        results = {}
+        for view in self.definitions():
+            result = self.results.get(view.name)
+            if result is None or result.view != view:
+                result = ViewResult(view, np.empty(0, dtype=np.int64), np.empty(0, dtype="datetime64[ns]"), None)
+                self.last_id[view.name] = -1
+            first_row = int(np.searchsorted(table.id, self.last_id[view.name], side="right"))
+            try:
+                new = filter_plan(table, *view.filters(), now=now, first_row=first_row).execute()
+            except QueryError as e:
+                results[view.name] = result._replace(error=str(e))
+                continue
+
+            # Append the new matches and drop the ones older than the window
+            ids = np.concatenate([result.ids, table.id[new]])
+            timestamps = np.concatenate([result.timestamps, table.timestamp[new]])
+            first = np.searchsorted(timestamps, since(view.time_range, now), side="left")
+            results[view.name] = ViewResult(view, ids[first:], timestamps[first:], None)
+            if len(table):
+                self.last_id[view.name] = int(table.id[-1])
+        self.results = results
+        self.last_id = {name: self.last_id[name] for name in results}
+        return results
+
+# =====NETWORK VIEWS=====
+PERIODS = ("Last 7 Days", "Last 30 Days", "Last 90 Days", "Year to Date")
+
+def period_start(time_period: str, now: pd.Timestamp) -> pd.Timestamp:
+    if time_period == "Year to Date":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    return now - timedelta(days=int(time_period.split()[1]))
+
+class NetworkView(NamedTuple):
+    name: str
+    time_period: str = "Last 7 Days"
+    endpoint: str = "All"   # Lentil API endpoint, restored into the page's filter
+
+class NetworkViewResult(NamedTuple):
+    view: NetworkView
+    users: float
+    ips: float
+
+class NetworkViewEngine:
+    """Keeps the unique user and IP counts of every saved Network view.
+    They are recounted from the daily sketches whenever logs land, so the
+    page never merges sketches for a saved time period."""
+
+    def __init__(self, store, distinct):
+        self.store = store
+        self.distinct = distinct
+
+    def definitions(self) -> list[NetworkView]:
+        snapshot = self.store.get("saved_network_views")
+        return [NetworkView(*view) for view in (snapshot.value if snapshot else [])]
+
+    def ingest(self, source: str, value) -> dict[str, NetworkViewResult]:
+        now = pd.Timestamp.now()
+        results = {}
+        for view in self.definitions():
+            start, end = period_start(view.time_period, now).timestamp(), now.timestamp()
+            results[view.name] = NetworkViewResult(view, self.distinct.users.count(start, end),
+                                                   self.distinct.ips.count(start, end))
+        return results
+
+__all__ = ["TIME_RANGES", "SavedView", "ViewResult", "ViewEngine", "filter_plan", "since",
+           "PERIODS", "NetworkView", "NetworkViewResult", "NetworkViewEngine", "period_start"]
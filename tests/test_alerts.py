@@ -0,0 +1,70 @@
+# tests/test_alerts.py - Threshold Alerts
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.alerts import AlertEngine, evaluate
+from src.state import MemoryStore
+from src.stats import epoch_seconds
+
+def run(values, firing=False, streak=np.nan, sustain=0.0, raise_at=80.0, clear_at=75.0):
+    ts = np.arange(len(values), dtype=float) * 60
+    return evaluate(ts, np.array([values], dtype=float), np.array([raise_at]), np.array([clear_at]),
+                    sustain, np.array([firing]), np.array([streak]))
+
+# =====EVALUATION=====
+def test_raises_only_after_the_sustain_period():
+    firing, _, changed_at = run([90, 90, 90], sustain=120)
+    assert firing[0] and changed_at[0] == 120
+    firing, streak, _ = run([90, 90], sustain=120)
+    assert not firing[0] and streak[0] == 0
+
+def test_hysteresis_keeps_firing_until_below_the_clear_level():
+    firing, _, changed_at = run([78, 77, 76], firing=True)
+    assert firing[0] and np.isnan(changed_at[0])
+    firing, _, changed_at = run([78, 74], firing=True)
+    assert not firing[0] and changed_at[0] == 60
+
+def test_streak_carries_over_between_batches():
+    firing, _, _ = run([90], streak=-120.0, sustain=120)
+    assert firing[0]
+
+# =====ENGINE=====
+def test_server_metrics_alert_uses_the_sample_clock():
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    try:
+        store = MemoryStore()
+        store.put("settings", {"alert_sustain_minutes": 0})
+        alert = AlertEngine(store).ingest("server_metrics", {"disk_usage": 95.0})["disk"]
+        # Samples carry naive local times; `since` must be on that clock
+        local_now = epoch_seconds([pd.Timestamp.now()])[0]
+        assert alert.firing and alert.level == "critical"
+        assert alert.since == pytest.approx(local_now, abs=5)
+    finally:
+        if previous is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = previous
+        time.tzset()
+
+def test_time_series_batches_are_only_evaluated_once():
+    store = MemoryStore()
+    store.put("settings", {"alert_sustain_minutes": 0, "cpu_threshold": 80})
+    engine = AlertEngine(store)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2026-10-01 10:00", periods=3, freq="min"),
+        "cpu": [50.0, 95.0, 50.0],
+        "memory": [10.0, 10.0, 10.0],
+    })
+    alerts = engine.ingest("time_series", frame)
+    assert not alerts["cpu"].firing
+    # The same batch again changes nothing; a newer high sample raises
+    assert engine.ingest("time_series", frame)["cpu"] == alerts["cpu"]
+    newer = pd.concat([frame, pd.DataFrame({"timestamp": [pd.Timestamp("2026-10-01 10:03")], "cpu": [96.0], "memory": [10.0]})])
+    alerts = engine.ingest("time_series", newer)
+    assert alerts["cpu"].firing and alerts["cpu"].since == epoch_seconds([pd.Timestamp("2026-10-01 10:03")])[0]
@@ -0,0 +1,81 @@
+# tests/test_anomaly.py - Streaming Anomaly Detection
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.anomaly import AnomalyEngine, Detector, EwmaZScore, SeasonalBaseline, StreamingMad
+from src.stats import DAY
+
+def test_ewma_zscore_matches_pandas_ewm():
+    values = np.random.default_rng(0).normal(100, 10, 2_000)
+    detector = EwmaZScore(alpha=0.05)
+    scores = [detector.update(x) for x in values.tolist()]
+    ewm = pd.Series(values).ewm(alpha=0.05, adjust=False)
+    mean, var = ewm.mean().to_numpy(), ewm.var(bias=True).to_numpy()
+    assert detector.mean == pytest.approx(mean[-1])
+    assert detector.var == pytest.approx(var[-1])
+    # Each score is against the state before the sample
+    expected = (values[1:] - mean[:-1]) / np.sqrt(var[:-1])
+    np.testing.assert_allclose(scores[2:], expected[1:], rtol=1e-9)
+
+def test_streaming_mad_tracks_median_and_mad():
+    values = np.random.default_rng(1).normal(40, 5, 20_000)
+    detector = StreamingMad()
+    for x in values.tolist():
+        detector.update(x)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    assert detector.median == pytest.approx(median, abs=1.0)
+    assert detector.mad == pytest.approx(mad, rel=0.2)
+
+def test_streaming_mad_scores_an_outlier_robustly():
+    detector = StreamingMad()
+    for x in np.random.default_rng(2).normal(0, 1, 5_000).tolist():
+        detector.update(x)
+    assert detector.update(10.0) > 3.5
+    assert abs(detector.update(0.5)) < 1
+
+def test_seasonal_baseline_scores_against_the_hour_of_day():
+    baseline = SeasonalBaseline(warmup=12)
+    rng = np.random.default_rng(3)
+    # Busy at noon, quiet at midnight, for three weeks
+    for day in range(21):
+        for hour in range(24):
+            level = 100 if hour == 12 else 10
+            score = baseline.update(day * DAY + hour * 3600, level + rng.normal(0, 1))
+            if day < 12:
+                assert score == 0.0   # still warming up
+    # Noon traffic at midnight is anomalous; at noon it is not
+    assert baseline.update(21 * DAY, 100.0) > 3.5
+    assert abs(baseline.update(21 * DAY + 12 * 3600, 100.0)) < 3.5
+
+def test_detector_flags_spikes_only_after_warmup():
+    rng = np.random.default_rng(4)
+    detector = Detector(threshold=3.5, warmup=30)
+    flagged = []
+    for i, x in enumerate(rng.normal(50, 1, 400).tolist()):
+        if i in (10, 300):
+            x = 80.0
+        anomaly = detector.update(i * 60.0, x)
+        if anomaly is not None:
+            flagged.append((i, anomaly))
+    indices = [i for i, _ in flagged]
+    assert 10 not in indices and 300 in indices
+    spike = dict(flagged)[300]
+    assert spike.value == 80.0 and abs(spike.score) >= 3.5
+    # Steady noise is rarely flagged
+    assert len(flagged) <= 5
+
+def test_engine_batches_equal_one_pass():
+    rng = np.random.default_rng(5)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2026-10-01", periods=500, freq="min"),
+        **{metric: rng.normal(50, 2, 500) for metric in ("cpu", "memory", "requests", "response_time")},
+    })
+    frame.loc[[100, 250, 400], "cpu"] = 95.0
+    whole, batched = AnomalyEngine(), AnomalyEngine()
+    expected = whole.ingest("time_series", frame)
+    for end in (120, 120, 300, 500):
+        result = batched.ingest("time_series", frame.iloc[:end])
+    assert result == expected
+    assert {a.value for a in result["cpu"]} >= {95.0}
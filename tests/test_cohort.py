@@ -0,0 +1,63 @@
+# tests/test_cohort.py - Cohort Retention
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cohort import CohortEngine
+
+def activity(events=5_000, users=400, days=150, seed=0):
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.now().normalize()
+    timestamps = today - pd.to_timedelta(rng.uniform(0.01, days, events), unit="D")
+    frame = pd.DataFrame({"timestamp": timestamps, "user_id": rng.integers(1000, 1000 + users, events)})
+    return frame.sort_values("timestamp", ignore_index=True)
+
+def batch_retention(frame, periods):
+    """The same table from scratch with pandas, over every event at once"""
+    months = frame["timestamp"].dt.to_period("M").astype("int64")
+    pairs = pd.DataFrame({"user": frame["user_id"], "month": months}).drop_duplicates()
+    pairs["cohort"] = pairs.groupby("user")["month"].transform("min")
+    pairs["age"] = pairs["month"] - pairs["cohort"]
+    counts = pairs.pivot_table(index="cohort", columns="age", values="user", aggfunc="count", fill_value=0)
+    counts = counts.reindex(columns=range(periods), fill_value=0).iloc[-periods:]
+    retention = counts.div(counts[0], axis=0) * 100
+    current = months.max()
+    reached = counts.index.to_numpy()[:, None] + np.arange(periods)[None, :] <= current
+    return counts[0].to_numpy(), retention.where(reached).to_numpy()
+
+def test_table_matches_a_batch_computation():
+    frame = activity()
+    table = CohortEngine(periods=12).ingest("activity", frame)
+    sizes, retention = batch_retention(frame, 12)
+    np.testing.assert_array_equal(table.sizes, sizes)
+    np.testing.assert_allclose(table.retention, retention)
+    assert len(table.cohorts) == len(sizes)
+
+def test_batches_equal_one_pass():
+    frame = activity(seed=1)
+    expected = CohortEngine().ingest("activity", frame)
+    engine = CohortEngine()
+    engine.add(frame["timestamp"].to_numpy()[:2_000], frame["user_id"].to_numpy()[:2_000])
+    engine.add(frame["timestamp"].to_numpy()[2_000:], frame["user_id"].to_numpy()[2_000:])
+    engine.processed_until = np.datetime64(pd.Timestamp.now().normalize(), "ns")
+    table = engine.table()
+    np.testing.assert_array_equal(table.sizes, expected.sizes)
+    np.testing.assert_allclose(table.retention, expected.retention)
+
+def test_unsorted_activity_is_sorted_before_ingest():
+    frame = activity(seed=2)
+    expected = CohortEngine().ingest("activity", frame)
+    # Today's events are held back until the day is over, wherever they sit
+    today = pd.DataFrame({"timestamp": pd.Timestamp.now().normalize() + pd.Timedelta(seconds=1), "user_id": range(50)})
+    shuffled = pd.concat([frame, today]).sample(frac=1, random_state=0)
+    table = CohortEngine().ingest("activity", shuffled)
+    np.testing.assert_array_equal(table.sizes, expected.sizes)
+    np.testing.assert_allclose(table.retention, expected.retention)
+
+def test_events_older_than_the_counted_months_are_refused():
+    engine = CohortEngine()
+    engine.add(np.array(["2026-09-10", "2026-10-02"], dtype="datetime64[ns]"), np.array([1, 2]))
+    # The same month again is fine; an earlier one would be miscounted
+    engine.add(np.array(["2026-10-05"], dtype="datetime64[ns]"), np.array([3]))
+    with pytest.raises(ValueError):
+        engine.add(np.array(["2026-09-30"], dtype="datetime64[ns]"), np.array([2]))
@@ -0,0 +1,38 @@
+# tests/test_collector.py - Collector Leadership and Refresh Requests
+import itertools
+import time
+
+from src.collector import Collector
+from src.state import FileStore, LeaderLock
+
+def collector(path, counter) -> Collector:
+    c = Collector(FileStore(str(path)), LeaderLock(str(path / "leader.lock")), tick=0.05)
+    c.register("logs", lambda: next(counter), interval=3600)
+    return c
+
+def test_follower_refresh_is_collected_by_the_leader(tmp_path):
+    counter = itertools.count()
+    leader, follower = collector(tmp_path, counter), collector(tmp_path, counter)
+    leader.start()
+    try:
+        # The leader publishes on its first tick and then not for an hour
+        while leader.store.get("logs") is None:
+            time.sleep(0.01)
+        assert follower.read("logs") == 0
+        assert not follower._lead()
+
+        assert follower.refresh("logs", timeout=5)
+        assert follower.read("logs") == 1
+    finally:
+        leader.stop()
+
+def test_refresh_without_a_leader_times_out(tmp_path):
+    counter = itertools.count()
+    holder = LeaderLock(str(tmp_path / "leader.lock"))
+    assert holder.acquire()
+    try:
+        follower = collector(tmp_path, counter)
+        assert not follower.refresh("logs", timeout=0.2)
+        assert (tmp_path / "logs.refresh").exists()
+    finally:
+        holder.release()
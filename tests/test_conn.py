@@ -0,0 +1,207 @@
+# tests/test_conn.py - Lentil Connection Timing and Sessions
+import datetime
+import threading
+import time
+
+import pytest
+import requests
+
+from src import conn
+from src.loadtest import StandInServer
+from src.conn import LentilConnection, Session, SessionManager, session_manager
+from src.metrics import LENTIL_COALESCED, LENTIL_PHASE_SECONDS
+
+def phase(endpoint: str, name: str) -> tuple[float, int]:
+    """Sum and count observed for one phase"""
+    row = LENTIL_PHASE_SECONDS.snapshot().get((endpoint, name))
+    return (row[-2], row[-1]) if row else (0.0, 0)
+
+def test_ttfb_leaves_out_dns_and_connect():
+    def send():
+        # A new connection: 0.2 s resolving and 0.3 s connecting, then the
+        # server answers 0.1 s after the request went out
+        conn._phases.dns, conn._phases.connect = 0.2, 0.3
+        response = requests.Response()
+        response.status_code = 200
+        response.elapsed = datetime.timedelta(seconds=0.6)
+        response.request = requests.Request("POST", "http://lentil/").prepare()
+        response._content = b"{}"
+        return response
+
+    conn._timed("ttfb_new", send)
+    assert phase("ttfb_new", "ttfb") == (pytest.approx(0.1), 1)
+    assert phase("ttfb_new", "connect") == (pytest.approx(0.3), 1)
+
+def test_pooled_request_times_only_first_byte():
+    server = StandInServer(latency_ms=30, jitter_ms=0)
+    try:
+        session = conn.timed_session()
+        for _ in range(2):
+            conn._timed("ttfb_pooled", session.get, server.url)
+        # Only the first request opened a connection
+        assert phase("ttfb_pooled", "connect")[1] == 1
+        total, count = phase("ttfb_pooled", "ttfb")
+        assert count == 2 and total >= 0.06
+    finally:
+        server.close()
+
+# =====SESSIONS=====
+class Logins:
+    """Login callable that hands out numbered tokens, optionally slowly"""
+
+    def __init__(self, ttl: float = 3600, delay: float = 0.0, gate: threading.Event | None = None):
+        self.ttl, self.delay, self.gate = ttl, delay, gate
+        self.calls = 0
+        self.error: Exception | None = None
+
+    def __call__(self) -> Session:
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return Session(f"token-{self.calls}", time.time() + self.ttl)
+
+def run_together(fn, count: int) -> list:
+    """fn() from `count` threads released at once; results or exceptions"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+def test_concurrent_callers_share_one_login():
+    login = Logins(delay=0.1)
+    manager = SessionManager(login)
+    assert run_together(manager.token, 16) == ["token-1"] * 16
+    assert login.calls == 1
+    assert manager.token() == "token-1" and login.calls == 1
+
+def test_failed_login_reaches_every_waiter_and_is_retried():
+    login = Logins(delay=0.1)
+    login.error = ConnectionError("refused")
+    manager = SessionManager(login)
+    results = run_together(manager.token, 8)
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert login.calls == 1
+
+    login.error = None
+    assert manager.token() == "token-2"
+
+def test_valid_token_is_served_while_a_refresh_is_in_flight():
+    gate = threading.Event()
+    # Inside the refresh margin, but not yet expired
+    login = Logins(ttl=30)
+    manager = SessionManager(login, refresh_before=60)
+    assert manager.token() == "token-1"
+
+    login.gate = gate
+    refresher = threading.Thread(target=manager.token)
+    refresher.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not manager._flight.in_flight("login") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        started = time.perf_counter()
+        assert manager.token() == "token-1"
+        assert time.perf_counter() - started < 0.1
+    finally:
+        gate.set()
+        refresher.join(5)
+    assert manager.session.token == "token-2"
+
+def connection(login: Logins) -> LentilConnection:
+    conn = LentilConnection("http://lentil.test/", "")
+    conn.auth = SessionManager(login)
+    return conn
+
+def reply(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.elapsed = datetime.timedelta(0)
+    response.request = requests.Request("GET", "http://lentil.test/").prepare()
+    response._content = b""
+    return response
+
+def test_rejected_token_is_replaced_once():
+    conn = connection(Logins())
+    invalidated = []
+    invalidate = conn.auth.invalidate
+    conn.auth.invalidate = lambda token: (invalidated.append(token), invalidate(token))
+    sent = []
+
+    def send(url, headers, **kwargs):
+        sent.append(headers["Authorization"])
+        return reply(401 if len(sent) == 1 else 200)
+
+    assert conn._authorized("retry_once", send, "http://lentil.test/").status_code == 200
+    assert sent == ["Bearer token-1", "Bearer token-2"]
+    assert invalidated == ["token-1"]
+
+def test_second_rejection_is_returned_without_another_login():
+    login = Logins()
+    conn = connection(login)
+    sent = []
+
+    def send(url, headers, **kwargs):
+        sent.append(headers["Authorization"])
+        return reply(401)
+
+    assert conn._authorized("retry_once", send, "http://lentil.test/").status_code == 401
+    assert len(sent) == 2 and login.calls == 2
+
+def test_invalidate_keeps_a_token_that_was_already_replaced():
+    manager = SessionManager(Logins())
+    manager.token()
+    manager.session = Session("token-new", time.time() + 3600)
+    manager.invalidate("token-1")
+    assert manager.token() == "token-new"
+
+def test_managers_are_shared_per_credentials():
+    same = session_manager("http://lentil.test/", "ops", "secret")
+    assert session_manager("http://lentil.test/", "ops", "secret") is same
+    changed = session_manager("http://lentil.test/", "ops", "rotated")
+    assert changed is not same
+    # The login is bound to the credentials, not to the first connection
+    assert changed.login.args == ("http://lentil.test/", "ops", "rotated")
+
+def test_identical_reads_in_flight_are_coalesced():
+    conn = connection(Logins())
+    gate = threading.Event()
+    sent = []
+
+    def send(url, headers, **kwargs):
+        sent.append(url)
+        gate.wait(2)
+        return reply(200)
+
+    before = LENTIL_COALESCED._values.get(("coalesced_read",), 0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        conn._coalesced("coalesced_read", send, "http://lentil.test/", {"user": "ops"}))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(sent) == 1
+    assert len({id(r) for r in results}) == 1
+    assert LENTIL_COALESCED._values.get(("coalesced_read",), 0) == before + 5
+
+    # A different payload is a different read
+    conn._coalesced("coalesced_read", send, "http://lentil.test/", {"user": "other"})
+    assert len(sent) == 2
@@ -0,0 +1,87 @@
+# tests/test_forecast.py - Capacity Forecasting
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.forecast import ForecastEngine, HoltWinters, Rollup
+from src.stats import epoch_seconds
+
+def seasonal_series(n, season=24, slope=0.5, noise=0.0, seed=0):
+    t = np.arange(n)
+    shape = 10 * np.sin(2 * np.pi * t / season)
+    return 100 + slope * t + shape + np.random.default_rng(seed).normal(0, noise, n)
+
+def test_holt_continues_a_straight_line():
+    line = 5 + 2.0 * np.arange(30)
+    model = HoltWinters(alpha=0.5, beta=0.1)
+    for x in model.initialise(line).tolist():
+        model.update(x)
+    np.testing.assert_allclose(model.forecast(12), 5 + 2.0 * np.arange(30, 42))
+    assert model.errors.std == pytest.approx(0.0, abs=1e-9)
+
+def test_update_matches_a_batch_recursion():
+    values = seasonal_series(24 * 5, noise=2.0)
+    model = HoltWinters(alpha=0.3, beta=0.1, gamma=0.2, season=24)
+    rest = model.initialise(values)
+    level, trend, seasonals = model.level, model.trend, model.seasonals.copy()
+    for x in rest.tolist():
+        model.update(x)
+    # The textbook additive recursion over the same values
+    for i, x in enumerate(rest, start=24):
+        s = seasonals[i % 24]
+        previous, level = level, 0.3 * (x - s) + 0.7 * (level + trend)
+        trend = 0.1 * (level - previous) + 0.9 * trend
+        seasonals[i % 24] = 0.2 * (x - level) + 0.8 * s
+    assert model.level == pytest.approx(level) and model.trend == pytest.approx(trend)
+    np.testing.assert_allclose(model.seasonals, seasonals)
+
+def test_fit_recovers_trend_and_season():
+    values = seasonal_series(24 * 8, noise=0.5)
+    model = HoltWinters.fit(values, season=24)
+    assert model.season == 24
+    expected = seasonal_series(24 * 9)[-24:]
+    np.testing.assert_allclose(model.forecast(24), expected, atol=3.0)
+
+def test_fit_drops_the_season_without_two_cycles():
+    assert HoltWinters.fit(seasonal_series(30), season=24).season == 0
+
+def test_rollup_closes_hourly_means_like_resample():
+    rng = np.random.default_rng(1)
+    times = pd.Series(pd.date_range("2026-10-01", periods=600, freq="7min"))
+    values = rng.normal(50, 5, len(times))
+    rollup = Rollup()
+    landed = [bucket for ts, x in zip(epoch_seconds(times).tolist(), values.tolist()) for bucket in rollup.push(ts, x)]
+    expected = pd.Series(values, index=times).resample("h").mean().iloc[:-1]   # the last hour is still open
+    assert [t for t, _ in landed] == epoch_seconds(pd.Series(expected.index)).tolist()
+    np.testing.assert_allclose([x for _, x in landed], expected.to_numpy())
+    assert list(rollup.closed) == landed
+
+def time_series(hours, start="2026-10-01"):
+    times = pd.date_range(start, periods=hours * 12, freq="5min")
+    hourly = seasonal_series(hours, noise=1.0)
+    return pd.DataFrame({"timestamp": times, "requests": np.repeat(hourly, 12), "memory": 60.0})
+
+def test_engine_waits_for_min_buckets():
+    engine = ForecastEngine(min_buckets=6)
+    assert "requests" not in engine.ingest("time_series", time_series(6))   # five closed hours
+    forecast = engine.ingest("time_series", time_series(7))["requests"]
+    assert len(forecast.history) == 6
+
+def test_engine_forecasts_the_horizon_within_its_band():
+    engine = ForecastEngine(horizon=12)
+    forecast = engine.ingest("time_series", time_series(24 * 3))["requests"]
+    assert len(forecast.times) == len(forecast.values) == 12
+    np.testing.assert_allclose(np.diff(forecast.times), 3600)
+    assert forecast.times[0] == forecast.history_times[-1] + 3600
+    assert np.all(forecast.lower < forecast.values) and np.all(forecast.values < forecast.upper)
+    # The band widens with the horizon
+    assert np.all(np.diff(forecast.upper - forecast.lower) > 0)
+
+def test_engine_batches_equal_one_pass():
+    data = time_series(24 * 3)
+    whole, batched = ForecastEngine(), ForecastEngine()
+    expected = whole.ingest("time_series", data)["requests"]
+    for hours in (10, 30, 31, 24 * 3):
+        result = batched.ingest("time_series", data.iloc[:hours * 12])["requests"]
+    np.testing.assert_allclose(result.history, expected.history)
+    np.testing.assert_allclose(result.values, expected.values)
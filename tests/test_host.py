@@ -0,0 +1,170 @@
+# tests/test_host.py - Host Metrics
+import os
+
+import pytest
+
+from src.host import ProcessSampler, parse_cpu, parse_diskstats, parse_meminfo, parse_net_dev, parse_pid_io, parse_pid_stat
+
+STAT = """cpu  100 20 30 400 50 6 7 8 9 10
+cpu0 50 10 15 200 25 3 3 4 4 5
+intr 12345
+"""
+
+MEMINFO = """MemTotal:       16000000 kB
+MemFree:         2000000 kB
+MemAvailable:    4000000 kB
+Buffers:          100000 kB
+"""
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:  999999     100    0    0    0     0          0         0   999999     100    0    0    0     0       0          0
+  eth0: 1000 10 0 0 0 0 0 0 2000 20 0 0 0 0 0 0
+wlan0:300 3 0 0 0 0 0 0 400 4 0 0 0 0 0 0
+"""
+
+DISKSTATS = """   8       0 sda 100 0 2048 10 50 0 4096 20 0 30 30
+   8       1 sda1 100 0 2048 10 50 0 4096 20 0 30 30
+ 259       0 nvme0n1 10 0 8 1 5 0 16 2 0 3 3
+   7       0 loop0 1 0 999 0 0 0 999 0 0 0 0
+"""
+
+def test_parse_cpu_counts_idle_and_iowait_as_not_busy():
+    busy, total = parse_cpu(STAT)
+    # guest and guest_nice are already part of user and nice
+    assert total == 100 + 20 + 30 + 400 + 50 + 6 + 7 + 8
+    assert busy == total - 400 - 50
+
+def test_parse_meminfo_reads_total_and_available_bytes():
+    assert parse_meminfo(MEMINFO) == (16000000 * 1024, 4000000 * 1024)
+
+def test_parse_meminfo_without_available_fails_loudly():
+    with pytest.raises(KeyError):
+        parse_meminfo("MemTotal: 1 kB\n")
+
+def test_parse_net_dev_skips_loopback_and_handles_packed_names():
+    assert parse_net_dev(NET_DEV) == {"eth0": (1000, 2000), "wlan0": (300, 400)}
+
+def test_parse_diskstats_sums_whole_disks_in_bytes():
+    # Partitions and loop devices are left out by the disk set
+    assert parse_diskstats(DISKSTATS, {"sda", "nvme0n1"}) == ((2048 + 8) * 512, (4096 + 16) * 512)
+    assert parse_diskstats(DISKSTATS, set()) == (0, 0)
+
+# =====PROCESSES=====
+def pid_stat(pid: int, comm: str, ticks: int, rss: int, started: int) -> str:
+    fields = ["S"] + ["0"] * 40
+    fields[11], fields[12], fields[19], fields[21] = str(ticks), "0", str(started), str(rss)
+    return f"{pid} ({comm}) " + " ".join(fields) + "\n"
+
+def pid_io(read: int, written: int) -> str:
+    return f"rchar: 1\nwchar: 1\nread_bytes: {read}\nwrite_bytes: {written}\ncancelled_write_bytes: 0\n"
+
+def test_parse_pid_stat_survives_awkward_names():
+    text = pid_stat(42, "my (odd) name", ticks=150, rss=300, started=9000)
+    assert parse_pid_stat(text) == (150, 300, 9000)
+    assert parse_pid_io(pid_io(4096, 8192)) == (4096, 8192)
+
+class FakeProc:
+    """A /proc tree of comm, stat and io files, rewritten in place like the
+    kernel's view of a pid"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def write(self, pid: int, comm: str, ticks: int = 0, rss: int = 1, started: int = 1, read: int = 0, written: int = 0):
+        path = self.root / str(pid)
+        path.mkdir(exist_ok=True)
+        for name, text in (("comm", comm + "\n"), ("stat", pid_stat(pid, comm, ticks, rss, started)),
+                           ("io", pid_io(read, written))):
+            with open(path / name, "w") as f:
+                f.write(text)
+
+    def remove(self, pid: int):
+        for name in ("comm", "stat", "io"):
+            os.unlink(self.root / str(pid) / name)
+        os.rmdir(self.root / str(pid))
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def by_service(frame):
+    last = frame[frame['timestamp'] == frame['timestamp'].max()]
+    return last.set_index('service')
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProc(tmp_path)
+
+def sampler(proc, clock, **options):
+    sampler = ProcessSampler(proc=str(proc.root), clock=clock, **options)
+    sampler.ticks, sampler.page_size = 100, 4096
+    return sampler
+
+def test_processes_are_grouped_by_service(proc):
+    clock = Clock()
+    proc.write(10, "postgres", ticks=100, rss=10, read=0)
+    proc.write(11, "postmaster", ticks=100, rss=20)
+    proc.write(12, "nginx", rss=5)
+    proc.write(13, "bash", ticks=999)
+    s = sampler(proc, clock)
+    first = by_service(s.sample())
+    assert first.loc["postgres", "processes"] == 2 and first.loc["postgres", "rss"] == 30 * 4096
+    # CPU counts from a process's second sample, not its lifetime
+    assert first.loc["postgres", "cpu"] == 0
+    assert first.loc["redis", "processes"] == 0
+
+    clock.now += 2
+    proc.write(10, "postgres", ticks=200, rss=10, read=2000)
+    proc.write(11, "postmaster", ticks=150, rss=20)
+    second = by_service(s.sample())
+    assert second.loc["postgres", "cpu"] == pytest.approx(100 * 150 / 100 / 2)
+    assert second.loc["postgres", "io_read"] == pytest.approx(1000)
+    assert second.loc["nginx", "cpu"] == 0
+
+def test_exited_pids_are_forgotten(proc):
+    clock = Clock()
+    proc.write(10, "postgres")
+    proc.write(11, "postgres")
+    s = sampler(proc, clock)
+    s.sample()
+    proc.remove(11)
+    clock.now += 1
+    assert by_service(s.sample()).loc["postgres", "processes"] == 1
+    assert set(s._files) == {10} and 11 not in s._service and 11 not in s._last
+
+def test_reused_pid_is_not_charged_to_the_old_service(proc):
+    clock = Clock()
+    proc.write(12, "nginx", ticks=5000, started=100)
+    s = sampler(proc, clock)
+    s.sample()
+
+    # nginx exits and redis starts with the same pid
+    proc.write(12, "redis-server", ticks=10, started=700)
+    clock.now += 1
+    rows = by_service(s.sample())
+    assert rows.loc["nginx", "processes"] == 0 and rows.loc["nginx", "cpu"] == 0
+
+    clock.now += 1
+    rows = by_service(s.sample())
+    assert rows.loc["redis", "processes"] == 1 and rows.loc["nginx", "processes"] == 0
+    assert rows.loc["redis", "cpu"] == 0
+
+    proc.write(12, "redis-server", ticks=60, started=700)
+    clock.now += 1
+    assert by_service(s.sample()).loc["redis", "cpu"] == pytest.approx(50)
+
+def test_other_pids_are_rescanned_for_exec(proc):
+    clock = Clock()
+    proc.write(13, "sh")
+    s = sampler(proc, clock, rescan=30)
+    s.sample()
+    # The shell execs the service; its name is only re-read on a rescan
+    proc.write(13, "nginx")
+    clock.now += 5
+    assert by_service(s.sample()).loc["nginx", "processes"] == 0
+    clock.now += 30
+    assert by_service(s.sample()).loc["nginx", "processes"] == 1
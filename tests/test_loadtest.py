@@ -0,0 +1,25 @@
+# tests/test_loadtest.py - Lentil Load Generator
+import time
+
+from src.conn import LentilConnection
+from src.loadtest import LoadPlan, LoadTest, StandInServer
+
+def test_stop_does_not_wait_for_the_backlog():
+    server = StandInServer(latency_ms=50, jitter_ms=0)
+    try:
+        # Two workers at 50 ms a call fall far behind 1000 req/s
+        test = LoadTest(lambda: LentilConnection(server.url, ""), LoadPlan(1000, 10), workers=2).start()
+        time.sleep(0.5)
+        stopped = time.perf_counter()
+        test.stop()
+        assert test.wait(2)
+        assert time.perf_counter() - stopped < 1
+        summary = test.summary()
+        assert summary["sent"] == summary["completed"] < 100
+    finally:
+        server.close()
+
+def test_plan_schedules_a_linear_ramp():
+    times = LoadPlan(10, 10, end_rate=30).times()
+    assert len(times) == 200
+    assert (times[:10] < 1).all() and (times[-28:] > 9).all()
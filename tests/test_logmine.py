@@ -0,0 +1,62 @@
+# tests/test_logmine.py - Log Template Mining
+import pandas as pd
+
+from src.logmine import Drain, TemplateEngine
+
+def logs(messages, start="2026-10-01 10:00", freq="min"):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=len(messages), freq=freq),
+        "level": "ERROR",
+        "message": messages,
+    })
+
+def test_messages_differing_in_parameters_share_a_template():
+    drain = Drain()
+    a = drain.add("Connection timeout to db-1 after 30s")
+    b = drain.add("Connection timeout to cache after 45s")
+    assert a is b
+    assert a.template == "Connection timeout to <*> after <*>"
+
+def test_evicted_clusters_take_their_counters_with_them():
+    engine = TemplateEngine(max_clusters=10)
+    # Distinct lengths route every message to a new template
+    engine.ingest("logs", logs([" ".join(["word"] * n) for n in range(1, 101)]))
+    assert len(engine.drain.clusters) == 10
+    assert not hasattr(engine, "last_seen")
+    leaves = [c for node in engine.drain.root.values() for c in _clusters(node)]
+    assert len(leaves) == 10
+
+def test_hourly_counts_stay_within_the_trend_window():
+    engine = TemplateEngine(hours=24)
+    stats = engine.ingest("logs", logs(["Disk full on /var"] * 24 * 10, freq="h"))
+    (cluster,) = engine.drain.clusters.values()
+    assert len(cluster.hourly) <= 24
+    assert stats[0].count == 240 and stats[0].trend == [1] * 24
+    assert stats[0].last_seen == pd.Timestamp("2026-10-01 10:00").timestamp() + 239 * 3600
+
+def _clusters(node):
+    for key, child in node.items():
+        if key is None:
+            yield from child
+        else:
+            yield from _clusters(child)
+
+def test_rare_error_template_survives_the_top_cut():
+    engine = TemplateEngine(top=5)
+    # Ten chatty INFO templates of distinct lengths, then one rare error
+    messages = [" ".join(["info"] * n) for n in range(1, 11) for _ in range(20)] + ["Payment gateway refused charge"]
+    frame = logs(messages, freq="s")
+    frame.loc[len(frame) - 1, "level"] = "ERROR"
+    frame.loc[:len(frame) - 2, "level"] = "INFO"
+    stats = engine.ingest("logs", frame)
+    errors = [t for t in stats if t.levels.get("ERROR")]
+    assert [t.template for t in errors] == ["Payment gateway refused charge"]
+    assert sum(1 for t in stats if "INFO" in t.levels) == 5
+
+def test_stale_hours_are_pruned_on_clusters_outside_the_top():
+    engine = TemplateEngine(hours=3, top=1)
+    engine.ingest("logs", logs(["Quiet template here", "Busy one", "Busy one"], freq="h"))
+    later = logs(["Busy one"] * 5, start="2026-10-01 20:00", freq="h")
+    engine.ingest("logs", pd.concat([logs(["Quiet template here", "Busy one", "Busy one"], freq="h"), later], ignore_index=True))
+    quiet = next(c for c in engine.drain.clusters.values() if c.template == "Quiet template here")
+    assert quiet.hourly == {}
@@ -0,0 +1,75 @@
+# tests/test_logquery.py - Log Query Language and Plans
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.logquery import QueryError, plan
+from src.logstore import LogTable, pack_ips
+from src.sources import LOG_LEVELS, LOG_SOURCES
+
+MESSAGES = ["Connection timeout to db", "Disk full on /var", "User login ok", "Request timed out", "Timeout:30s reading socket"]
+
+@pytest.fixture(scope="module")
+def table() -> LogTable:
+    rng = np.random.default_rng(7)
+    n = 5_000
+    ips = [f"192.168.{rng.integers(0, 3)}.{rng.integers(1, 255)}" for _ in range(n)]
+    return LogTable(
+        timestamp=pd.date_range("2026-10-01", periods=n, freq="s").to_numpy(),
+        id=np.arange(n, dtype=np.int64),
+        level=rng.integers(0, len(LOG_LEVELS), n).astype(np.int8),
+        source=rng.integers(0, len(LOG_SOURCES), n).astype(np.int8),
+        message=rng.integers(0, len(MESSAGES), n).astype(np.int32),
+        ip=pack_ips(ips),
+        messages=MESSAGES,
+    )
+
+@pytest.fixture(scope="module")
+def frame(table) -> pd.DataFrame:
+    return table.frame(np.arange(len(table)))
+
+def expected(frame, mask) -> np.ndarray:
+    return np.flatnonzero(mask.to_numpy())
+
+@pytest.mark.parametrize("query, mask", [
+    ("level:ERROR,WARN", lambda f: f['level'].isin(["ERROR", "WARN"])),
+    ("-source:nginx", lambda f: f['source'] != "nginx"),
+    ("timeout", lambda f: f['message'].str.contains("timeout", case=False)),
+    ("/time(out|d out)/", lambda f: f['message'].str.contains("timeout|timed out", case=False)),
+    ('msg:"disk full" src:postgres', lambda f: f['message'].str.contains("disk full", case=False) & (f['source'] == "postgres")),
+    ("ip:192.168.1.0/24 lvl:error", lambda f: f['ip'].str.startswith("192.168.1.") & (f['level'] == "ERROR")),
+    # Not a field name, so message text
+    ("Timeout:30s", lambda f: f['message'].str.contains("timeout:30s", case=False)),
+    ('-Timeout:"30s reading"', lambda f: ~f['message'].str.contains("timeout:30s reading", case=False)),
+])
+def test_plans_match_a_full_scan(table, frame, query, mask):
+    np.testing.assert_array_equal(plan(table, query).execute(), expected(frame, mask(frame)))
+
+def test_pickers_and_time_window_combine_with_the_query(table, frame):
+    since, until = np.datetime64("2026-10-01T00:10"), np.datetime64("2026-10-01T00:50")
+    result = plan(table, "-level:DEBUG", since=since, until=until, sources=[2, 3]).execute()
+    mask = ((frame['timestamp'] >= since) & (frame['timestamp'] < until) & (frame['level'] != "DEBUG")
+            & frame['source'].isin([LOG_SOURCES[2], LOG_SOURCES[3]]))
+    np.testing.assert_array_equal(result, expected(frame, mask))
+
+def test_first_row_skips_rows_already_evaluated(table):
+    everything = plan(table, "level:INFO").execute()
+    np.testing.assert_array_equal(plan(table, "level:INFO", first_row=4_000).execute(), everything[everything >= 4_000])
+
+def test_most_selective_step_runs_first(table):
+    compiled = plan(table, "-level:DEBUG ip:192.168.1.7")
+    compiled.execute()
+    assert [step.label for step in compiled.trace] == ["ip:192.168.1.7", "-level:DEBUG"]
+    assert compiled.estimates == sorted(compiled.estimates)
+    # Later steps only see what earlier ones kept
+    assert compiled.trace[1].rows_in == compiled.trace[0].rows_out
+
+def test_empty_window_returns_nothing(table):
+    compiled = plan(table, "timeout", since=np.datetime64("2030-01-01"))
+    assert len(compiled.execute()) == 0
+    assert all(step.rows_out == 0 for step in compiled.trace)
+
+@pytest.mark.parametrize("query", ["level:FATAL", "/(unclosed/", "ip:999.1.1.1"])
+def test_invalid_queries_raise_query_error(table, query):
+    with pytest.raises(QueryError):
+        plan(table, query)
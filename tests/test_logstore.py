@@ -0,0 +1,112 @@
+# tests/test_logstore.py - Log Store
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.logstore import LogStore, page
+from src.sources import LOG_LEVELS, LOG_SOURCES
+
+def logs(start: int, count: int, messages=None) -> pd.DataFrame:
+    i = np.arange(start, start + count)
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2026-10-01") + pd.to_timedelta(i // 2, unit="s"),  # two rows per second
+        "level": np.asarray(LOG_LEVELS)[i % len(LOG_LEVELS)],
+        "source": np.asarray(LOG_SOURCES)[i % len(LOG_SOURCES)],
+        "message": messages if messages is not None else [f"event {n % 7}" for n in i],
+        "ip": [f"10.0.{n % 4}.{n % 250 + 1}" for n in i],
+    })
+
+@pytest.fixture(scope="module")
+def store() -> LogStore:
+    store = LogStore()
+    for start in range(0, 600, 100):
+        store.append(logs(start, 100))
+    return store
+
+@pytest.fixture(scope="module")
+def frame(store) -> pd.DataFrame:
+    table = store.snapshot()
+    return table.frame(np.arange(len(table)))
+
+def test_select_matches_a_full_scan(store, frame):
+    table = store.snapshot()
+    since, until = np.datetime64("2026-10-01T00:00:40"), np.datetime64("2026-10-01T00:03:10")
+    event_3 = [table.messages.index("event 3")]
+    positions = table.select(since, until, levels=[2], sources=[1, 4], messages=event_3)
+    mask = ((frame['timestamp'] >= since) & (frame['timestamp'] < until) & (frame['level'] == "ERROR")
+            & frame['source'].isin(["nginx", "system"]) & (frame['message'] == "event 3"))
+    np.testing.assert_array_equal(positions, np.flatnonzero(mask.to_numpy()))
+    np.testing.assert_array_equal(table.select(since, until), np.flatnonzero(
+        ((frame['timestamp'] >= since) & (frame['timestamp'] < until)).to_numpy()))
+
+def test_paging_walks_every_match_newest_first(store, frame):
+    table = store.snapshot()
+    matches = table.select(levels=[0, 2])
+    seen, anchor = [], None
+    while True:
+        log_page = page(table, matches, anchor, limit=40)
+        ids = log_page.rows['id'].tolist()
+        assert log_page.total == len(matches) and len(ids) == 40
+        if log_page.older is None:
+            # The oldest page is kept full, so it overlaps the one before
+            assert log_page.offset == len(matches) - 40
+            seen.extend(i for i in ids if i not in seen)
+            break
+        assert log_page.offset == len(seen)
+        seen.extend(ids)
+        anchor = log_page.older
+    expected = frame['id'][frame['level'].isin(["INFO", "ERROR"])].tolist()[::-1]
+    assert seen == expected
+
+def test_newer_anchor_steps_back_a_page(store):
+    table = store.snapshot()
+    matches = table.select()
+    first = page(table, matches, None, limit=50)
+    second = page(table, matches, first.older, limit=50)
+    assert page(table, matches, second.newer, limit=50).rows['id'].tolist() == first.rows['id'].tolist()
+    assert first.newer is None
+
+def test_anchored_page_stays_put_as_rows_arrive():
+    store = LogStore()
+    store.append(logs(0, 100))
+    table = store.snapshot()
+    second = page(table, table.select(), None, limit=30).older
+    before = page(table, table.select(), second, limit=30).rows['id'].tolist()
+    store.append(logs(100, 50))
+    table = store.snapshot()
+    after = page(table, table.select(), second, limit=30)
+    assert after.rows['id'].tolist() == before and after.offset == 80
+
+def test_empty_matches():
+    table = LogStore().snapshot()
+    log_page = page(table, np.empty(0, dtype=np.int64), None, limit=10)
+    assert log_page.rows.empty and log_page.total == 0 and log_page.older is None
+
+def test_snapshots_share_the_message_dictionary():
+    store = LogStore()
+    store.append(logs(0, 10))
+    assert store.snapshot().messages is store.messages
+
+def test_trimming_compacts_the_message_dictionary():
+    store = LogStore(max_rows=100)
+    batches = [logs(start, 50, [f"unique {n}" for n in range(start, start + 50)]) for start in range(0, 1000, 50)]
+    store.append(batches[0])
+    early = store.snapshot()
+    early_frame = early.frame(np.arange(len(early)))
+    for batch in batches[1:]:
+        store.append(batch)
+        assert len(store.messages) <= store.max_rows + 50
+
+    # The dictionary holds exactly the messages of the stored rows
+    table = store.snapshot()
+    latest = table.frame(np.arange(len(table)))
+    assert sorted(store.messages) == sorted(latest['message'])
+    assert latest['message'].tolist() == [f"unique {n}" for n in latest['id']]
+    # Snapshots taken before the trims still read their own messages
+    pd.testing.assert_frame_equal(early.frame(np.arange(len(early))), early_frame)
+
+    # New messages are encoded against the compacted dictionary
+    store.append(logs(1000, 1, ["unique 17"]))
+    table = store.snapshot()
+    assert table.frame(np.array([len(table) - 1]))['message'].item() == "unique 17"
+    assert len(store.message_codes) == len(store.messages)
@@ -0,0 +1,101 @@
+# tests/test_metrics.py - Self Metrics
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src import metrics
+from src.metrics import Counter, Gauge, Histogram, Metric, Registry, Timeline
+
+def test_counter_renders_one_sample_per_label_set():
+    counter = Counter("test_requests_total", "Requests", ("endpoint", "status"))
+    counter.inc(endpoint="send", status=200)
+    counter.inc(2, endpoint="send", status=200)
+    counter.inc(endpoint="login", status=500)
+    assert counter.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{endpoint="send",status="200"} 3',
+        'test_requests_total{endpoint="login",status="500"} 1',
+    ]
+
+def test_label_values_are_escaped():
+    counter = Counter("test_escaped_total", "Escaping", ("page",))
+    counter.inc(page='a "quoted"\\path\nnext')
+    assert counter.samples() == ['test_escaped_total{page="a \\"quoted\\"\\\\path\\nnext"} 1']
+
+def test_histogram_buckets_are_cumulative_with_inf():
+    histogram = Histogram("test_seconds", "Latency", ("page",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, page="home")
+    assert histogram.samples() == [
+        'test_seconds_bucket{page="home",le="0.1"} 2',
+        'test_seconds_bucket{page="home",le="1.0"} 3',
+        'test_seconds_bucket{page="home",le="+Inf"} 4',
+        'test_seconds_sum{page="home"} 3.65',
+        'test_seconds_count{page="home"} 4',
+    ]
+
+def test_unlabelled_metrics_and_gauges():
+    histogram = Histogram("test_plain_seconds", "Plain", buckets=(1.0,))
+    histogram.observe(2.0)
+    assert histogram.samples()[1] == 'test_plain_seconds_bucket{le="+Inf"} 1'
+    assert Gauge("test_up", "Up", lambda: 1).samples() == ["test_up 1"]
+    assert Gauge("test_missing", "Missing", lambda: None).samples() == []
+    assert Gauge("test_broken", "Broken", lambda: 1 / 0).samples() == []
+    assert Gauge("test_ages", "Ages", lambda: {("a",): 2.5}, ("name",)).samples() == ['test_ages{name="a"} 2.5']
+    assert Metric("test_untyped", "Untyped").samples() == []
+
+def test_registry_replaces_a_name_registered_again():
+    registry = Registry()
+    registry.register(Gauge("test_value", "Value", lambda: 1))
+    registry.register(Gauge("test_value", "Value", lambda: 2))
+    assert registry.render().endswith("test_value 2\n")
+    assert registry.render().count("# TYPE") == 1
+
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_timeline_quantiles_read_bucket_upper_bounds():
+    clock = Clock(600)
+    timeline = Timeline(("endpoint",), buckets=(0.1, 0.5, 1.0), clock=clock)
+    for value in [0.05] * 90 + [0.3] * 9 + [5.0]:
+        timeline.observe(value, endpoint="send")
+    timeline.observe(0.7, endpoint="login")
+    (row,) = timeline.quantiles(by=("endpoint",))[1:]
+    assert row == {"minute": 600, "endpoint": "send", "count": 100, "p50": 0.1, "p95": 0.5, "p99": 0.5}
+    # The +Inf bucket reads as the last finite bound
+    assert timeline.quantiles(qs=(1.0,))[0]["p100"] == 1.0
+    assert timeline.quantiles()[0]["count"] == 101
+
+def test_timeline_drops_expired_minutes():
+    clock = Clock(0)
+    timeline = Timeline(("endpoint",), minutes=5, clock=clock)
+    for minute in range(10):
+        clock.now = minute * 60
+        timeline.observe(0.01, endpoint="send")
+    assert [row["minute"] // 60 for row in timeline.quantiles()] == [5, 6, 7, 8, 9]
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), metrics._Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+def test_endpoint_serves_the_registry(endpoint):
+    metrics.PAGE_RERUNS.inc(page="test_endpoint")
+    with urllib.request.urlopen(f"{endpoint}/metrics") as response:
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.read().decode()
+    assert 'bluebrie_page_reruns_total{page="test_endpoint"} 1' in body
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{endpoint}/other")
+    assert error.value.code == 404
@@ -0,0 +1,55 @@
+# tests/test_probes.py - Service Health Probes
+import socket
+import time
+
+from src.conn import LentilConnection
+from src.probes import PROBES_ENV, CircuitBreaker, Probe, ProbeEngine, configured_probes
+
+def test_a_hung_probe_does_not_hold_the_caller():
+    # Accepts connections but never answers
+    server = socket.create_server(("127.0.0.1", 0))
+    try:
+        url = f"http://127.0.0.1:{server.getsockname()[1]}/"
+        engine = ProbeEngine([Probe("Hung", "http", url, timeout=0.5)], wait=0.1)
+        started = time.perf_counter()
+        assert engine.check() == {}
+        assert time.perf_counter() - started < 0.3
+
+        time.sleep(0.6)
+        result = engine.check()["Hung"]
+        assert not result.ok and result.detail == "timed out after 0.5s"
+    finally:
+        server.close()
+
+def test_finished_round_is_returned_at_once():
+    server = socket.create_server(("127.0.0.1", 0))
+    try:
+        engine = ProbeEngine([Probe("Port", "tcp", f"127.0.0.1:{server.getsockname()[1]}")], wait=1.0)
+        result = engine.check()["Port"]
+        assert result.ok and result.circuit == "closed"
+    finally:
+        server.close()
+
+def test_connection_probes_replace_defaults(monkeypatch):
+    monkeypatch.delenv(PROBES_ENV, raising=False)
+    probes = configured_probes(LentilConnection("http://lentil:8000/", "lentil_db").probes())
+    by_name = {probe.name: probe for probe in probes}
+    assert (by_name["Database"].kind, by_name["Database"].target) == ("sql", "lentil_db")
+    assert by_name["Lentil"].target == "http://lentil:8000/"
+    assert len(probes) == len(by_name)
+
+def test_configured_probes_win_over_connection_probes(monkeypatch):
+    monkeypatch.setenv(PROBES_ENV, '[["Database", "tcp", "db:5432"]]')
+    probes = configured_probes(LentilConnection("http://lentil:8000/", "lentil_db").probes())
+    assert [(p.name, p.kind) for p in probes] == [("Database", "tcp"), ("Lentil", "http")]
+
+def test_breaker_backs_off_and_closes():
+    breaker = CircuitBreaker(failures=2, backoff=10)
+    breaker.record(False, 0)
+    assert breaker.state(0) == "closed"
+    breaker.record(False, 1)
+    assert breaker.state(5) == "open" and breaker.state(11) == "half-open"
+    breaker.record(False, 11)
+    assert breaker.retry_at == 31
+    breaker.record(True, 31)
+    assert breaker.state(31) == "closed"
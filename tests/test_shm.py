@@ -0,0 +1,80 @@
+# tests/test_shm.py - Shared Memory Metric Frames
+import os
+
+import numpy as np
+import pytest
+
+from src.shm import SCHEMAS, SharedFrameReader, SharedFrameWriter, block_name
+
+SCHEMA = SCHEMAS["logs"]
+
+def frame(rows: int, offset: int = 0) -> dict[str, np.ndarray]:
+    return {
+        "timestamp": np.datetime64("2026-01-01", "ns") + np.arange(offset, offset + rows).astype("timedelta64[s]"),
+        "level": np.arange(rows, dtype=np.int64) % 4,
+        "source": np.arange(rows, dtype=np.int64) % 3 + offset,
+    }
+
+@pytest.fixture
+def name(request):
+    return block_name(f"test-{os.getpid()}-{request.node.name}", "logs")
+
+def test_reader_sees_none_until_a_block_exists(name):
+    assert SharedFrameReader(name, SCHEMA).read() is None
+
+def test_round_trip(name):
+    writer = SharedFrameWriter(name, SCHEMA, capacity=16)
+    try:
+        reader = SharedFrameReader(name, SCHEMA)
+        expected = frame(10)
+        writer.write(expected)
+        data = reader.read()
+        for column, _ in SCHEMA:
+            np.testing.assert_array_equal(data[column], expected[column])
+
+        # Reads are copies, so a later write does not change them
+        writer.write(frame(4, offset=100))
+        assert len(reader.read()["level"]) == 4
+        assert len(data["level"]) == 10
+    finally:
+        writer.close()
+
+def test_reader_follows_the_writer_to_a_bigger_block(name):
+    writer = SharedFrameWriter(name, SCHEMA, capacity=8)
+    try:
+        reader = SharedFrameReader(name, SCHEMA)
+        writer.write(frame(8))
+        assert len(reader.read()["source"]) == 8
+
+        expected = frame(50, offset=7)
+        writer.write(expected)
+        assert writer.capacity >= 50
+        np.testing.assert_array_equal(reader.read()["source"], expected["source"])
+    finally:
+        writer.close()
+
+def test_new_writer_reuses_a_left_behind_block(name):
+    first = SharedFrameWriter(name, SCHEMA, capacity=32)
+    first.write(frame(5))
+    first.close(unlink=False)
+
+    second = SharedFrameWriter(name, SCHEMA, capacity=16)
+    try:
+        assert second.capacity == 32
+        second.write(frame(3, offset=9))
+        np.testing.assert_array_equal(SharedFrameReader(name, SCHEMA).read()["source"], frame(3, offset=9)["source"])
+    finally:
+        second.close()
+
+def test_torn_write_is_not_returned(name):
+    writer = SharedFrameWriter(name, SCHEMA, capacity=8)
+    try:
+        reader = SharedFrameReader(name, SCHEMA)
+        writer.write(frame(2))
+        # An odd sequence number means a write is in progress
+        writer.header[0] += 1
+        assert reader.read(retries=3) is None
+        writer.header[0] += 1
+        assert len(reader.read()["level"]) == 2
+    finally:
+        writer.close()
@@ -0,0 +1,72 @@
+# tests/test_singleflight.py - Request Coalescing
+import threading
+import time
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow(x):
+        calls.append(x)
+        started.set()
+        time.sleep(0.2)
+        return x * 2
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow, 21)))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow, 99))) for _ in range(8)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert calls == [21]
+    assert sorted(results, key=lambda r: r[1]) == [(42, False)] + [(42, True)] * 8
+    assert not flight.in_flight("k")
+
+def test_exception_reaches_every_waiter_and_the_next_call_runs_again():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(2)
+        raise ConnectionError("down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", failing)
+        except ConnectionError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=call) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(errors) == 5
+    assert flight.do("k", lambda: "ok") == ("ok", False)
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+
+def test_leader_exception_is_raised_to_the_leader():
+    with pytest.raises(ValueError):
+        SingleFlight().do("k", int, "not a number")
@@ -0,0 +1,68 @@
+# tests/test_sketches.py - Mergeable Sketches
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sketches import DDSketch, DistinctEngine, HllSeries, HyperLogLog
+
+# =====QUANTILES=====
+def test_ddsketch_quantiles_are_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(5, 1, 50_000)
+    sketch = DDSketch(0.01)
+    sketch.add(values)
+    for q in (0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q, method="lower"), rel=0.02)
+
+def test_ddsketch_merge_equals_one_sketch_of_everything():
+    rng = np.random.default_rng(1)
+    a, b = rng.exponential(100, 5_000), np.append(rng.exponential(300, 5_000), [0.0, 0.0])
+    merged, whole = DDSketch(), DDSketch()
+    merged.add(a)
+    other = DDSketch()
+    other.add(b)
+    merged.merge(other)
+    whole.add(np.concatenate([a, b]))
+    assert merged.bins == whole.bins
+    assert merged.quantiles((0.0, 0.5, 0.99, 1.0)) == whole.quantiles((0.0, 0.5, 0.99, 1.0))
+
+def test_empty_ddsketch_has_no_quantiles():
+    assert DDSketch().quantile(0.5) is None
+
+# =====DISTINCT COUNTS=====
+def test_hyperloglog_estimate_is_close():
+    sketch = HyperLogLog()
+    sketch.add(np.arange(100_000))
+    sketch.add(np.arange(50_000))   # repeats change nothing
+    assert sketch.count() == pytest.approx(100_000, rel=0.05)
+
+def test_hyperloglog_merge_is_lossless():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a.add(np.arange(0, 6_000))
+    b.add(np.arange(4_000, 10_000))
+    both.add(np.arange(0, 10_000))
+    a.merge(b)
+    np.testing.assert_array_equal(a.registers, both.registers)
+
+def test_hll_series_counts_windows_and_sources():
+    series = HllSeries(bucket=100, horizon=10)
+    series.add([0, 50, 150, 150], ["app", "web", "app", "app"], ["u1", "u2", "u1", "u3"])
+    assert series.count(0, 200) == pytest.approx(3, abs=0.1)
+    assert series.count(0, 100) == pytest.approx(2, abs=0.1)
+    assert series.count(0, 200, sources={"app"}) == pytest.approx(2, abs=0.1)
+    assert series.count(1_000, 2_000) == 0.0
+
+def logs(timestamps, user_ids):
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(timestamps),
+        "source": "app",
+        "user_id": user_ids,
+        "ip": "10.0.0.1",
+    })
+
+def test_same_user_in_batches_with_and_without_missing_ids_counts_once():
+    engine = DistinctEngine()
+    # A missing id makes the nullable column float64 in this batch only
+    engine.ingest("logs", logs(["2026-10-01 10:00", "2026-10-01 10:01"], [1001, None]))
+    distinct = engine.ingest("logs", logs(["2026-10-01 11:00"], [1001]))
+    day = pd.Timestamp("2026-10-01").timestamp()
+    assert distinct["users"].count(day, day + 86_400) == pytest.approx(1, abs=0.1)
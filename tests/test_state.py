@@ -0,0 +1,28 @@
+# tests/test_state.py - Snapshot Stores
+import os
+
+from src.metrics import STORE_READS
+from src.state import FileStore
+
+def reads(result: str) -> float:
+    return STORE_READS._values.get(("file", result), 0)
+
+def test_replacement_within_one_mtime_tick_is_not_served_stale(tmp_path):
+    writer, reader = FileStore(str(tmp_path)), FileStore(str(tmp_path))
+    writer.put("kpis", "old")
+    stat = os.stat(writer._file("kpis"))
+    assert reader.get("kpis").value == "old"
+
+    # A coarse-mtime filesystem stamps both writes with the same time
+    writer.put("kpis", "new")
+    os.utime(writer._file("kpis"), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert reader.get("kpis").value == "new"
+
+def test_put_does_not_count_a_read(tmp_path):
+    store = FileStore(str(tmp_path))
+    misses, hits = reads("miss"), reads("hit")
+    snapshot = store.put("kpis", {"page_views": 1})
+    assert snapshot.value == {"page_views": 1}
+    assert (reads("miss"), reads("hit")) == (misses, hits)
+    assert store.get("kpis") is snapshot
+    assert reads("hit") == hits + 1
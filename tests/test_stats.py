@@ -0,0 +1,91 @@
+# tests/test_stats.py - Incremental Statistics
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.stats import Ewma, KpiEngine, KpiTracker, RunningStats, WindowedSum
+
+def test_running_stats_match_a_batch_computation():
+    values = np.random.default_rng(0).normal(50, 12, 10_000)
+    stats = RunningStats()
+    for x in values.tolist():
+        stats.push(x)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var(ddof=1))
+    assert stats.std == pytest.approx(values.std(ddof=1))
+
+def test_running_stats_of_one_value_have_no_spread():
+    stats = RunningStats()
+    stats.push(3.0)
+    assert (stats.mean, stats.variance) == (3.0, 0.0)
+
+def test_ewma_matches_pandas():
+    values = np.random.default_rng(1).normal(0, 1, 500)
+    ewma = Ewma(0.1)
+    for x in values.tolist():
+        ewma.push(x)
+    assert ewma.value == pytest.approx(pd.Series(values).ewm(alpha=0.1, adjust=False).mean().iloc[-1])
+
+def brute_window(ts, values, bucket, start, end):
+    buckets = ts // bucket
+    inside = (buckets >= start // bucket) & (buckets < math.ceil(end / bucket))
+    return values[inside].sum(), int(inside.sum())
+
+def test_windowed_sum_matches_a_scan_with_late_samples():
+    rng = np.random.default_rng(2)
+    ts = np.sort(rng.uniform(0, 6000, 2000))
+    # A few samples arrive late, out of order
+    order = np.arange(len(ts))
+    order[100:110] = order[100:110][::-1]
+    ts, values = ts[order], rng.normal(10, 3, len(ts))
+    sums = WindowedSum(bucket=60, horizon=1000)
+    for t, v in zip(ts.tolist(), values.tolist()):
+        sums.add(t, v)
+    for start, end in ((0, 6000), (600, 1800), (1234, 1300), (5940, 6000)):
+        total, count = sums.window(start, end)
+        expected_total, expected_count = brute_window(ts, values, 60, start, end)
+        assert total == pytest.approx(expected_total) and count == expected_count
+
+def test_windowed_sum_evicts_buckets_past_the_horizon():
+    sums = WindowedSum(bucket=10, horizon=5)
+    for t in range(0, 200, 10):
+        sums.add(t, 1.0)
+    # At most 2 * horizon buckets are kept; older ones are gone
+    assert sums.last - sums.first < 2 * 5
+    assert sums.window(0, 50) == (0.0, 0)
+    assert sums.window(150, 200) == (5.0, 5)
+    # Samples older than the kept buckets are ignored
+    sums.add(5, 100.0)
+    assert sums.window(0, 200)[1] == sums.last - sums.first + 1
+
+def test_kpi_delta_compares_consecutive_periods():
+    tracker = KpiTracker(bucket=300, horizon=400)
+    ts = np.arange(0, 4 * 3600, 60.0)
+    values = np.where(ts >= 3 * 3600, 20.0, 10.0) + (ts % 600 == 0)
+    for t, v in zip(ts.tolist(), values.tolist()):
+        tracker.push(t, v)
+    frame = pd.DataFrame({"ts": ts, "v": values})
+    end = (ts[-1] // 300 + 1) * 300
+    current = frame[(frame.ts >= end - 3600) & (frame.ts < end)].v.mean()
+    previous = frame[(frame.ts >= end - 7200) & (frame.ts < end - 3600)].v.mean()
+    assert tracker.delta(3600) == pytest.approx(current - previous)
+    assert tracker.delta(3600, pct=True) == pytest.approx((current - previous) / previous * 100)
+    card = tracker.card(3600)
+    assert card.value == values[-1] and card.mean == pytest.approx(values.mean())
+
+def test_kpi_engine_batches_equal_one_pass():
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2026-10-01", periods=600, freq="min"),
+        **{column: rng.normal(50, 5, 600) for column in ("cpu", "memory", "requests", "response_time")},
+    })
+    whole, batched = KpiEngine(), KpiEngine()
+    expected = whole.ingest("time_series", frame)
+    # Each batch re-sends the frame so far; only new rows are folded in
+    for end in (200, 200, 450, 600):
+        cards = batched.ingest("time_series", frame.iloc[:end])
+    assert cards == expected
+    assert batched.trackers["cpu"].stats.count == 600
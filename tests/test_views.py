@@ -0,0 +1,133 @@
+# tests/test_views.py - Saved Log and Network Views
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import views
+from src.logstore import LogStore
+from src.sketches import DistinctEngine
+from src.sources import LOG_LEVELS, LOG_SOURCES
+from src.state import MemoryStore
+from src.views import NetworkView, NetworkViewEngine, SavedView, ViewEngine, filter_plan, period_start, since
+
+# =====LOG VIEWS=====
+START = datetime(2026, 10, 1, 12, 0)
+
+class Clock(datetime):
+    current = START
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+@pytest.fixture
+def clock(monkeypatch):
+    Clock.current = START
+    monkeypatch.setattr(views, "datetime", Clock)
+    return Clock
+
+def log_rows(start: int, count: int) -> pd.DataFrame:
+    # One row every 10 seconds from START
+    i = np.arange(start, start + count)
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp(START) + pd.to_timedelta(i * 10, unit="s"),
+        "level": np.asarray(LOG_LEVELS)[i % len(LOG_LEVELS)],
+        "source": np.asarray(LOG_SOURCES)[i * 7 % len(LOG_SOURCES)],
+        "message": np.where(i % 3 == 0, "Connection timeout", "Request ok"),
+        "ip": [f"10.0.0.{n % 250 + 1}" for n in i],
+    })
+
+SAVED = [
+    SavedView("errors", "ERROR", "All", "", "Last Hour"),
+    SavedView("db timeouts", "All", "postgres", "timeout", "Last 6 Hours"),
+]
+
+def test_views_match_a_fresh_plan_across_ingests_and_trims(clock):
+    store = MemoryStore()
+    store.put("saved_views", [tuple(view) for view in SAVED])
+    log_store = LogStore(max_rows=400)
+    engine = ViewEngine(store, log_store)
+    # 60 rows (ten minutes) per batch, so the store trims after a few
+    for batch in range(12):
+        log_store.append(log_rows(batch * 60, 60))
+        clock.current = START + timedelta(minutes=10 * (batch + 1))
+        results = engine.ingest("logs", None)
+        table = log_store.snapshot()
+        for view in SAVED:
+            fresh = filter_plan(table, *view.filters(), now=clock.current).execute()
+            result = results[view.name]
+            np.testing.assert_array_equal(result.positions(table, since(view.time_range, clock.current)), fresh)
+            assert result.error is None
+            assert engine.last_id[view.name] == table.id[-1]
+            # Matched once each, in row order
+            assert np.all(np.diff(result.ids) > 0)
+    assert len(table) < 12 * 60
+
+def test_an_ingest_without_new_rows_only_trims_the_window(clock):
+    store = MemoryStore()
+    store.put("saved_views", [tuple(SAVED[0])])
+    log_store = LogStore()
+    log_store.append(log_rows(0, 360))
+    clock.current = START + timedelta(hours=1)
+    engine = ViewEngine(store, log_store)
+    before = engine.ingest("logs", None)["errors"]
+    assert engine.ingest("logs", None)["errors"].ids.tolist() == before.ids.tolist()
+
+    clock.current = START + timedelta(hours=1, minutes=30)
+    after = engine.ingest("logs", None)["errors"]
+    np.testing.assert_array_equal(after.ids, before.ids[before.timestamps >= np.datetime64(START + timedelta(minutes=30))])
+    clock.current = START + timedelta(hours=3)
+    assert len(engine.ingest("logs", None)["errors"].ids) == 0
+
+def test_invalid_saved_query_reports_its_error(clock):
+    store = MemoryStore()
+    store.put("saved_views", [tuple(SavedView("bad", query="level:FATAL")), tuple(SAVED[0])])
+    log_store = LogStore()
+    log_store.append(log_rows(0, 100))
+    clock.current = START + timedelta(minutes=20)
+    results = ViewEngine(store, log_store).ingest("logs", None)
+    assert "FATAL" in results["bad"].error and len(results["bad"].ids) == 0
+    assert results["errors"].error is None and len(results["errors"].ids) > 0
+
+# =====NETWORK VIEWS=====
+def logs(days_ago: list[int], user_ids: list[int]) -> pd.DataFrame:
+    now = pd.Timestamp.now()
+    return pd.DataFrame({
+        "timestamp": [now - pd.Timedelta(days=d) for d in days_ago],
+        "source": "api",
+        "user_id": pd.array(user_ids, dtype="Int64"),
+        "ip": [f"10.0.0.{u}" for u in user_ids],
+    })
+
+def test_saved_periods_are_counted_as_logs_land():
+    store = MemoryStore()
+    store.put("saved_network_views", [tuple(NetworkView("week")), tuple(NetworkView("quarter", "Last 90 Days", "send_message"))])
+    distinct = DistinctEngine()
+    engine = NetworkViewEngine(store, distinct)
+
+    batch = logs([60, 50, 3, 2], [1, 2, 3, 3])
+    distinct.ingest("logs", batch)
+    results = engine.ingest("logs", batch)
+    assert round(results["week"].users) == 1
+    assert round(results["quarter"].users) == 3
+    assert results["quarter"].view.endpoint == "send_message"
+
+    batch = pd.concat([batch, logs([0], [4])], ignore_index=True)
+    distinct.ingest("logs", batch)
+    results = engine.ingest("logs", batch)
+    assert (round(results["week"].users), round(results["week"].ips)) == (2, 2)
+
+def test_deleted_views_drop_out():
+    store = MemoryStore()
+    store.put("saved_network_views", [tuple(NetworkView("week"))])
+    engine = NetworkViewEngine(store, DistinctEngine())
+    assert list(engine.ingest("logs", None)) == ["week"]
+    store.put("saved_network_views", [])
+    assert engine.ingest("logs", None) == {}
+
+def test_period_start():
+    now = pd.Timestamp("2026-03-15 12:00")
+    assert period_start("Last 30 Days", now) == pd.Timestamp("2026-02-13 12:00")
+    assert period_start("Year to Date", now) == pd.Timestamp("2026-01-01")